@@ -0,0 +1,417 @@
+"""
+Columnar analytics copy of expenses for multi-year questions.
+
+Postgres stays the system of record: every write goes there. This module
+keeps a read-only copy of `expenses` as Parquet files under ANALYTICS_DIR
+and answers aggregate questions ("category trend per month for 5 years")
+with DuckDB, which scans only the date/category/amount_paise columns of the
+row groups whose user_id statistics match.
+
+Refresh is incremental: each run copies the rows with created_at after
+the last watermark of every source database (each shard has its own) with
+COPY ... TO STDOUT, served by the BRIN index on created_at, and writes
+them as one new Parquet part sorted by (user_id, date). Rows whose
+transaction committed after a refresh passed their created_at are caught
+by re-reading ANALYTICS_OVERLAP seconds before the watermark and skipping
+the ids already copied. Parts are compacted into one file once there are
+more than COMPACT_AFTER_PARTS of them. Queries never wait on a pull: a
+query that finds the copy stale starts a refresh on a background thread
+and answers from the copy as it is, and the query lock is only held to
+swap part files.
+
+The first build copies every row, so it happens ahead of time: the MCP
+server starts it in the background at startup, or run
+`python analytics.py rebuild` before enabling the tool. Until it has
+finished, queries raise ValueError instead of waiting for it.
+
+The copy is append-only: rows deleted in Postgres (rebalance.py moves,
+manual deletes) stay in it until `python analytics.py rebuild`. Copies
+made before migration 006 (NUMERIC amounts) must be rebuilt too.
+
+Needs the optional `duckdb` package (pip install -r requirements-analytics.txt).
+
+Configuration (environment):
+    ANALYTICS_DIR       directory of the copy; unset disables analytics
+    ANALYTICS_MAX_AGE   seconds before a query refreshes first (default 60)
+    ANALYTICS_OVERLAP   seconds re-read before the watermark (default 300)
+
+Usage (CLI):
+    python analytics.py refresh
+    python analytics.py rebuild
+    python analytics.py trend --user-id user_123 --start 2021-01-01 --end 2025-12-31
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from db import _env_number, get_db, get_shard_db, shard_ring
+from storage import format_paise
+
+try:
+    import duckdb
+except ImportError:  # optional, only needed when ANALYTICS_DIR is set
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ("day", "week", "month", "quarter", "year")
+
+COMPACT_AFTER_PARTS = 32
+
+# created_at leaves Postgres as UTC text so the copy and the watermarks
+# do not depend on the session time zone
+EXPORT_SQL = """
+    COPY (
+        SELECT id, user_id, date, amount_paise, category, merchant,
+               to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.US')
+        FROM expenses
+        WHERE created_at > %s::timestamp AT TIME ZONE 'UTC'
+    ) TO STDOUT (FORMAT CSV)
+"""
+
+CSV_COLUMNS = {
+    "id": "VARCHAR",
+    "user_id": "VARCHAR",
+    "date": "DATE",
+    "amount_paise": "BIGINT",
+    "category": "VARCHAR",
+    "merchant": "VARCHAR",
+    "created_at": "TIMESTAMP",
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class AnalyticsCopy:
+    """The Parquet copy in `directory`, with its per-source watermarks."""
+
+    def __init__(self, directory: str, max_age: float = 60.0, overlap: float = 300.0):
+        if duckdb is None:
+            raise ValueError("ANALYTICS_DIR is set but the duckdb package is not installed")
+        self.directory = directory
+        self.parts_dir = os.path.join(directory, "expenses")
+        self.state_path = os.path.join(directory, "state.json")
+        self.max_age = max_age
+        self.overlap = timedelta(seconds=overlap)
+        # _refresh_lock serializes refreshes (the slow Postgres pulls);
+        # _lock covers the query connection and swaps of the part files
+        self._refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._duck = duckdb.connect()
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["AnalyticsCopy"]:
+        directory = os.getenv("ANALYTICS_DIR")
+        if not directory:
+            return None
+        return cls(
+            directory,
+            max_age=_env_number("ANALYTICS_MAX_AGE", 60.0, float),
+            overlap=_env_number("ANALYTICS_OVERLAP", 300.0, float),
+        )
+
+    # -------- state --------
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"watermarks": {}, "refreshed_at": 0.0}
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def _parts(self) -> List[str]:
+        return sorted(
+            os.path.join(self.parts_dir, name)
+            for name in os.listdir(self.parts_dir)
+            if name.endswith(".parquet")
+        )
+
+    # -------- refresh --------
+
+    @staticmethod
+    def _sources() -> Dict[str, Any]:
+        ring = shard_ring()
+        if ring is None:
+            return {"primary": get_db()}
+        return {name: get_shard_db(name) for name in ring.names}
+
+    def _pull(self, db, since: datetime, csv_path: str) -> None:
+        with db.connection() as conn, open(csv_path, "wb") as out:
+            with conn.cursor().copy(EXPORT_SQL, (since,)) as copy:
+                for data in copy:
+                    out.write(data)
+
+    def _append(
+        self, csv_path: str, since: datetime, source: str
+    ) -> Tuple[int, Optional[datetime]]:
+        """Write the new rows of `csv_path` as a part; returns (rows, max created_at)."""
+        if os.path.getsize(csv_path) == 0:
+            # idle source: read_csv cannot sniff an empty file
+            return 0, None
+        duck = self._duck.cursor()
+        duck.execute(
+            "CREATE OR REPLACE TEMP TABLE incoming AS "
+            "SELECT * FROM read_csv(?, header = false, columns = ?)",
+            [csv_path, CSV_COLUMNS]
+        )
+        newest = duck.execute("SELECT max(created_at) FROM incoming").fetchone()[0]
+        parts = self._parts()
+        if parts:
+            duck.execute(
+                "DELETE FROM incoming WHERE id IN "
+                "(SELECT id FROM read_parquet(?) WHERE created_at > ?)",
+                [parts, since]
+            )
+        rows = duck.execute("SELECT count(*) FROM incoming").fetchone()[0]
+        if rows:
+            part = os.path.join(self.parts_dir, f"part-{time.time_ns()}-{source}.parquet")
+            duck.execute(
+                f"COPY (SELECT * FROM incoming ORDER BY user_id, date) "
+                f"TO '{part}.tmp' (FORMAT PARQUET)"
+            )
+            os.replace(part + ".tmp", part)
+        duck.execute("DROP TABLE incoming")
+        duck.close()
+        return rows, newest
+
+    def _refresh(self) -> int:
+        # caller holds _refresh_lock; a new part appears with one atomic rename
+        state = self._load_state()
+        added = 0
+        for source, db in self._sources().items():
+            mark = state["watermarks"].get(source)
+            watermark = datetime.fromisoformat(mark) if mark else EPOCH
+            since = max(EPOCH, watermark - self.overlap)
+            with tempfile.TemporaryDirectory(dir=self.directory) as tmp:
+                csv_path = os.path.join(tmp, "rows.csv")
+                self._pull(db, since, csv_path)
+                rows, newest = self._append(csv_path, since, source)
+            added += rows
+            if newest is not None and newest > watermark:
+                state["watermarks"][source] = newest.isoformat()
+        state["refreshed_at"] = time.time()
+        self._save_state(state)
+        if len(self._parts()) > COMPACT_AFTER_PARTS:
+            self._compact()
+        return added
+
+    def refresh(self) -> int:
+        """
+        Copy the rows created since the last refresh from every source.
+
+        Returns:
+            Number of rows added to the copy
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def is_built(self) -> bool:
+        """True once a full build (or the first refresh) has completed."""
+        return self._load_state()["refreshed_at"] > 0
+
+    def is_stale(self) -> bool:
+        """True if the last refresh is ANALYTICS_MAX_AGE seconds old (or never ran)."""
+        return time.time() - self._load_state()["refreshed_at"] >= self.max_age
+
+    def refresh_in_background(self) -> bool:
+        """
+        Start a refresh (the full build of a new copy) on a daemon thread.
+
+        Returns:
+            False if a refresh is already running
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        self._refresh_thread = threading.Thread(
+            target=self._background_refresh, name="analytics-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+        return True
+
+    def _background_refresh(self) -> None:
+        # runs with _refresh_lock held by refresh_in_background
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception("Analytics refresh failed")
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_if_stale(self) -> None:
+        """
+        Before a query: refresh an old copy in the background and serve the
+        copy as it is meanwhile.
+
+        Raises:
+            ValueError: If the copy has not been built yet (a build is
+                        started if none is running)
+        """
+        if not self.is_built():
+            self.refresh_in_background()
+            raise ValueError(
+                "The analytics copy is still being built; try again later "
+                "(or run `python analytics.py rebuild` ahead of time)"
+            )
+        if self.is_stale():
+            self.refresh_in_background()
+
+    def _compact(self) -> None:
+        parts = self._parts()
+        merged = os.path.join(self.parts_dir, f"part-{time.time_ns()}-compact.parquet")
+        duck = self._duck.cursor()
+        duck.execute(
+            f"COPY (SELECT * FROM read_parquet(?) ORDER BY user_id, date) "
+            f"TO '{merged}.tmp' (FORMAT PARQUET)",
+            [parts]
+        )
+        duck.close()
+        # queries list the parts under _lock, so none sees both copies
+        with self._lock:
+            os.replace(merged + ".tmp", merged)
+            for part in parts:
+                os.remove(part)
+
+    def rebuild(self) -> int:
+        """Drop the copy and load every row again."""
+        with self._refresh_lock:
+            with self._lock:
+                shutil.rmtree(self.parts_dir, ignore_errors=True)
+                os.makedirs(self.parts_dir)
+            self._save_state({"watermarks": {}, "refreshed_at": 0.0})
+            return self._refresh()
+
+    # -------- queries --------
+
+    def _query(self, sql: str, params: List[Any]) -> List[tuple]:
+        with self._lock:
+            parts = self._parts()
+            if not parts:
+                return []
+            return self._duck.execute(
+                sql.format(parts="read_parquet(?)"), [parts, *params]
+            ).fetchall()
+
+    def as_of(self) -> Dict[str, str]:
+        """Watermark of every source: the copy holds rows created up to it."""
+        return self._load_state()["watermarks"]
+
+    def category_trend(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str = "month"
+    ) -> Dict[str, Any]:
+        """
+        Spending per category per bucket, in paise.
+
+        Returns:
+            {"periods": [bucket start dates], "categories": {category:
+            [total per period]}, "totals": [total per period]}; empty
+            periods are omitted
+
+        Raises:
+            ValueError: If bucket is not one of BUCKETS
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}, got '{bucket}'")
+
+        rows = self._query(
+            f"""
+            SELECT date_trunc('{bucket}', date)::date AS period, category,
+                   SUM(amount_paise)::BIGINT
+            FROM {{parts}}
+            WHERE user_id = ? AND date BETWEEN ? AND ?
+            GROUP BY ALL
+            ORDER BY period, category
+            """,
+            [user_id, start_date, end_date]
+        )
+        periods = sorted({period for period, _, _ in rows})
+        index = {period: i for i, period in enumerate(periods)}
+        categories: Dict[str, List[int]] = {}
+        totals = [0] * len(periods)
+        for period, category, total in rows:
+            series = categories.setdefault(category, [0] * len(periods))
+            series[index[period]] = total
+            totals[index[period]] += total
+        return {"periods": periods, "categories": categories, "totals": totals}
+
+    def close(self) -> None:
+        self._duck.close()
+
+
+_analytics: Optional[AnalyticsCopy] = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> AnalyticsCopy:
+    """
+    The process-wide copy configured by ANALYTICS_DIR.
+
+    Raises:
+        ValueError: If analytics is not configured
+    """
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = AnalyticsCopy.from_env()
+    if _analytics is None:
+        raise ValueError("Analytics is not enabled; set ANALYTICS_DIR")
+    return _analytics
+
+
+def analytics_enabled() -> bool:
+    return bool(os.getenv("ANALYTICS_DIR"))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain and query the analytics copy.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("refresh", help="Copy rows created since the last refresh")
+    commands.add_parser("rebuild", help="Reload the whole copy")
+    trend = commands.add_parser("trend", help="Print a user's category trend")
+    trend.add_argument("--user-id", required=True)
+    trend.add_argument("--start", type=date.fromisoformat, required=True)
+    trend.add_argument("--end", type=date.fromisoformat, required=True)
+    trend.add_argument("--bucket", choices=BUCKETS, default="month")
+    args = parser.parse_args(argv)
+
+    copy = get_analytics()
+    if args.command in ("refresh", "rebuild"):
+        started = time.perf_counter()
+        added = copy.refresh() if args.command == "refresh" else copy.rebuild()
+        elapsed = time.perf_counter() - started
+        print(f"Added {added:,} rows in {elapsed:.1f}s; as of {copy.as_of()}")
+        return
+
+    if copy.is_stale():
+        copy.refresh()
+    result = copy.category_trend(args.user_id, args.start, args.end, args.bucket)
+    categories = sorted(result["categories"])
+    print("period\t" + "\t".join(categories) + "\ttotal")
+    for i, period in enumerate(result["periods"]):
+        values = [result["categories"][category][i] for category in categories]
+        print(f"{period}\t" + "\t".join(format_paise(value) for value in values)
+              + f"\t{format_paise(result['totals'][i])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Performance benchmarks for Expense MCP Server.
+
+Benchmarks run against the database in DATABASE_URL and write their
+synthetic rows under a dedicated user_id, which is removed afterwards.
+Run them from the repository root, e.g.:
+
+    python -m benchmarks.bench_monthly_report
+
+bench_tools is the end-to-end suite: it loads a deterministic multi-user
+dataset (benchmarks.datagen, users __bench_zipf_*) and reports per-tool
+latency percentiles under concurrency, optionally against a baseline.
+"""
@@ -0,0 +1,133 @@
+"""
+Benchmark: in-memory breakdowns over dict rows vs NumPy column arrays.
+
+"loops" fetches typed rows with ExpenseModel.list_expenses and builds each
+breakdown with a Python loop over the dicts, the way a tool does today;
+"columns" loads the same range with columns.load_columns and uses the
+ExpenseColumns group-by / cumsum / percentile helpers. Both paths must
+agree to the paisa before anything is timed.
+
+Usage:
+    python -m benchmarks.bench_columns --rows 100000
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Callable, Dict, List
+
+from benchmarks.datagen import Dataset, user_rows
+from columns import ExpenseColumns, load_columns
+from models import ExpenseModel, store
+
+BENCH_USER = "__bench_columns__"
+PERCENTS = [50, 90, 99]
+
+
+def seed(dataset: Dataset) -> None:
+    store.delete_expenses(BENCH_USER)
+    rows = [(id_, BENCH_USER, *rest) for id_, _, *rest in user_rows(dataset, 1, dataset.rows)]
+    store.add_expenses(BENCH_USER, rows)
+
+
+def _breakdown(rows: List[Dict[str, Any]], key: str) -> List[tuple]:
+    sums: Dict[Any, int] = defaultdict(int)
+    counts: Dict[Any, int] = defaultdict(int)
+    for row in rows:
+        sums[row[key]] += row["amount_paise"]
+        counts[row[key]] += 1
+    # same tie order as ExpenseColumns: by name, None last
+    names = sorted(sums, key=lambda name: (name is None, name or ""))
+    return sorted(((name, sums[name], counts[name]) for name in names), key=lambda item: -item[1])
+
+
+def _percentile(values: List[int], percent: float) -> float:
+    # linear interpolation, as numpy.percentile's default
+    position = (len(values) - 1) * percent / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def loops(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    daily: Dict[Any, int] = defaultdict(int)
+    weekly: Dict[Any, int] = defaultdict(int)
+    for row in rows:
+        paise = row["amount_paise"]
+        daily[row["date"]] += paise
+        weekly[row["date"] - timedelta(days=row["date"].weekday())] += paise
+
+    days, running, total = [], [], 0
+    for day in sorted(daily):
+        total += daily[day]
+        days.append(day)
+        running.append(total)
+
+    amounts = sorted(row["amount_paise"] for row in rows)
+    return {
+        "by_category": _breakdown(rows, "category"),
+        "by_merchant": _breakdown(rows, "merchant"),
+        "weekly": [(week, weekly[week]) for week in sorted(weekly)],
+        "running": list(zip(days, running)),
+        "percentiles": [round(_percentile(amounts, percent)) for percent in PERCENTS],
+    }
+
+
+def vectorised(columns: ExpenseColumns) -> Dict[str, Any]:
+    weeks, weekly, _ = columns.by_period("week")
+    days, running = columns.running_total("day")
+    return {
+        "by_category": columns.by_category(),
+        "by_merchant": columns.by_merchant(),
+        "weekly": list(zip(weeks.astype(object), weekly.tolist())),
+        "running": list(zip(days.astype(object), running.tolist())),
+        "percentiles": [round(value) for value in columns.percentiles(PERCENTS).tolist()],
+    }
+
+
+def median_ms(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    dataset = Dataset(users=1, rows=args.rows, years=args.years)
+    start, end = dataset.start, dataset.end
+    try:
+        seed(dataset)
+        rows = ExpenseModel.list_expenses(BENCH_USER, start, end)
+        columns = load_columns(BENCH_USER, start, end)
+        assert loops(rows) == vectorised(columns), "column results differ from the Python loops"
+
+        cases = (
+            ("fetch dict rows", lambda: ExpenseModel.list_expenses(BENCH_USER, start, end)),
+            ("fetch columns", lambda: load_columns(BENCH_USER, start, end)),
+            ("rows -> columns", lambda: ExpenseColumns.from_rows(rows)),
+            ("aggregate loops", lambda: loops(rows)),
+            ("aggregate columns", lambda: vectorised(columns)),
+            ("fetch + loops", lambda: loops(ExpenseModel.list_expenses(BENCH_USER, start, end))),
+            ("fetch + columns", lambda: vectorised(load_columns(BENCH_USER, start, end))),
+        )
+        print(f"{len(rows):,} rows on the {store.name} store\n")
+        print(f"{'path':<18}  {'median ms':>10}  {'rows/s':>12}")
+        for name, fn in cases:
+            ms = median_ms(fn, args.repeat)
+            print(f"{name:<18}  {ms:>10.1f}  {len(rows) / ms * 1000:>12,.0f}")
+    finally:
+        store.delete_expenses(BENCH_USER)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: monthly_report cost as the number of rows in the month grows.
+
+Compares the current aggregate-only get_monthly_summary against the
+previous approach, which counted expenses by fetching every row of the
+month through list_expenses. The result cache is disabled so every call
+reaches the database.
+
+Usage:
+    python -m benchmarks.bench_monthly_report --sizes 10 1000 50000
+"""
+
+import argparse
+import random
+import time
+from datetime import date
+
+from cache import result_cache
+from db import get_db
+from models import ExpenseModel
+
+BENCH_USER = "__bench_monthly_report__"
+CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Health", "Travel"]
+YEAR, MONTH = 2025, 1
+
+
+def seed(rows: int) -> None:
+    """Replace the benchmark user's January data with `rows` expenses."""
+    rng = random.Random(rows)
+    get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+    ExpenseModel.add_expenses(BENCH_USER, [
+        {
+            "expense_date": date(YEAR, MONTH, rng.randint(1, 31)),
+            "amount_paise": rng.randint(100, 500000),
+            "category": rng.choice(CATEGORIES),
+            "merchant": f"Merchant {rng.randint(1, 200)}",
+            "note": "benchmark row with a note of realistic length",
+        }
+        for _ in range(rows)
+    ])
+
+
+def legacy_monthly_summary(user_id: str, start: date, end: date) -> dict:
+    """The pre-aggregate implementation: total, breakdown, then every row."""
+    db = get_db()
+    total = db.execute_query(
+        """
+        SELECT COALESCE(SUM(amount_paise), 0) as total
+        FROM expenses
+        WHERE user_id = %s AND date BETWEEN %s AND %s
+        """,
+        (user_id, start, end)
+    )
+    return {
+        "total_paise": int(total[0]["total"]),
+        "category_breakdown": ExpenseModel.summarize_by_category(user_id, start, end),
+        "expense_count": len(ExpenseModel.list_expenses(user_id, start, end)),
+    }
+
+
+def timeit(fn, repeat: int) -> float:
+    """Return the median wall time of `fn` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    result_cache.backend = None
+    start, end = date(YEAR, MONTH, 1), date(YEAR, MONTH, 31)
+    print(f"{'rows':>8}  {'legacy ms':>10}  {'aggregate ms':>12}  {'speedup':>8}")
+    try:
+        for rows in args.sizes:
+            seed(rows)
+            legacy = timeit(
+                lambda: legacy_monthly_summary(BENCH_USER, start, end), args.repeat
+            )
+            current = timeit(
+                lambda: ExpenseModel.get_monthly_summary(BENCH_USER, YEAR, MONTH),
+                args.repeat
+            )
+            print(f"{rows:>8}  {legacy:>10.2f}  {current:>12.2f}  {legacy / current:>7.1f}x")
+    finally:
+        get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark: sequential vs pipelined independent queries under network latency.
+
+A local TCP proxy adds --latency-ms of round-trip delay between the pool
+and Postgres (simulating a cloud database), then compares:
+
+- "legacy report": the old three-query monthly report (total, category
+  breakdown, count) sent one after another vs in one pipeline flight
+- "N month reports": get_period_report per month vs get_period_reports
+
+The result cache is disabled so every call reaches the database.
+
+Usage:
+    python -m benchmarks.bench_pipeline --latency-ms 20 --months 6
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from datetime import date
+
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+import db as db_module
+from cache import result_cache
+from db import get_db
+from models import ExpenseModel, _month_bounds
+
+BENCH_USER = "__bench_pipeline__"
+YEAR = 2024
+
+LEGACY_QUERIES = [
+    """
+    SELECT COALESCE(SUM(amount_paise), 0) as total
+    FROM expenses WHERE user_id = %s AND date BETWEEN %s AND %s
+    """,
+    """
+    SELECT category, SUM(amount_paise) as total
+    FROM expenses WHERE user_id = %s AND date BETWEEN %s AND %s
+    GROUP BY category ORDER BY total DESC
+    """,
+    """
+    SELECT COUNT(*) as expense_count
+    FROM expenses WHERE user_id = %s AND date BETWEEN %s AND %s
+    """,
+]
+
+
+class DelayProxy:
+    """Forward TCP connections to Postgres, delaying each direction by half the RTT."""
+
+    def __init__(self, target: dict, latency: float):
+        self.target = target
+        self.delay = latency / 2
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+
+    def start(self) -> int:
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, "127.0.0.1", 0)
+            )
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self.port
+
+    async def _open_target(self):
+        host = self.target.get("host") or "localhost"
+        port = int(self.target.get("port") or 5432)
+        if host.startswith("/"):
+            return await asyncio.open_unix_connection(f"{host}/.s.PGSQL.{port}")
+        return await asyncio.open_connection(host, port)
+
+    async def _handle(self, client_reader, client_writer):
+        server_reader, server_writer = await self._open_target()
+        await asyncio.gather(
+            self._pipe(client_reader, server_writer),
+            self._pipe(server_reader, client_writer),
+            return_exceptions=True
+        )
+
+    async def _pipe(self, reader, writer):
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                due, data = await queue.get()
+                if data is None:
+                    writer.close()
+                    return
+                await asyncio.sleep(max(0.0, due - self.loop.time()))
+                writer.write(data)
+                await writer.drain()
+
+        delivery = asyncio.ensure_future(deliver())
+        while True:
+            data = await reader.read(65536)
+            queue.put_nowait((self.loop.time() + self.delay, data or None))
+            if not data:
+                break
+        await delivery
+
+
+def seed(rows: int) -> None:
+    get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+    ExpenseModel.add_expenses(BENCH_USER, [
+        {
+            "expense_date": date(YEAR, i % 12 + 1, i % 28 + 1),
+            "amount_paise": i % 5000 + 100,
+            "category": ["Food", "Transport", "Bills"][i % 3],
+        }
+        for i in range(rows)
+    ])
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    # Route the pool through the proxy
+    target = conninfo_to_dict(os.environ["DATABASE_URL"])
+    port = DelayProxy(target, args.latency_ms / 1000).start()
+    os.environ["DATABASE_URL"] = make_conninfo(
+        os.environ["DATABASE_URL"], host="127.0.0.1", port=port
+    )
+    db_module._db = None
+    result_cache.backend = None
+
+    start, end = _month_bounds(YEAR, 3)
+    legacy = [(query, (BENCH_USER, start, end)) for query in LEGACY_QUERIES]
+    months = [_month_bounds(YEAR, month) for month in range(1, args.months + 1)]
+
+    def legacy_sequential():
+        for query, params in legacy:
+            get_db().execute_query(query, params)
+
+    def legacy_pipelined():
+        get_db().execute_pipeline(legacy)
+
+    def reports_sequential():
+        for first, last in months:
+            ExpenseModel.get_period_report(BENCH_USER, first, last)
+
+    def reports_pipelined():
+        ExpenseModel.get_period_reports(BENCH_USER, months)
+
+    try:
+        seed(args.rows)
+        print(f"simulated RTT {args.latency_ms:.0f} ms")
+        print(f"{'workload':<22}  {'sequential ms':>14}  {'pipelined ms':>13}  {'speedup':>8}")
+        for name, sequential, pipelined in (
+            ("legacy report (3 q)", legacy_sequential, legacy_pipelined),
+            (f"{args.months} month reports", reports_sequential, reports_pipelined),
+        ):
+            pipelined()  # connect and prepare outside the timings
+            seq_ms = median_ms(sequential, args.repeat)
+            pipe_ms = median_ms(pipelined, args.repeat)
+            print(f"{name:<22}  {seq_ms:>14.1f}  {pipe_ms:>13.1f}  {seq_ms / pipe_ms:>7.1f}x")
+    finally:
+        get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+
+
+if __name__ == "__main__":
+    main()
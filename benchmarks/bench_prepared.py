@@ -0,0 +1,86 @@
+"""
+Benchmark: registered prepared statements vs ad-hoc SQL.
+
+Runs the hot read queries (period report, first list page) for a small
+user, where parse and plan are a large share of each call:
+
+- "ad-hoc": SQL text with prepare=False, parsed and planned every call
+- "registry": the models.py Statement, prepared once per connection
+
+The result cache is bypassed; both paths use one pooled connection.
+
+Usage:
+    python -m benchmarks.bench_prepared --calls 2000
+"""
+
+import argparse
+import random
+import time
+from datetime import date
+
+from db import get_db, statements
+from models import (
+    ExpenseModel, LIST_EXPENSES_FIRST_PAGE, PERIOD_REPORT, _range_params
+)
+
+BENCH_USER = "__bench_prepared__"
+CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Health", "Travel"]
+START, END = date(2024, 1, 10), date(2024, 3, 20)
+
+
+def seed(rows: int) -> None:
+    rng = random.Random(rows)
+    get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+    ExpenseModel.add_expenses(BENCH_USER, [
+        {
+            "expense_date": date(2024, rng.randint(1, 3), rng.randint(1, 28)),
+            "amount_paise": rng.randint(100, 50000),
+            "category": rng.choice(CATEGORIES),
+        }
+        for _ in range(rows)
+    ])
+
+
+def run(conn, statement, params, prepared: bool, calls: int) -> float:
+    """Mean microseconds per call."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        conn.execute(statement.sql, params, prepare=prepared).fetchall()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [
+        (PERIOD_REPORT, _range_params(BENCH_USER, START, END)),
+        (LIST_EXPENSES_FIRST_PAGE, (BENCH_USER, START, END, 51)),
+    ]
+
+    try:
+        seed(args.rows)
+        with get_db().connection() as conn:
+            print(f"{'statement':<26}  {'ad-hoc us':>10}  {'registry us':>12}  {'speedup':>8}")
+            for statement, params in cases:
+                # Warm both paths (and the prepared statement) first
+                run(conn, statement, params, False, 50)
+                run(conn, statement, params, True, 50)
+                adhoc = run(conn, statement, params, False, args.calls)
+                prepared = run(conn, statement, params, True, args.calls)
+                print(
+                    f"{statement.name:<26}  {adhoc:>10.1f}  {prepared:>12.1f}  "
+                    f"{adhoc / prepared:>7.2f}x"
+                )
+
+            # Exercise the model path and show what the registry recorded
+            ExpenseModel.list_expenses_page(BENCH_USER, START, END, 50)
+            print("prepared on:", statements.snapshot())
+    finally:
+        get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+
+
+if __name__ == "__main__":
+    main()
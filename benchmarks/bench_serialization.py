@@ -0,0 +1,104 @@
+"""
+Benchmark: list_expenses throughput, Python-side vs Postgres-side serialization.
+
+"legacy" fetches typed rows (UUID, date, paise, datetime) and rebuilds
+every row with the old per-row comprehension; "json-ready" selects
+EXPENSE_JSON_COLUMNS so rows come back serializable; "tool" pages
+through list_expenses_tool (json-ready keyset pages of MAX_PAGE_SIZE).
+
+Usage:
+    python -m benchmarks.bench_serialization --rows 20000
+"""
+
+import argparse
+import random
+import time
+from datetime import date
+
+from db import get_db
+from models import ExpenseModel, LIST_EXPENSES_SQL, LIST_EXPENSES_JSON_SQL
+from tools import MAX_PAGE_SIZE, list_expenses_tool
+
+BENCH_USER = "__bench_serialization__"
+CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Health", "Travel"]
+START, END = date(2024, 1, 1), date(2024, 12, 31)
+
+
+def seed(rows: int) -> None:
+    rng = random.Random(rows)
+    get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+    ExpenseModel.add_expenses(BENCH_USER, [
+        {
+            "expense_date": date(2024, rng.randint(1, 12), rng.randint(1, 28)),
+            "amount_paise": rng.randint(100, 500000),
+            "category": rng.choice(CATEGORIES),
+            "merchant": f"Merchant {rng.randint(1, 200)}",
+            "note": "benchmark row with a note of realistic length",
+        }
+        for _ in range(rows)
+    ])
+
+
+def legacy() -> list:
+    expenses = get_db().execute_query(LIST_EXPENSES_SQL, (BENCH_USER, START, END))
+    return [
+        {
+            "id": str(exp["id"]),
+            "user_id": exp["user_id"],
+            "date": exp["date"].isoformat(),
+            "amount": exp["amount_paise"] / 100,
+            "category": exp["category"],
+            "merchant": exp["merchant"],
+            "note": exp["note"],
+            "created_at": exp["created_at"].isoformat()
+        }
+        for exp in expenses
+    ]
+
+
+def json_ready() -> list:
+    return get_db().execute_query(LIST_EXPENSES_JSON_SQL, (BENCH_USER, START, END))
+
+
+def tool() -> list:
+    expenses, cursor = [], None
+    while True:
+        page = list_expenses_tool(
+            BENCH_USER, START.isoformat(), END.isoformat(), MAX_PAGE_SIZE, cursor
+        )
+        expenses += page["expenses"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return expenses
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    try:
+        seed(args.rows)
+        assert legacy() == tool(), "json-ready rows differ from legacy output"
+
+        print(f"{'path':<12}  {'median ms':>10}  {'rows/s':>12}")
+        for name, fn in (("legacy", legacy), ("json-ready", json_ready), ("tool", tool)):
+            ms = median_ms(fn, args.repeat)
+            print(f"{name:<12}  {ms:>10.1f}  {args.rows / ms * 1000:>12,.0f}")
+    finally:
+        get_db().execute_update("DELETE FROM expenses WHERE user_id = %s", (BENCH_USER,))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Benchmark: latency and throughput of the MCP tools under concurrency.
+
+Loads the deterministic Zipf dataset from benchmarks.datagen (skip with
+--no-load to reuse a loaded one), then drives add_expense, list_expenses
+(one month), summarize_expenses (90 days), monthly_report and
+spending_trend (weekly, up to 2 years), one tool at a time, from
+--concurrency workers for --duration seconds each. Users are picked with
+the same Zipf weights as their activity, so heavy users get most of the
+traffic. Reports p50/p95/p99 latency and requests per second.
+
+"async" mode runs the *_async tools on one event loop (as the MCP server
+does); "sync" mode runs the sync tools from a thread pool. Requests beyond
+DB_POOL_MAX_SIZE wait for a connection, which is part of the latency.
+The result cache is off unless --cache is given.
+
+Pass --json to save the results and --baseline with a previous file to
+exit 1 when a p95 regressed by more than --tolerance.
+
+Usage:
+    python -m benchmarks.bench_tools --users 1000 --rows 200000 --concurrency 1 8 32
+    python -m benchmarks.bench_tools --no-load --json after.json --baseline before.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import datagen
+from cache import result_cache
+from db import close_async_db
+from tools import (
+    add_expense_tool, add_expense_tool_async,
+    list_expenses_tool, list_expenses_tool_async,
+    monthly_report_tool, monthly_report_tool_async,
+    spending_trend_tool, spending_trend_tool_async,
+    summarize_expenses_tool, summarize_expenses_tool_async,
+)
+
+TOOLS: Dict[str, Tuple[Callable, Callable]] = {
+    "add_expense": (add_expense_tool, add_expense_tool_async),
+    "list_expenses": (list_expenses_tool, list_expenses_tool_async),
+    "summarize_expenses": (summarize_expenses_tool, summarize_expenses_tool_async),
+    "monthly_report": (monthly_report_tool, monthly_report_tool_async),
+    "spending_trend": (spending_trend_tool, spending_trend_tool_async),
+}
+
+
+class Workload:
+    """Deterministic stream of tool arguments for one worker."""
+
+    def __init__(self, dataset: datagen.Dataset, seed: str):
+        self.dataset = dataset
+        self.rng = random.Random(seed)
+        self.user_ids = dataset.user_ids()
+        self.cum_weights = list(itertools.accumulate(dataset.weights()))
+        self.days = (dataset.end - dataset.start).days + 1
+
+    def _user(self) -> str:
+        return self.rng.choices(self.user_ids, cum_weights=self.cum_weights)[0]
+
+    def _day(self):
+        return self.dataset.start + timedelta(days=self.rng.randrange(self.days))
+
+    def kwargs(self, tool: str) -> Dict[str, Any]:
+        user_id, day = self._user(), self._day()
+        if tool == "add_expense":
+            category = self.rng.choice(list(datagen.CATEGORIES))
+            return {
+                "user_id": user_id,
+                "date": day.isoformat(),
+                "amount": round(self.rng.uniform(10, 2000), 2),
+                "category": category,
+                "merchant": self.rng.choice(datagen.CATEGORIES[category][0]),
+            }
+        if tool == "list_expenses":
+            first = day.replace(day=1)
+            last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            return {
+                "user_id": user_id,
+                "start_date": first.isoformat(),
+                "end_date": last.isoformat(),
+            }
+        if tool == "summarize_expenses":
+            return {
+                "user_id": user_id,
+                "start_date": day.isoformat(),
+                "end_date": (day + timedelta(days=89)).isoformat(),
+            }
+        if tool == "spending_trend":
+            return {
+                "user_id": user_id,
+                "start_date": max(self.dataset.start, day - timedelta(days=729)).isoformat(),
+                "end_date": day.isoformat(),
+                "bucket": "week",
+            }
+        return {"user_id": user_id, "month": day.strftime("%Y-%m")}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted `samples`."""
+    if not samples:
+        return 0.0
+    rank = max(1, -(-len(samples) * pct // 100))
+    return samples[int(rank) - 1]
+
+
+def summarize(tool: str, concurrency: int, samples: List[float], errors: int,
+              elapsed: float) -> Dict[str, Any]:
+    samples.sort()
+    return {
+        "tool": tool,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / elapsed,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+    }
+
+
+def run_sync(tool: str, concurrency: int, workloads: List[Workload],
+             duration: float) -> Dict[str, Any]:
+    fn = TOOLS[tool][0]
+    deadline = time.perf_counter() + duration
+
+    def worker(workload: Workload) -> Tuple[List[float], int]:
+        samples, errors = [], 0
+        while time.perf_counter() < deadline:
+            kwargs = workload.kwargs(tool)
+            started = time.perf_counter()
+            try:
+                fn(**kwargs)
+            except Exception:
+                errors += 1
+                continue
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, workloads))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        tool, concurrency,
+        [sample for samples, _ in results for sample in samples],
+        sum(errors for _, errors in results), elapsed
+    )
+
+
+async def run_async(tool: str, concurrency: int, workloads: List[Workload],
+                    duration: float) -> Dict[str, Any]:
+    fn = TOOLS[tool][1]
+    deadline = time.perf_counter() + duration
+    samples: List[float] = []
+    errors = 0
+
+    async def worker(workload: Workload) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            kwargs = workload.kwargs(tool)
+            started = time.perf_counter()
+            try:
+                await fn(**kwargs)
+            except Exception:
+                errors += 1
+                continue
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(workload) for workload in workloads))
+    return summarize(tool, concurrency, samples, errors, time.perf_counter() - started)
+
+
+def run_all(args: argparse.Namespace, dataset: datagen.Dataset) -> List[Dict[str, Any]]:
+    def workloads(tool: str, concurrency: int) -> List[Workload]:
+        return [
+            Workload(dataset, f"{dataset.seed}:{tool}:{concurrency}:{worker}")
+            for worker in range(concurrency)
+        ]
+
+    cases = [(tool, concurrency) for concurrency in args.concurrency for tool in args.tools]
+    if args.mode == "sync":
+        # A short single-worker pass first opens connections and prepares statements
+        for tool in args.tools:
+            run_sync(tool, 1, workloads(tool, 1), args.warmup)
+        return [
+            run_sync(tool, concurrency, workloads(tool, concurrency), args.duration)
+            for tool, concurrency in cases
+        ]
+
+    async def main_async() -> List[Dict[str, Any]]:
+        try:
+            for tool in args.tools:
+                await run_async(tool, 1, workloads(tool, 1), args.warmup)
+            return [
+                await run_async(tool, concurrency, workloads(tool, concurrency), args.duration)
+                for tool, concurrency in cases
+            ]
+        finally:
+            await close_async_db()
+
+    return asyncio.run(main_async())
+
+
+def regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                tolerance: float) -> List[str]:
+    """Cases whose p95 exceeds the baseline's by more than `tolerance`."""
+    before = {(row["tool"], row["concurrency"]): row for row in baseline}
+    found = []
+    for row in results:
+        old = before.get((row["tool"], row["concurrency"]))
+        if old and row["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            found.append(
+                f"{row['tool']} x{row['concurrency']}: p95 "
+                f"{old['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms"
+            )
+    return found
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    datagen.add_arguments(parser)
+    parser.add_argument("--no-load", action="store_true", help="Reuse the loaded dataset")
+    parser.add_argument("--keep", action="store_true", help="Keep the dataset afterwards")
+    parser.add_argument("--tools", nargs="+", choices=list(TOOLS), default=list(TOOLS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per case")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds per tool")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache on")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed p95 increase over the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    dataset = datagen.dataset_from_args(args)
+
+    if not args.cache:
+        result_cache.backend = None
+
+    try:
+        if not args.no_load:
+            started = time.perf_counter()
+            loaded = datagen.load(dataset)
+            print(
+                f"loaded {loaded:,} rows for {dataset.users:,} users "
+                f"in {time.perf_counter() - started:.1f} s",
+                file=sys.stderr
+            )
+        results = run_all(args, dataset)
+    finally:
+        if not args.keep and not args.no_load:
+            datagen.drop(dataset)
+
+    print(f"{'tool':<20} {'conc':>5} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in results:
+        print(
+            f"{row['tool']:<20} {row['concurrency']:>5} {row['requests']:>9,} "
+            f"{row['errors']:>7,} {row['rps']:>9.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump({"dataset": vars(args) | {"end": str(args.end)}, "results": results},
+                      out, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            found = regressions(results, json.load(baseline_file)["results"], args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
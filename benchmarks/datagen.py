@@ -0,0 +1,168 @@
+"""
+Deterministic synthetic multi-user data for the benchmarks.
+
+Users are ranked by activity with a Zipf distribution: user k gets a share
+of the rows proportional to 1 / k**skew, so a few heavy users hold most of
+the data and a long tail holds a few rows each, as in production. Each row
+has a category with its own merchants and log-normal amount distribution
+and a date spread over the last --years years before --end.
+
+The same --seed, --users, --rows, --years and --end always produce the
+same users, ids, dates, amounts, categories and merchants (created_at is
+set at load time). Rows are loaded per user through the configured store
+(models.store): COPY on the user's shard on Postgres, one transaction per
+user on the embedded SQLite backend.
+
+Usage:
+    python -m benchmarks.datagen --users 1000 --rows 500000 --years 3
+    python -m benchmarks.datagen --users 1000 --drop
+"""
+
+import argparse
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+from uuid import UUID
+
+from models import store
+from storage import to_paise
+
+USER_PREFIX = "__bench_zipf_"
+
+# category: (merchants, median amount, log-normal sigma)
+CATEGORIES = {
+    "Food": (["Swiggy", "Zomato", "Starbucks", "Dominos", "Local Cafe", "Haldiram's"], 350, 0.7),
+    "Groceries": (["BigBasket", "DMart", "Blinkit", "Reliance Fresh", "Nature's Basket"], 1200, 0.8),
+    "Transport": (["Uber", "Ola", "Rapido", "Metro Card", "Indian Oil", "HP Petrol"], 250, 0.9),
+    "Shopping": (["Amazon", "Flipkart", "Myntra", "Decathlon", "Croma"], 1800, 1.1),
+    "Bills": (["Airtel", "Jio", "BESCOM", "Tata Power", "ACT Fibernet"], 900, 0.6),
+    "Health": (["Apollo Pharmacy", "1mg", "Practo", "Cult.fit"], 700, 1.0),
+    "Entertainment": (["Netflix", "BookMyShow", "Spotify", "PVR"], 450, 0.6),
+    "Travel": (["IRCTC", "IndiGo", "MakeMyTrip", "OYO", "Airbnb"], 6000, 1.0),
+}
+
+# Relative frequency of each category
+CATEGORY_WEIGHTS = [30, 14, 20, 10, 8, 6, 7, 5]
+
+NOTES = [None, None, None, "weekend", "with friends", "monthly", "reimbursable", "gift"]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Parameters that fully determine the generated rows."""
+    users: int = 1000
+    rows: int = 200_000
+    years: int = 3
+    skew: float = 1.1
+    seed: int = 42
+    end: date = date(2025, 12, 31)
+
+    @property
+    def start(self) -> date:
+        return self.end - timedelta(days=365 * self.years - 1)
+
+    def user_id(self, rank: int) -> str:
+        return f"{USER_PREFIX}{rank:06d}"
+
+    def user_ids(self) -> List[str]:
+        return [self.user_id(rank) for rank in range(1, self.users + 1)]
+
+    def weights(self) -> List[float]:
+        """Zipf share of the activity of each user, by rank."""
+        raw = [1 / rank ** self.skew for rank in range(1, self.users + 1)]
+        total = sum(raw)
+        return [weight / total for weight in raw]
+
+    def row_counts(self) -> List[int]:
+        """Rows per user, by rank; every user has at least one."""
+        return [max(1, round(self.rows * weight)) for weight in self.weights()]
+
+
+def user_rows(dataset: Dataset, rank: int, count: int) -> Iterator[Tuple]:
+    """ExpenseStore.add_expenses rows for one user, independent of the other users."""
+    rng = random.Random(f"{dataset.seed}:{rank}")
+    user_id = dataset.user_id(rank)
+    days = (dataset.end - dataset.start).days + 1
+    categories = list(CATEGORIES)
+
+    for _ in range(count):
+        category = rng.choices(categories, CATEGORY_WEIGHTS)[0]
+        merchants, median, sigma = CATEGORIES[category]
+        amount = max(1.0, rng.lognormvariate(math.log(median), sigma))
+        yield (
+            UUID(int=rng.getrandbits(128), version=4),
+            user_id,
+            dataset.start + timedelta(days=rng.randrange(days)),
+            to_paise(f"{amount:.2f}"),
+            category,
+            rng.choice(merchants),
+            rng.choice(NOTES),
+        )
+
+
+def drop(dataset: Dataset) -> int:
+    """Delete the rows of every generated user; returns rows deleted."""
+    return sum(store.delete_expenses(user_id) for user_id in dataset.user_ids())
+
+
+def load(dataset: Dataset) -> int:
+    """
+    Replace the generated users' rows with a fresh copy of `dataset`.
+
+    Returns:
+        Number of rows loaded
+    """
+    drop(dataset)
+    loaded = 0
+    for rank, count in enumerate(dataset.row_counts(), start=1):
+        rows = list(user_rows(dataset, rank, count))
+        store.add_expenses(dataset.user_id(rank), rows)
+        loaded += len(rows)
+    return loaded
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = Dataset()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--rows", type=int, default=defaults.rows, help="Approximate total rows")
+    parser.add_argument("--years", type=int, default=defaults.years)
+    parser.add_argument("--skew", type=float, default=defaults.skew, help="Zipf exponent")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--end", type=date.fromisoformat, default=defaults.end,
+                        help="Last day of history, YYYY-MM-DD")
+
+
+def dataset_from_args(args: argparse.Namespace) -> Dataset:
+    return Dataset(
+        users=args.users, rows=args.rows, years=args.years,
+        skew=args.skew, seed=args.seed, end=args.end
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument("--drop", action="store_true", help="Only delete the generated users")
+    args = parser.parse_args()
+    dataset = dataset_from_args(args)
+
+    if args.drop:
+        print(f"Deleted {drop(dataset):,} rows")
+        return
+
+    started = time.perf_counter()
+    loaded = load(dataset)
+    elapsed = time.perf_counter() - started
+    counts = dataset.row_counts()
+    print(
+        f"Loaded {loaded:,} rows for {dataset.users:,} users in {elapsed:.1f} s "
+        f"({loaded / elapsed:,.0f} rows/s); heaviest user {counts[0]:,} rows, "
+        f"median {sorted(counts)[len(counts) // 2]:,}"
+    )
+
+
+if __name__ == "__main__":
+    main()
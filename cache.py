@@ -0,0 +1,660 @@
+"""
+Result cache for the summary read paths of Expense MCP Server.
+
+Agents tend to ask for the same report several times in one conversation,
+so ExpenseModel.summarize_by_category and get_period_report (and with it
+get_monthly_summary) read through a cache keyed by
+(method, user_id, start_date, end_date).
+
+ResultCache is the front end used by models.py: it serializes results,
+counts hits and misses, and guards against storing a result that raced a
+write. Storage is a pluggable CacheBackend:
+
+    memory   per-process LRU with entry/byte caps (default)
+    sqlite   a WAL-mode SQLite file shared by replicas on one host
+    redis    any Redis-protocol server shared by all replicas
+             (needs the optional `redis` package)
+
+Invalidation:
+- Writes made through ExpenseModel/AsyncExpenseModel invalidate the
+  cached ranges of that user containing a written date, in-process and
+  immediately, so a process never serves totals older than its own writes.
+- A statement-level trigger on expenses sends NOTIFY expense_writes with
+  the user and dates of every write (including imports and manual SQL).
+  InvalidationListener LISTENs on a dedicated connection and applies the
+  same invalidation, so every replica drops stale summaries, and a shared
+  backend is cleaned up by all of them.
+
+Configuration (environment):
+    RESULT_CACHE_BACKEND      memory | sqlite | redis (default memory)
+    RESULT_CACHE_URL          SQLite file path or redis:// URL
+    RESULT_CACHE_MAX_ENTRIES  entry cap, 0 disables the cache (default 1024)
+    RESULT_CACHE_MAX_BYTES    approximate memory cap (default 32 MiB)
+    RESULT_CACHE_TTL          seconds an entry stays valid (default 300)
+    RESULT_CACHE_LISTEN       LISTEN for write notifications (default on)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import psycopg
+
+from db import _database_url, _env_flag, _env_number, record_write, shard_urls
+from metrics import metrics
+
+try:
+    import redis
+except ImportError:  # optional, only needed for RESULT_CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "expense_writes"
+
+DateRange = Tuple[date, date]
+
+
+class CacheKey(NamedTuple):
+    method: str
+    user_id: str
+    start_date: date
+    end_date: date
+
+    def encode(self) -> str:
+        # user_id last: it is the only free-form part
+        return f"{self.method}:{self.start_date}:{self.end_date}:{self.user_id}"
+
+
+def _overlaps(key: CacheKey, ranges: List[DateRange]) -> bool:
+    return any(first <= key.end_date and last >= key.start_date for first, last in ranges)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "$decimal" in obj:
+            return Decimal(obj["$decimal"])
+        if "$datetime" in obj:
+            return datetime.fromisoformat(obj["$datetime"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+    return obj
+
+
+def encode_value(value: Any) -> bytes:
+    """JSON with tagged Decimal/date values (never pickle: the store may be shared)."""
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def decode_value(data: bytes) -> Any:
+    return json.loads(data, object_hook=_json_object_hook)
+
+
+class CacheBackend:
+    """
+    Storage for encoded results. Implementations must be thread-safe.
+
+    `shared` backends are seen by other processes, so the listener must not
+    wipe them when it merely lost its own notification connection.
+    """
+
+    name = "base"
+    shared = False
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    def invalidate(self, user_id: str, ranges: List[DateRange]) -> int:
+        """Drop the user's entries overlapping any range; returns the count."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class _Entry(NamedTuple):
+    value: bytes
+    expires_at: float
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU with entry and byte caps."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._by_user: Dict[str, Set[CacheKey]] = {}
+        self._bytes = 0
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key, "expired")
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, None)
+            self._entries[key] = _Entry(value, time.monotonic() + ttl)
+            self._by_user.setdefault(key.user_id, set()).add(key)
+            self._bytes += len(value)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)), "evicted")
+
+    def invalidate(self, user_id: str, ranges: List[DateRange]) -> int:
+        with self._lock:
+            stale = [key for key in self._by_user.get(user_id, ()) if _overlaps(key, ranges)]
+            for key in stale:
+                self._remove(key, "invalidated")
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: CacheKey, reason: Optional[str]) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.value)
+        user_keys = self._by_user.get(key.user_id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[key.user_id]
+        if reason:
+            metrics.increment("result_cache_removals_total", reason=reason)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache table in a WAL-mode SQLite file, shared by every process that
+    points at the same path (replicas on one host). LRU order is kept in
+    last_used; expiry uses wall-clock time so all processes agree.
+    """
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS result_cache_user ON result_cache (user_id)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS result_cache_lru ON result_cache (last_used)"
+        )
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM result_cache WHERE key = ? AND expires_at > ?",
+                (key.encode(), now)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE result_cache SET last_used = ? WHERE key = ?",
+                    (now, key.encode())
+                )
+        return row[0] if row else None
+
+    def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key.encode(), key.user_id,
+                        key.start_date.isoformat(), key.end_date.isoformat(),
+                        value, now + ttl, now
+                    )
+                )
+                self._conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (now,))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        entries, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM result_cache"
+        ).fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, length in self._conn.execute(
+            "SELECT key, LENGTH(value) FROM result_cache ORDER BY last_used"
+        ).fetchall():
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+            entries -= 1
+            size -= length
+            evicted += 1
+        metrics.increment("result_cache_removals_total", evicted, reason="evicted")
+
+    def invalidate(self, user_id: str, ranges: List[DateRange]) -> int:
+        removed = 0
+        with self._lock:
+            for first, last in ranges:
+                removed += self._conn.execute(
+                    "DELETE FROM result_cache "
+                    "WHERE user_id = ? AND start_date <= ? AND end_date >= ?",
+                    (user_id, last.isoformat(), first.isoformat())
+                ).rowcount
+        if removed:
+            metrics.increment("result_cache_removals_total", removed, reason="invalidated")
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM result_cache"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Entries in a Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+    Each entry is a string key with a TTL. A per-user hash maps entry keys
+    to their date range so invalidation can find overlapping entries
+    without SCAN. Memory limits are left to the server (maxmemory with an
+    LRU policy).
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "expense-cache"):
+        if redis is None:
+            raise RuntimeError(
+                "RESULT_CACHE_BACKEND=redis requires the redis package (pip install redis)"
+            )
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def _entry_key(self, key: CacheKey) -> str:
+        return f"{self.prefix}:entry:{key.encode()}"
+
+    def _index_key(self, user_id: str) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        return self._client.get(self._entry_key(key))
+
+    def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        entry_key = self._entry_key(key)
+        index_key = self._index_key(key.user_id)
+        ttl_ms = max(1, int(ttl * 1000))
+
+        pipe = self._client.pipeline(transaction=True)
+        pipe.set(entry_key, value, px=ttl_ms)
+        pipe.hset(index_key, entry_key, f"{key.start_date}:{key.end_date}")
+        pipe.pexpire(index_key, ttl_ms)
+        pipe.execute()
+
+    def invalidate(self, user_id: str, ranges: List[DateRange]) -> int:
+        index_key = self._index_key(user_id)
+        stale = []
+        for entry_key, span in self._client.hgetall(index_key).items():
+            start, _, end = span.decode().partition(":")
+            if any(
+                first.isoformat() <= end and last.isoformat() >= start
+                for first, last in ranges
+            ):
+                stale.append(entry_key)
+        if not stale:
+            return 0
+
+        pipe = self._client.pipeline(transaction=True)
+        pipe.delete(*stale)
+        pipe.hdel(index_key, *stale)
+        removed = pipe.execute()[0]
+        if removed:
+            metrics.increment("result_cache_removals_total", removed, reason="invalidated")
+        return removed
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self.prefix}:*", count=1000))
+        for i in range(0, len(keys), 1000):
+            self._client.delete(*keys[i:i + 1000])
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class ResultCache:
+    """
+    Front end over a CacheBackend: encoding, hit/miss accounting and a
+    per-user generation counter that stops a read which raced a write
+    from storing its (possibly stale) result.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        ttl = _env_number("RESULT_CACHE_TTL", 300.0, float)
+        max_entries = _env_number("RESULT_CACHE_MAX_ENTRIES", 1024, int)
+        max_bytes = _env_number("RESULT_CACHE_MAX_BYTES", 32 * 1024 * 1024, int)
+        kind = os.getenv("RESULT_CACHE_BACKEND", "memory").strip().lower()
+        url = os.getenv("RESULT_CACHE_URL")
+
+        if ttl <= 0 or max_entries <= 0 or max_bytes <= 0:
+            return cls(None, ttl)
+        if kind == "memory":
+            return cls(MemoryBackend(max_entries, max_bytes), ttl)
+        if kind == "sqlite":
+            return cls(SQLiteBackend(url or "result_cache.sqlite3", max_entries, max_bytes), ttl)
+        if kind == "redis":
+            return cls(RedisBackend(url or "redis://localhost:6379/0"), ttl)
+        raise ValueError(f"RESULT_CACHE_BACKEND must be memory, sqlite or redis, got '{kind}'")
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return the cached result, or None on a miss."""
+        if self.backend is None:
+            return None
+
+        try:
+            data = self.backend.get(key)
+        except Exception as e:
+            # A cache outage degrades to uncached reads, never to errors
+            self._record_error("get", e)
+            data = None
+
+        with self._lock:
+            if data is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        metrics.increment(
+            "result_cache_requests_total",
+            result="miss" if data is None else "hit",
+            method=key.method
+        )
+        return decode_value(data) if data is not None else None
+
+    def generation(self, user_id: str) -> int:
+        """Snapshot to pass to put(); take it before running the query."""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, key: CacheKey, value: Any, generation: int) -> Any:
+        """
+        Store `value` unless a write for the user was seen since
+        `generation` was taken. Returns `value` for convenient chaining.
+        """
+        if self.backend is None:
+            return value
+
+        with self._lock:
+            if self._generations.get(key.user_id, 0) != generation:
+                return value
+        try:
+            self.backend.set(key, encode_value(value), self.ttl)
+        except Exception as e:
+            self._record_error("set", e)
+        return value
+
+    def invalidate(self, user_id: str, dates: Iterable[date]) -> None:
+        """Drop the user's cached ranges that contain any of `dates`."""
+        self.invalidate_ranges(user_id, [(day, day) for day in set(dates)])
+
+    def invalidate_ranges(self, user_id: str, ranges: List[DateRange]) -> None:
+        """Drop the user's cached ranges that overlap any of `ranges`."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        if self.backend is None or not ranges:
+            return
+        try:
+            self.backend.invalidate(user_id, ranges)
+        except Exception as e:
+            self._record_error("invalidate", e)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def close(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "enabled": self.enabled,
+                "backend": self.backend.name if self.backend else None,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+            }
+        if self.backend is not None:
+            try:
+                stats.update(self.backend.stats())
+            except Exception as e:
+                self._record_error("stats", e)
+        return stats
+
+    def render_prometheus(self, prefix: str) -> List[str]:
+        """Gauges for the current size; hit/miss counters live in metrics."""
+        stats = self.stats()
+        lines: List[str] = []
+        for stat in ("entries", "bytes"):
+            if stat in stats:
+                lines.append(f"# TYPE {prefix}_{stat} gauge")
+                lines.append(f"{prefix}_{stat} {stats[stat]}")
+        return lines
+
+    def _record_error(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self._errors += 1
+        metrics.increment("result_cache_errors_total", operation=operation)
+        logger.warning("Result cache %s failed: %s", operation, error)
+
+
+def parse_notification(payload: str) -> Tuple[str, List[DateRange]]:
+    """
+    Decode an expense_writes payload into (user_id, ranges). Payloads list
+    the written dates, or only the first/last date for very wide writes.
+    """
+    change = json.loads(payload)
+    if change.get("dates"):
+        days = [date.fromisoformat(day) for day in change["dates"]]
+        return change["user_id"], [(day, day) for day in days]
+    return change["user_id"], [
+        (date.fromisoformat(change["from"]), date.fromisoformat(change["to"]))
+    ]
+
+
+class InvalidationListener:
+    """
+    Background thread that LISTENs on expense_writes and invalidates the
+    result cache for every write committed by any process (and pins the
+    writer's reads to the primary, see db.ReadRouter).
+
+    Notifications are not queued while disconnected, so after a reconnect
+    a per-process backend is cleared; a shared backend is left to the
+    replicas that stayed connected.
+    """
+
+    def __init__(self, cache: "ResultCache", conninfo: Optional[str] = None):
+        self.cache = cache
+        self.conninfo = conninfo
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.notifications = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="result-cache-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def handle(self, payload: str) -> None:
+        try:
+            user_id, ranges = parse_notification(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring malformed %s payload %r: %s", NOTIFY_CHANNEL, payload, e)
+            return
+        self.notifications += 1
+        # Writes from other replicas also pin this user's reads to the primary
+        record_write(user_id)
+        self.cache.invalidate_ranges(user_id, ranges)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.conninfo or _database_url(), autocommit=True) as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    if connected_before and not (self.cache.backend and self.cache.backend.shared):
+                        self.cache.clear()
+                    connected_before = True
+                    backoff = 1.0
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self.handle(notify.payload)
+            except psycopg.Error as e:
+                logger.warning("Cache invalidation listener disconnected: %s", e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+# Process-wide cache shared by ExpenseModel and AsyncExpenseModel
+result_cache = ResultCache.from_env()
+
+_listeners: List[InvalidationListener] = []
+
+
+def start_invalidation_listener() -> None:
+    """
+    Start LISTENing for write notifications (if enabled and cached), on
+    every shard when sharding is configured.
+    """
+    if _listeners or not result_cache.enabled or not _env_flag("RESULT_CACHE_LISTEN", True):
+        return
+    for conninfo in list(shard_urls().values()) or [None]:
+        listener = InvalidationListener(result_cache, conninfo)
+        listener.start()
+        _listeners.append(listener)
+
+
+def stop_invalidation_listener() -> None:
+    while _listeners:
+        _listeners.pop().stop()
@@ -0,0 +1,199 @@
+"""
+Column arrays for bulk aggregation of a user's fetched expenses.
+
+Breakdowns that cannot be pushed into SQL (or that run on rows a tool has
+already fetched) cost one Python iteration per row when done over dict
+rows. ExpenseColumns holds the same rows as NumPy columns instead:
+
+    dates     datetime64[D]
+    paise     int64 amounts in paise (exact integer sums)
+    category  int codes into `categories`
+    merchant  int codes into `merchants` (None for rows without one)
+
+and does group-by, running totals and percentiles as whole-array
+operations. load_columns() fills the arrays from Postgres with one
+array_agg row, so no per-row dict is ever built. The spending_breakdown
+tool (per-merchant totals and amount percentiles) is built on it.
+
+Needs the `numpy` package (in requirements.txt).
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import models
+from db import get_read_db
+from models import ExpenseModel, _validate_user_id
+
+try:
+    import numpy as np
+except ImportError:  # optional, only needed by this module
+    np = None
+
+BUCKETS = ("day", "week", "month", "year")
+
+# One row of per-column arrays
+LOAD_COLUMNS_SQL = """
+    SELECT
+        array_agg(date - DATE '1970-01-01') AS days,
+        array_agg(amount_paise) AS paise,
+        array_agg(category) AS categories,
+        array_agg(merchant) AS merchants
+    FROM expenses
+    WHERE user_id = %s
+      AND date BETWEEN %s AND %s
+"""
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ValueError("columns.py needs the numpy package (pip install numpy)")
+
+
+def _codes(values: Sequence[Optional[str]]) -> Tuple["np.ndarray", List[Optional[str]]]:
+    """Sorted distinct labels and each value's index into them; None sorts last."""
+    values = np.asarray(values, dtype=object)
+    missing = np.equal(values, None)
+    # np.unique cannot order None among strings, so it gets the last code
+    names, inverse = np.unique(values[~missing].astype(str), return_inverse=True)
+    codes = np.full(len(values), len(names), dtype=np.int64)
+    codes[~missing] = inverse.ravel()
+    labels: List[Optional[str]] = names.tolist()
+    if missing.any():
+        labels.append(None)
+    return codes, labels
+
+
+@dataclass
+class ExpenseColumns:
+    """A user's expenses as aligned column arrays (see module docstring)."""
+
+    dates: "np.ndarray"
+    paise: "np.ndarray"
+    category: "np.ndarray"
+    categories: List[str]
+    merchant: "np.ndarray"
+    merchants: List[Optional[str]]
+
+    @classmethod
+    def from_arrays(
+        cls,
+        days: Sequence[int],
+        paise: Sequence[int],
+        categories: Sequence[str],
+        merchants: Sequence[Optional[str]]
+    ) -> "ExpenseColumns":
+        """Build from days since 1970-01-01, paise and the label columns."""
+        _require_numpy()
+        category, category_names = _codes(categories)
+        merchant, merchant_names = _codes(merchants)
+        return cls(
+            dates=np.asarray(days, dtype=np.int64).astype("datetime64[D]"),
+            paise=np.asarray(paise, dtype=np.int64),
+            category=category,
+            categories=category_names,
+            merchant=merchant,
+            merchants=merchant_names,
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "ExpenseColumns":
+        """Build from typed ExpenseModel rows (not json_ready)."""
+        _require_numpy()
+        rows = list(rows)
+        epoch = date(1970, 1, 1).toordinal()
+        return cls.from_arrays(
+            [row["date"].toordinal() - epoch for row in rows],
+            [row["amount_paise"] for row in rows],
+            [row["category"] for row in rows],
+            [row["merchant"] for row in rows],
+        )
+
+    def __len__(self) -> int:
+        return len(self.paise)
+
+    def total(self) -> int:
+        """Total spend in paise."""
+        return int(self.paise.sum())
+
+    def _group(self, codes: "np.ndarray", size: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        # bincount sums in float64, exact for totals below 2**53 paise
+        sums = np.rint(np.bincount(codes, weights=self.paise, minlength=size)).astype(np.int64)
+        counts = np.bincount(codes, minlength=size)
+        return sums, counts
+
+    def _breakdown(self, codes: "np.ndarray", names: List[Any]) -> List[Tuple[Any, int, int]]:
+        sums, counts = self._group(codes, len(names))
+        order = np.argsort(-sums, kind="stable")
+        return [(names[i], int(sums[i]), int(counts[i])) for i in order if counts[i]]
+
+    def by_category(self) -> List[Tuple[str, int, int]]:
+        """(category, paise, count) ordered by total DESC."""
+        return self._breakdown(self.category, self.categories)
+
+    def by_merchant(self) -> List[Tuple[Optional[str], int, int]]:
+        """(merchant, paise, count) ordered by total DESC; None = no merchant."""
+        return self._breakdown(self.merchant, self.merchants)
+
+    def periods(self, bucket: str) -> "np.ndarray":
+        """
+        Start date of the bucket of every row (weeks start on Monday).
+
+        Raises:
+            ValueError: If bucket is not one of BUCKETS
+        """
+        if bucket == "day":
+            return self.dates
+        if bucket == "week":
+            days = self.dates.astype(np.int64)
+            # 1970-01-01 was a Thursday, weekday 3 counting from Monday
+            return (days - (days + 3) % 7).astype("datetime64[D]")
+        if bucket == "month":
+            return self.dates.astype("datetime64[M]").astype("datetime64[D]")
+        if bucket == "year":
+            return self.dates.astype("datetime64[Y]").astype("datetime64[D]")
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}, got '{bucket}'")
+
+    def by_period(self, bucket: str = "day") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """(period starts, paise, counts) for the non-empty periods, in date order."""
+        starts, codes = np.unique(self.periods(bucket), return_inverse=True)
+        sums, counts = self._group(codes.ravel(), len(starts))
+        return starts, sums, counts
+
+    def running_total(self, bucket: str = "day") -> Tuple["np.ndarray", "np.ndarray"]:
+        """(period starts, cumulative paise up to and including each period)."""
+        starts, sums, _ = self.by_period(bucket)
+        return starts, np.cumsum(sums)
+
+    def percentiles(self, percents: Sequence[float]) -> "np.ndarray":
+        """Expense amount percentiles in paise (linear interpolation)."""
+        if not len(self):
+            return np.zeros(len(percents))
+        return np.percentile(self.paise, percents)
+
+
+def load_columns(user_id: str, start_date: date, end_date: date) -> ExpenseColumns:
+    """
+    A user's expenses in [start_date, end_date] as columns.
+
+    On Postgres the columns arrive as four arrays in a single row; other
+    stores go through ExpenseModel.iter_expenses.
+    """
+    _require_numpy()
+    _validate_user_id(user_id)
+    if models.store.name != "postgres":
+        rows = [
+            row
+            for chunk in ExpenseModel.iter_expenses(user_id, start_date, end_date)
+            for row in chunk
+        ]
+        return ExpenseColumns.from_rows(rows)
+
+    row = get_read_db(user_id).execute_query(
+        LOAD_COLUMNS_SQL, (user_id, start_date, end_date)
+    )[0]
+    return ExpenseColumns.from_arrays(
+        row["days"] or [], row["paise"] or [],
+        row["categories"] or [], row["merchants"] or []
+    )
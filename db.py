@@ -171,45 +171,304 @@ Database connection and helper utilities for Expense MCP Server.
 
 - Cloud-safe (FastMCP, Supabase, Neon, Railway)
 - Lazy initialization
-- Connection pooling
+- Connection pooling (sync and asyncio)
+- Optional read replicas for read-only queries (DATABASE_READ_URL)
+- Optional sharding by user_id across databases (DATABASE_SHARD_URLS)
 - SSL handled automatically
 """
 
+import asyncio
+import hashlib
+import itertools
+import logging
 import os
-from typing import Optional, List, Dict, Any
-from contextlib import contextmanager
+import re
+import threading
+import time
+import weakref
+from bisect import bisect
+from dataclasses import dataclass
+from typing import (
+    Optional, List, Dict, Any, Iterable, Iterator, AsyncIterator, Sequence,
+    NamedTuple, Tuple, Union
+)
+from contextlib import contextmanager, asynccontextmanager
 
 from dotenv import load_dotenv
-from psycopg_pool import ConnectionPool
+from psycopg_pool import ConnectionPool, AsyncConnectionPool, PoolTimeout
 from psycopg.rows import dict_row
 
+from metrics import metrics
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip by stream_query()
+STREAM_CHUNK_SIZE = 1000
+
+
+def _database_url() -> str:
+    db_url = os.getenv("DATABASE_URL")
+
+    if not db_url:
+        raise ValueError("DATABASE_URL environment variable must be set")
+
+    return db_url
+
+
+def _read_urls() -> List[str]:
+    """
+    DATABASE_READ_URL: one replica URL, or several separated by whitespace
+    or by commas before a postgres:// scheme (multi-host URLs keep theirs).
+    """
+    value = os.getenv("DATABASE_READ_URL", "")
+    return [
+        url.strip()
+        for url in re.split(r"\s+|,(?=\s*postgres(?:ql)?://)", value)
+        if url.strip()
+    ]
+
+
+def _env_number(name: str, default, cast):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got '{value}'")
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _default_max_size() -> int:
+    # Scale with the host, but stay well under the connection limits of
+    # hosted Postgres tiers (Supabase, Neon) shared by several replicas.
+    return max(3, min(10, (os.cpu_count() or 1) * 2))
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """
+    Connection pool settings, read from the environment by from_env().
+
+    Environment variables (all optional):
+        DB_POOL_MIN_SIZE           connections kept open (default 1)
+        DB_POOL_MAX_SIZE           upper bound (default 2 x CPUs, 3..10)
+        DB_POOL_TIMEOUT            seconds to wait for a connection (default 5)
+        DB_POOL_MAX_IDLE           seconds before an idle connection is closed
+        DB_POOL_MAX_LIFETIME       seconds before a connection is recycled
+        DB_POOL_RECONNECT_TIMEOUT  seconds of exponential reconnect backoff
+                                   before giving up on the database
+        DB_POOL_CHECK              verify connections on checkout (default off)
+        DB_POOL_WARMUP             open min_size connections at startup
+        DB_PREPARE                 run registered statements as prepared
+                                   statements (default on; turn off behind
+                                   poolers without prepared statement support)
+    """
+
+    min_size: int = 1
+    max_size: int = 3
+    timeout: float = 5.0
+    max_idle: float = 300.0
+    max_lifetime: float = 1800.0
+    reconnect_timeout: float = 60.0
+    check: bool = False
+    warmup: bool = False
+    prepare: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        min_size = _env_number("DB_POOL_MIN_SIZE", cls.min_size, int)
+        max_size = _env_number("DB_POOL_MAX_SIZE", _default_max_size(), int)
+
+        if min_size < 0 or max_size < 1:
+            raise ValueError("DB_POOL_MIN_SIZE must be >= 0 and DB_POOL_MAX_SIZE >= 1")
+
+        return cls(
+            min_size=min_size,
+            max_size=max(min_size, max_size),
+            timeout=_env_number("DB_POOL_TIMEOUT", cls.timeout, float),
+            max_idle=_env_number("DB_POOL_MAX_IDLE", cls.max_idle, float),
+            max_lifetime=_env_number("DB_POOL_MAX_LIFETIME", cls.max_lifetime, float),
+            reconnect_timeout=_env_number(
+                "DB_POOL_RECONNECT_TIMEOUT", cls.reconnect_timeout, float
+            ),
+            check=_env_flag("DB_POOL_CHECK", cls.check),
+            warmup=_env_flag("DB_POOL_WARMUP", cls.warmup),
+            prepare=_env_flag("DB_PREPARE", cls.prepare),
+        )
+
+    def pool_kwargs(self, conninfo: Optional[str] = None) -> Dict[str, Any]:
+        """Arguments shared by ConnectionPool and AsyncConnectionPool."""
+        return {
+            "conninfo": conninfo or _database_url(),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "timeout": self.timeout,
+            "max_idle": self.max_idle,
+            "max_lifetime": self.max_lifetime,
+            "reconnect_timeout": self.reconnect_timeout,
+            "reconnect_failed": _log_reconnect_failed,
+            "kwargs": {
+                "row_factory": dict_row
+            },
+        }
+
+
+class Statement(NamedTuple):
+    """A registered query; see StatementRegistry."""
+    name: str
+    sql: str
+
+
+Query = Union[str, Statement]
+
+
+class StatementRegistry:
+    """
+    Central registry of named hot-path queries.
+
+    Passing a Statement (instead of SQL text) to the execute_* methods runs
+    it with prepare=True, so psycopg prepares it on the first use on each
+    pooled connection and later calls skip parse and plan. Ad-hoc strings
+    keep psycopg's default (prepare after 5 executions on a connection).
+
+    The registry remembers which statements each live connection has
+    prepared; snapshot() reports it for the metrics resource.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements: Dict[str, Statement] = {}
+        self._prepared: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+
+    def register(self, name: str, sql: str) -> Statement:
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None and existing.sql != sql:
+                raise ValueError(f"Statement '{name}' is already registered with different SQL")
+            statement = self._statements[name] = Statement(name, sql)
+        return statement
+
+    def statements(self) -> List[Statement]:
+        with self._lock:
+            return list(self._statements.values())
+
+    def mark_prepared(self, conn: Any, statement: Statement) -> bool:
+        """Record a use on `conn`; True if it is the first (the prepare)."""
+        with self._lock:
+            names = self._prepared.setdefault(conn, set())
+            if statement.name in names:
+                return False
+            names.add(statement.name)
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{statement name: number of open connections it is prepared on}."""
+        with self._lock:
+            prepared_on = {name: 0 for name in self._statements}
+            for names in self._prepared.values():
+                for name in names:
+                    prepared_on[name] = prepared_on.get(name, 0) + 1
+            return {
+                "connections": len(self._prepared),
+                "statements": prepared_on,
+            }
+
+
+# Process-wide registry, filled by models.py at import time
+statements = StatementRegistry()
+
+
+def _execute_args(conn: Any, query: Query, prepare: bool) -> Tuple[str, Optional[bool]]:
+    """SQL text and psycopg `prepare` flag for a string or Statement."""
+    if not isinstance(query, Statement):
+        return query, None
+    if not prepare:
+        return query.sql, False
+    if statements.mark_prepared(conn, query):
+        metrics.increment("statements_prepared_total", statement=query.name)
+    return query.sql, True
+
+
+def _log_reconnect_failed(pool) -> None:
+    logger.error(
+        "Connection pool %s could not reconnect to the database", pool.name
+    )
+
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    """Current gauges plus cumulative counters reported by psycopg_pool."""
+    stats = pool.get_stats()
+    return {
+        "pool_min": stats["pool_min"],
+        "pool_max": stats["pool_max"],
+        "pool_size": stats["pool_size"],
+        "connections_in_use": stats["pool_size"] - stats["pool_available"],
+        "requests_waiting": stats["requests_waiting"],
+        "requests_total": stats.get("requests_num", 0),
+        "requests_queued_total": stats.get("requests_queued", 0),
+        "requests_wait_ms_total": stats.get("requests_wait_ms", 0),
+        "requests_errors_total": stats.get("requests_errors", 0),
+        "connections_errors_total": stats.get("connections_errors", 0),
+        "connections_lost_total": stats.get("connections_lost", 0),
+    }
+
 
 class DatabaseConnection:
     """
     PostgreSQL connection manager using psycopg v3.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        config: Optional[PoolConfig] = None,
+        conninfo: Optional[str] = None,
+        name: str = "sync"
+    ):
+        self.config = config or PoolConfig.from_env()
+        self.conninfo = conninfo
+        self.name = name
         self.pool: ConnectionPool = self._initialize_pool()
 
     def _initialize_pool(self) -> ConnectionPool:
-        db_url = os.getenv("DATABASE_URL")
-
-        if not db_url:
-            raise ValueError("DATABASE_URL environment variable must be set")
-
         # psycopg v3 handles SSL automatically in cloud environments
-        return ConnectionPool(
-            conninfo=db_url,
-            min_size=1,
-            max_size=3,
-            timeout=5,
-            kwargs={
-                "row_factory": dict_row
-            }
+        pool = ConnectionPool(
+            **self.config.pool_kwargs(self.conninfo),
+            check=ConnectionPool.check_connection if self.config.check else None,
+            name=self.name,
+            open=True
         )
+        if self.config.warmup:
+            # Pay TLS + auth for min_size connections now, not on first call
+            pool.wait(timeout=self.config.timeout)
+        return pool
+
+    @contextmanager
+    def connection(self):
+        """
+        Check a connection out of the pool, recording checkout latency
+        and pool timeouts.
+        """
+        started = time.perf_counter()
+        try:
+            with self.pool.connection() as conn:
+                metrics.observe(
+                    "pool_checkout_seconds",
+                    time.perf_counter() - started,
+                    pool=self.pool.name
+                )
+                yield conn
+        except PoolTimeout:
+            metrics.increment("pool_timeouts_total", pool=self.pool.name)
+            raise
 
     @contextmanager
     def get_cursor(self):
@@ -217,48 +476,563 @@ class DatabaseConnection:
         Context manager that yields a cursor and safely returns
         the connection to the pool.
         """
-        with self.pool.connection() as conn:
+        with self.connection() as conn:
             with conn.cursor() as cursor:
                 yield cursor
 
     def execute_query(
         self,
-        query: str,
+        query: Query,
         params: Optional[tuple] = None
     ) -> List[Dict[str, Any]]:
         with self.get_cursor() as cursor:
-            cursor.execute(query, params or ())
+            sql, prepare = _execute_args(cursor.connection, query, self.config.prepare)
+            cursor.execute(sql, params or (), prepare=prepare)
             return cursor.fetchall()
 
+    def execute_pipeline(
+        self,
+        queries: Sequence[Tuple[Query, Optional[tuple]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run independent SELECTs in one network flight using pipeline mode.
+
+        All statements go out on one connection before any result is read,
+        so N queries cost about one round trip instead of N. They share one
+        transaction; an error in any of them raises after the flight.
+
+        Returns:
+            One row list per query, in order
+        """
+        with self.connection() as conn:
+            cursors = []
+            with conn.pipeline():
+                for query, params in queries:
+                    cursor = conn.cursor()
+                    sql, prepare = _execute_args(conn, query, self.config.prepare)
+                    cursor.execute(sql, params or (), prepare=prepare)
+                    cursors.append(cursor)
+            try:
+                return [cursor.fetchall() for cursor in cursors]
+            finally:
+                for cursor in cursors:
+                    cursor.close()
+
+    def stream_query(
+        self,
+        query: Query,
+        params: Optional[tuple] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Run a SELECT through a server-side (named) cursor and yield rows in
+        chunks of up to chunk_size, so memory is O(chunk) not O(result).
+
+        The pooled connection is held until the generator is exhausted or
+        closed.
+        """
+        with self.connection() as conn:
+            with conn.cursor(name="stream_query") as cursor:
+                # Server-side cursors are declared, never prepared
+                cursor.execute(getattr(query, "sql", query), params or ())
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
     def execute_update(
         self,
-        query: str,
+        query: Query,
         params: Optional[tuple] = None
     ) -> int:
         with self.get_cursor() as cursor:
-            cursor.execute(query, params or ())
+            sql, prepare = _execute_args(cursor.connection, query, self.config.prepare)
+            cursor.execute(sql, params or (), prepare=prepare)
             return cursor.rowcount
 
     def execute_insert_returning(
         self,
-        query: str,
+        query: Query,
         params: Optional[tuple] = None
     ) -> Optional[Dict[str, Any]]:
         with self.get_cursor() as cursor:
-            cursor.execute(query, params or ())
+            sql, prepare = _execute_args(cursor.connection, query, self.config.prepare)
+            cursor.execute(sql, params or (), prepare=prepare)
             return cursor.fetchone()
 
+    def execute_copy(
+        self,
+        statement: str,
+        rows: Iterable[Sequence[Any]]
+    ) -> int:
+        """
+        Stream rows through COPY ... FROM STDIN in a single transaction.
+
+        Returns:
+            Number of rows written
+        """
+        count = 0
+        with self.get_cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return _pool_stats(self.pool)
+
     def close(self):
         self.pool.close()
 
 
+class AsyncDatabaseConnection:
+    """
+    asyncio counterpart of DatabaseConnection built on AsyncConnectionPool.
+
+    Used by the async MCP tools so that a single event loop can keep many
+    queries in flight without parking a worker thread on each one.
+    """
+
+    def __init__(
+        self,
+        config: Optional[PoolConfig] = None,
+        conninfo: Optional[str] = None,
+        name: str = "async"
+    ):
+        self.config = config or PoolConfig.from_env()
+        self.conninfo = conninfo
+        self.name = name
+        self.pool: AsyncConnectionPool = self._initialize_pool()
+
+    def _initialize_pool(self) -> AsyncConnectionPool:
+        # An async pool can only be opened from a running event loop,
+        # see get_async_db()
+        return AsyncConnectionPool(
+            **self.config.pool_kwargs(self.conninfo),
+            check=(
+                AsyncConnectionPool.check_connection if self.config.check else None
+            ),
+            name=self.name,
+            open=False
+        )
+
+    async def open(self):
+        # With warm-up, wait until min_size connections are established
+        await self.pool.open(wait=self.config.warmup, timeout=self.config.timeout)
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Check a connection out of the pool, recording checkout latency
+        and pool timeouts.
+        """
+        started = time.perf_counter()
+        try:
+            async with self.pool.connection() as conn:
+                metrics.observe(
+                    "pool_checkout_seconds",
+                    time.perf_counter() - started,
+                    pool=self.pool.name
+                )
+                yield conn
+        except PoolTimeout:
+            metrics.increment("pool_timeouts_total", pool=self.pool.name)
+            raise
+
+    @asynccontextmanager
+    async def get_cursor(self):
+        """
+        Async context manager that yields a cursor and safely returns
+        the connection to the pool.
+        """
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                yield cursor
+
+    async def execute_query(
+        self,
+        query: Query,
+        params: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        async with self.get_cursor() as cursor:
+            sql, prepare = _execute_args(cursor.connection, query, self.config.prepare)
+            await cursor.execute(sql, params or (), prepare=prepare)
+            return await cursor.fetchall()
+
+    async def execute_pipeline(
+        self,
+        queries: Sequence[Tuple[Query, Optional[tuple]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Async variant of DatabaseConnection.execute_pipeline."""
+        async with self.connection() as conn:
+            cursors = []
+            async with conn.pipeline():
+                for query, params in queries:
+                    cursor = conn.cursor()
+                    sql, prepare = _execute_args(conn, query, self.config.prepare)
+                    await cursor.execute(sql, params or (), prepare=prepare)
+                    cursors.append(cursor)
+            try:
+                return [await cursor.fetchall() for cursor in cursors]
+            finally:
+                for cursor in cursors:
+                    await cursor.close()
+
+    async def stream_query(
+        self,
+        query: Query,
+        params: Optional[tuple] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Async variant of DatabaseConnection.stream_query."""
+        async with self.connection() as conn:
+            async with conn.cursor(name="stream_query") as cursor:
+                await cursor.execute(getattr(query, "sql", query), params or ())
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    async def execute_update(
+        self,
+        query: Query,
+        params: Optional[tuple] = None
+    ) -> int:
+        async with self.get_cursor() as cursor:
+            sql, prepare = _execute_args(cursor.connection, query, self.config.prepare)
+            await cursor.execute(sql, params or (), prepare=prepare)
+            return cursor.rowcount
+
+    async def execute_insert_returning(
+        self,
+        query: Query,
+        params: Optional[tuple] = None
+    ) -> Optional[Dict[str, Any]]:
+        async with self.get_cursor() as cursor:
+            sql, prepare = _execute_args(cursor.connection, query, self.config.prepare)
+            await cursor.execute(sql, params or (), prepare=prepare)
+            return await cursor.fetchone()
+
+    async def execute_copy(
+        self,
+        statement: str,
+        rows: Iterable[Sequence[Any]]
+    ) -> int:
+        count = 0
+        async with self.get_cursor() as cursor:
+            async with cursor.copy(statement) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+                    count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return _pool_stats(self.pool)
+
+    async def close(self):
+        await self.pool.close()
+
+
+# -------- Per-event-loop async pools --------
+
+class _AsyncPools:
+    """
+    The async pools and the locks guarding their creation. Both belong to
+    the event loop that made them, so each running loop gets its own set
+    (a second asyncio.run() or a loop in another thread must not reuse
+    them).
+    """
+
+    def __init__(self):
+        self.db: Optional[AsyncDatabaseConnection] = None
+        self.db_lock = asyncio.Lock()
+        self.read_dbs: Optional[List[AsyncDatabaseConnection]] = None
+        self.read_dbs_lock = asyncio.Lock()
+        self.shard_dbs: Dict[str, AsyncDatabaseConnection] = {}
+        self.shard_dbs_lock = asyncio.Lock()
+
+    def all(self) -> List[AsyncDatabaseConnection]:
+        return [
+            db for db in (self.db, *(self.read_dbs or ()), *self.shard_dbs.values())
+            if db is not None
+        ]
+
+
+_async_pools: Dict[asyncio.AbstractEventLoop, _AsyncPools] = {}
+_async_pools_lock = threading.Lock()
+
+
+def _loop_pools() -> _AsyncPools:
+    """Async pools of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    with _async_pools_lock:
+        pools = _async_pools.get(loop)
+        if pools is None:
+            # Pools of loops that were closed without close_async_db()
+            # cannot be closed any more; drop them
+            for closed in [other for other in _async_pools if other.is_closed()]:
+                del _async_pools[closed]
+            pools = _async_pools[loop] = _AsyncPools()
+    return pools
+
+
+# -------- Sharding by user_id --------
+
+def shard_urls() -> Dict[str, str]:
+    """
+    DATABASE_SHARD_URLS: whitespace-separated shard URLs, each optionally
+    prefixed with a stable name (name=postgresql://...). Unnamed shards
+    are called shard0, shard1, ... by position; name them before adding or
+    removing shards so existing users keep their placement.
+    """
+    shards: Dict[str, str] = {}
+    for i, item in enumerate(os.getenv("DATABASE_SHARD_URLS", "").split()):
+        match = re.match(r"([A-Za-z0-9_-]+)=(?=postgres(?:ql)?://)", item)
+        name, url = (match.group(1), item[match.end():]) if match else (f"shard{i}", item)
+        if name in shards:
+            raise ValueError(f"Duplicate shard name '{name}' in DATABASE_SHARD_URLS")
+        shards[name] = url
+    return shards
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of user ids onto named shards. Each shard owns
+    `vnodes` points on the ring, so adding or removing one shard only
+    moves about 1/N of the users (see rebalance.py).
+    """
+
+    def __init__(self, names: Iterable[str], vnodes: int = 128):
+        points = sorted(
+            (_ring_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes)
+        )
+        if not points:
+            raise ValueError("HashRing needs at least one shard")
+        self._points = [point for point, _ in points]
+        self._names = [name for _, name in points]
+        self.names = sorted(set(self._names))
+
+    def shard_for(self, user_id: str) -> str:
+        i = bisect(self._points, _ring_hash(user_id)) % len(self._points)
+        return self._names[i]
+
+
+_ring: Optional[HashRing] = None
+_ring_loaded = False
+_shard_dbs: Dict[str, DatabaseConnection] = {}
+_shard_dbs_lock = threading.Lock()
+
+
+def shard_ring() -> Optional[HashRing]:
+    """The configured ring, or None when DATABASE_SHARD_URLS is unset."""
+    global _ring, _ring_loaded
+    if not _ring_loaded:
+        urls = shard_urls()
+        _ring = HashRing(urls) if urls else None
+        _ring_loaded = True
+    return _ring
+
+
+def get_shard_db(name: str) -> DatabaseConnection:
+    """Sync pool of a shard by name."""
+    db = _shard_dbs.get(name)
+    if db is None:
+        with _shard_dbs_lock:
+            db = _shard_dbs.get(name)
+            if db is None:
+                urls = shard_urls()
+                if name not in urls:
+                    raise ValueError(f"Unknown shard '{name}'")
+                db = _shard_dbs[name] = DatabaseConnection(
+                    conninfo=urls[name], name=f"sync-shard-{name}"
+                )
+    return db
+
+
+async def get_async_shard_db(name: str) -> AsyncDatabaseConnection:
+    """Async pool of a shard by name."""
+    pools = _loop_pools()
+    db = pools.shard_dbs.get(name)
+    if db is None:
+        async with pools.shard_dbs_lock:
+            db = pools.shard_dbs.get(name)
+            if db is None:
+                urls = shard_urls()
+                if name not in urls:
+                    raise ValueError(f"Unknown shard '{name}'")
+                db = AsyncDatabaseConnection(
+                    conninfo=urls[name], name=f"async-shard-{name}"
+                )
+                await db.open()
+                pools.shard_dbs[name] = db
+    return db
+
+
 # -------- Lazy global accessor (CRITICAL FOR CLOUD) --------
 
 _db: Optional[DatabaseConnection] = None
 
 
-def get_db() -> DatabaseConnection:
+def get_db(user_id: Optional[str] = None) -> DatabaseConnection:
+    """
+    Pool holding `user_id`'s data: its shard when sharding is configured,
+    otherwise (or without a user) the DATABASE_URL pool.
+    """
     global _db
+    ring = shard_ring()
+    if ring is not None and user_id is not None:
+        return get_shard_db(ring.shard_for(user_id))
     if _db is None:
         _db = DatabaseConnection()
     return _db
+
+
+async def get_async_db(user_id: Optional[str] = None) -> AsyncDatabaseConnection:
+    """Async variant of get_db; pools are per running event loop."""
+    ring = shard_ring()
+    if ring is not None and user_id is not None:
+        return await get_async_shard_db(ring.shard_for(user_id))
+    pools = _loop_pools()
+    if pools.db is None:
+        async with pools.db_lock:
+            if pools.db is None:
+                db = AsyncDatabaseConnection()
+                await db.open()
+                pools.db = db
+    return pools.db
+
+
+async def close_async_db() -> None:
+    """Close the running event loop's async pools and forget them."""
+    loop = asyncio.get_running_loop()
+    with _async_pools_lock:
+        pools = _async_pools.pop(loop, None)
+    if pools is not None:
+        for db in pools.all():
+            await db.close()
+
+
+# -------- Read replicas and read-your-writes routing --------
+
+class ReadRouter:
+    """
+    Remembers which users wrote recently. Their reads go to the primary
+    for DB_READ_PIN_SECONDS (default 5) so they see their own writes
+    despite replication lag. Pins are per process; cache.InvalidationListener
+    also records writes announced by other processes.
+    """
+
+    def __init__(self, pin_seconds: float):
+        self.pin_seconds = pin_seconds
+        self._lock = threading.Lock()
+        self._pinned_until: Dict[str, float] = {}
+
+    def record_write(self, user_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._pinned_until[user_id] = now + self.pin_seconds
+            if len(self._pinned_until) > 10_000:
+                self._pinned_until = {
+                    user: until for user, until in self._pinned_until.items() if until > now
+                }
+
+    def is_pinned(self, user_id: str) -> bool:
+        with self._lock:
+            until = self._pinned_until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+read_router = ReadRouter(_env_number("DB_READ_PIN_SECONDS", 5.0, float))
+
+_read_dbs: Optional[List[DatabaseConnection]] = None
+_read_dbs_lock = threading.Lock()
+_read_turn = itertools.count()
+
+
+def record_write(user_id: str) -> None:
+    """Pin a user's reads to the primary after a write (read-your-writes)."""
+    read_router.record_write(user_id)
+
+
+def _route_to_replica(user_id: Optional[str], replicas: Sequence[Any]) -> bool:
+    # Replicas belong to the DATABASE_URL primary; sharded users read their shard
+    use_replica = (
+        bool(replicas)
+        and not (user_id and shard_ring() is not None)
+        and not (user_id and read_router.is_pinned(user_id))
+    )
+    metrics.increment("read_routing_total", target="replica" if use_replica else "primary")
+    return use_replica
+
+
+def get_read_db(user_id: Optional[str] = None) -> DatabaseConnection:
+    """
+    Pool for read-only queries: a replica from DATABASE_READ_URL (round
+    robin), or get_db(user_id) if none is configured, the user is pinned
+    or the user lives on a shard.
+    """
+    global _read_dbs
+    if _read_dbs is None:
+        with _read_dbs_lock:
+            if _read_dbs is None:
+                _read_dbs = [
+                    DatabaseConnection(conninfo=url, name=f"sync-read-{i}")
+                    for i, url in enumerate(_read_urls())
+                ]
+    if not _route_to_replica(user_id, _read_dbs):
+        return get_db(user_id)
+    return _read_dbs[next(_read_turn) % len(_read_dbs)]
+
+
+async def get_async_read_db(user_id: Optional[str] = None) -> AsyncDatabaseConnection:
+    """Async variant of get_read_db."""
+    read_dbs = await _async_read_dbs()
+    if not _route_to_replica(user_id, read_dbs):
+        return await get_async_db(user_id)
+    return read_dbs[next(_read_turn) % len(read_dbs)]
+
+
+async def _async_read_dbs() -> List[AsyncDatabaseConnection]:
+    """The running loop's replica pools, opened on first use."""
+    pools = _loop_pools()
+    if pools.read_dbs is None:
+        async with pools.read_dbs_lock:
+            if pools.read_dbs is None:
+                dbs = []
+                for i, url in enumerate(_read_urls()):
+                    db = AsyncDatabaseConnection(conninfo=url, name=f"async-read-{i}")
+                    await db.open()
+                    dbs.append(db)
+                pools.read_dbs = dbs
+    return pools.read_dbs
+
+
+async def open_async_pools() -> None:
+    """
+    Open every async pool a request can be routed to: the primary, each
+    shard in DATABASE_SHARD_URLS and each replica in DATABASE_READ_URL.
+    With DB_POOL_WARMUP each waits for its min_size connections.
+    """
+    await get_async_db()
+    for name in shard_urls():
+        await get_async_shard_db(name)
+    await _async_read_dbs()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every pool opened so far, keyed by pool name."""
+    with _async_pools_lock:
+        async_dbs = [db for pools in _async_pools.values() for db in pools.all()]
+    dbs = [_db, *(_read_dbs or ()), *_shard_dbs.values(), *async_dbs]
+    return {
+        db.pool.name: db.stats()
+        for db in dbs
+        if db is not None
+    }
@@ -0,0 +1,200 @@
+"""
+Check the plans of the registered hot-path queries.
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for every read statement in the db.py
+registry with representative parameters: by default the user with the
+most expenses, over a range with partial months at both ends so the
+report queries use both the rollup and the raw-row branches. Writes are
+not executed.
+
+A sequential scan is flagged when it reads a sizeable table mostly to
+discard other users' rows, i.e. an index on user_id went unused. A user
+who owns most of a partition legitimately gets a sequential scan there
+and is not flagged.
+
+Usage (CLI):
+    python explain.py                          # busiest user, exit 1 on a flag
+    python explain.py --user-id user_123 --start 2024-01-10 --end 2024-06-20
+    python explain.py --verbose                # also print the plans
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from db import Statement, get_db, statements
+import models
+
+# Sequential scans reading fewer rows than this are never flagged: the
+# planner rightly prefers them over an index on small tables.
+MIN_SCANNED_ROWS = 1000
+
+# Keyset cursor before every real row, for the next-page statements
+_FIRST_KEY = (date.min, datetime.min.replace(tzinfo=timezone.utc), UUID(int=0))
+
+# expenses_2024_01 and its indexes are reported as expenses_*
+_PARTITION_SUFFIX = re.compile(r"_\d{4}_\d{2}")
+
+
+def representative_params(user_id: str, start: date, end: date) -> Dict[str, tuple]:
+    """Params for each registered read statement, keyed by statement name."""
+    page = (user_id, start, end)
+    after = (user_id, start, end, *_FIRST_KEY)
+    ranges = models._range_params(user_id, start, end)
+    return {
+        "list_expenses": page,
+        "list_expenses_first_page": (*page, 51),
+        "list_expenses_next_page": (*after, 51),
+        "list_expenses_first_page_json": (*page, 51),
+        "list_expenses_next_page_json": (*after, 51),
+        "summarize_by_category": ranges,
+        "period_report": ranges,
+        "spending_trend": ("week", *page),
+        "spending_trend_rollup": ("month", *ranges),
+    }
+
+
+def default_target(user_id: Optional[str] = None) -> Tuple[str, date, date]:
+    """
+    The busiest user (or `user_id`) and a range over their data that starts
+    and ends mid-month.
+
+    Raises:
+        ValueError: If there is no data to explain against
+    """
+    user_filter = "WHERE user_id = %s" if user_id else ""
+    rows = get_db(user_id).execute_query(
+        f"""
+        SELECT user_id, MIN(month) AS first_month, MAX(month) AS last_month
+        FROM expense_monthly_rollup
+        {user_filter}
+        GROUP BY user_id
+        ORDER BY SUM(expense_count) DESC
+        LIMIT 1
+        """,
+        (user_id,) if user_id else None
+    )
+    if not rows:
+        raise ValueError("No expenses to explain against; pass --user-id with data")
+    row = rows[0]
+    start = row["first_month"] + timedelta(days=9)
+    end = row["last_month"] + timedelta(days=19)
+    return row["user_id"], start, end
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _flag(node: Dict[str, Any]) -> Optional[str]:
+    if node["Node Type"] != "Seq Scan":
+        return None
+    loops = node.get("Actual Loops", 1)
+    kept = node.get("Actual Rows", 0) * loops
+    removed = node.get("Rows Removed by Filter", 0) * loops
+    if kept + removed >= MIN_SCANNED_ROWS and removed > kept:
+        return (
+            f"Seq Scan on {node['Relation Name']} read {kept + removed:,} rows "
+            f"to keep {kept:,}"
+        )
+    return None
+
+
+def _describe(node: Dict[str, Any]) -> str:
+    text = f"{node['Node Type']} on {node['Relation Name']}"
+    if "Index Name" in node:
+        text += f" using {node['Index Name']}"
+    return _PARTITION_SUFFIX.sub("_*", text)
+
+
+def explain_statement(statement: Statement, params: tuple, user_id: str) -> Dict[str, Any]:
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) for one statement.
+
+    Returns:
+        Dictionary with the statement name, execution time, shared buffers
+        hit and read, (scan, partition count) pairs, heap fetches of
+        index-only scans, the flags and the plan
+    """
+    rows = get_db(user_id).execute_query(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement.sql}", params
+    )
+    explained = rows[0]["QUERY PLAN"]
+    if isinstance(explained, str):
+        explained = json.loads(explained)
+    plan = explained[0]["Plan"]
+    scans = [node for node in _nodes(plan) if "Relation Name" in node]
+
+    return {
+        "statement": statement.name,
+        "execution_ms": explained[0]["Execution Time"],
+        "buffers_hit": plan.get("Shared Hit Blocks", 0),
+        "buffers_read": plan.get("Shared Read Blocks", 0),
+        "scans": sorted(Counter(map(_describe, scans)).items()),
+        "heap_fetches": sum(node.get("Heap Fetches", 0) for node in scans),
+        "flags": [flag for flag in map(_flag, scans) if flag],
+        "plan": explained,
+    }
+
+
+def explain_all(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    """Explain every registered statement that has representative params."""
+    params = representative_params(user_id, start, end)
+    return [
+        explain_statement(statement, params[statement.name], user_id)
+        for statement in statements.statements()
+        if statement.name in params
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN the registered queries and flag sequential scans."
+    )
+    parser.add_argument("--user-id", help="User to explain for (default: the busiest)")
+    parser.add_argument("--start", type=date.fromisoformat, help="Range start, YYYY-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, help="Range end, YYYY-MM-DD")
+    parser.add_argument("--verbose", action="store_true", help="Print the JSON plans")
+    args = parser.parse_args(argv)
+
+    user_id, start, end = default_target(args.user_id)
+    start, end = args.start or start, args.end or end
+    print(f"user {user_id}, {start} .. {end}", file=sys.stderr)
+
+    flagged = 0
+    skipped = [
+        statement.name for statement in statements.statements()
+        if statement.name not in representative_params(user_id, start, end)
+    ]
+    for result in explain_all(user_id, start, end):
+        status = "SEQ SCAN" if result["flags"] else "ok"
+        print(
+            f"{result['statement']:<30} {status:<8} {result['execution_ms']:>9.2f} ms  "
+            f"buffers hit {result['buffers_hit']:,} read {result['buffers_read']:,}"
+        )
+        for scan, partitions in result["scans"]:
+            print(f"    {scan}" + (f" ({partitions} partitions)" if partitions > 1 else ""))
+        if result["heap_fetches"]:
+            print(f"    {result['heap_fetches']:,} heap fetches in index-only scans")
+        for flag in result["flags"]:
+            print(f"    ! {flag}")
+        if args.verbose:
+            print(json.dumps(result["plan"], indent=2, default=str))
+        flagged += bool(result["flags"])
+
+    if skipped:
+        print(f"Not executed (writes): {', '.join(skipped)}", file=sys.stderr)
+    if flagged:
+        print(f"{flagged} statement(s) regressed to a sequential scan", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Streaming CSV export of a user's expenses.
+
+Rows are read through a server-side cursor (ExpenseModel.iter_expenses)
+and written chunk by chunk, so memory stays O(chunk) for any range. The
+output can be re-imported with importer.py using its default columns.
+
+Usage (CLI):
+    python exporter.py --user-id user_123 --start 2020-01-01 --end 2025-12-31 \\
+        --output expenses.csv
+"""
+
+import argparse
+import csv
+import sys
+from datetime import date
+from typing import List, Optional, TextIO
+
+from models import ExpenseModel
+from storage import format_paise
+
+EXPORT_COLUMNS = ["id", "date", "amount", "category", "merchant", "note", "created_at"]
+
+
+def export_expenses(
+    user_id: str,
+    start_date: date,
+    end_date: date,
+    stream: TextIO
+) -> int:
+    """
+    Write a user's expenses in a date range to `stream` as CSV.
+
+    Returns:
+        Number of expenses written
+    """
+    writer = csv.writer(stream)
+    writer.writerow(EXPORT_COLUMNS)
+
+    count = 0
+    for chunk in ExpenseModel.iter_expenses(user_id, start_date, end_date):
+        writer.writerows(
+            (
+                exp["id"],
+                exp["date"].isoformat(),
+                format_paise(exp["amount_paise"]),
+                exp["category"],
+                exp["merchant"] or "",
+                exp["note"] or "",
+                exp["created_at"].isoformat(),
+            )
+            for exp in chunk
+        )
+        count += len(chunk)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export a user's expenses as CSV.")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as stream:
+            count = export_expenses(args.user_id, args.start, args.end, stream)
+    else:
+        count = export_expenses(args.user_id, args.start, args.end, sys.stdout)
+
+    print(f"Exported {count:,} expenses", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Streaming bank/card statement importer for Expense MCP Server.
+
+Parses CSV or OFX exports one record at a time and writes them in
+fixed-size COPY batches through ExpenseModel.add_expenses. Only one batch
+is held in memory, and the parser does not read ahead while a batch is
+being written, so memory stays flat regardless of file size.
+
+Usage (CLI):
+    python importer.py --user-id user_123 --file statement.csv \\
+        --column date=Date --column amount=Amount --column merchant=Description \\
+        --date-format %d/%m/%Y --expense-sign negative
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from models import ExpenseModel
+from storage import to_paise
+
+DEFAULT_BATCH_SIZE = 5_000
+DEFAULT_CATEGORY = "Uncategorized"
+
+# Keep the first few row errors; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# Expense field -> CSV header, used when no mapping is given
+DEFAULT_COLUMN_MAP = {
+    "date": "date",
+    "amount": "amount",
+    "category": "category",
+    "merchant": "merchant",
+    "note": "note",
+}
+
+EXPENSE_SIGNS = ("positive", "negative")
+
+Record = Tuple[int, Dict[str, Optional[str]]]
+
+
+def iter_csv_records(
+    stream: TextIO,
+    column_map: Optional[Dict[str, str]] = None
+) -> Iterator[Record]:
+    """
+    Yield (line number, {expense field: raw value}) for each CSV row.
+
+    Header names are matched case-insensitively.
+    """
+    column_map = {**DEFAULT_COLUMN_MAP, **(column_map or {})}
+    reader = csv.reader(stream)
+
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {name.strip().lower(): i for i, name in enumerate(header)}
+
+    missing = [
+        column_map[field] for field in ("date", "amount")
+        if column_map[field].lower() not in positions
+    ]
+    if missing:
+        raise ValueError(f"CSV header is missing required column(s): {missing}")
+
+    field_positions = {
+        field: positions.get(column.lower())
+        for field, column in column_map.items()
+    }
+
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {
+            field: row[position] if position is not None and position < len(row) else None
+            for field, position in field_positions.items()
+        }
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+# OFX <STMTTRN> element -> expense field
+_OFX_FIELDS = {
+    "DTPOSTED": "date",
+    "TRNAMT": "amount",
+    "NAME": "merchant",
+    "MEMO": "note",
+}
+
+
+def iter_ofx_records(stream: TextIO) -> Iterator[Record]:
+    """
+    Yield (line number, {expense field: raw value}) for each <STMTTRN>.
+
+    Handles both SGML (OFX 1.x, unclosed leaf tags) and XML (OFX 2.x).
+    Dates are normalised to YYYY-MM-DD; OFX amounts are signed, with
+    debits negative.
+    """
+    current: Optional[Dict[str, Optional[str]]] = None
+    start_line = 0
+
+    for line_num, line in enumerate(stream, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    yield start_line, current
+                    current = None
+                elif not closing:
+                    current = {"date": None, "amount": None, "merchant": None, "note": None}
+                    start_line = line_num
+            elif current is not None and not closing and tag in _OFX_FIELDS:
+                value = value.strip()
+                if tag == "DTPOSTED" and len(value) >= 8:
+                    value = f"{value[0:4]}-{value[4:6]}-{value[6:8]}"
+                current[_OFX_FIELDS[tag]] = value
+
+
+def _parse_amount(raw: Optional[str]) -> Decimal:
+    text = (raw or "").strip().replace(",", "")
+    negative = text.startswith("(") and text.endswith(")")
+    # currency words first, so the dot of "Rs." is not read as a decimal point
+    text = re.sub(r"[A-Za-z]+\.?", "", text)
+    text = re.sub(r"[^\d.\-+]", "", text)
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: '{raw}'")
+    return -amount if negative else amount
+
+
+def _to_expense(
+    fields: Dict[str, Optional[str]],
+    date_format: str,
+    expense_sign: str,
+    default_category: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Map raw fields onto ExpenseModel.add_expense arguments.
+
+    Returns None for rows that are not expenses (credits/refunds under the
+    chosen sign convention, zero amounts).
+
+    Raises:
+        ValueError: If the date or amount cannot be parsed
+    """
+    raw_date = (fields.get("date") or "").strip()
+    try:
+        expense_date = datetime.strptime(raw_date, date_format).date()
+    except ValueError:
+        raise ValueError(f"Invalid date '{raw_date}', expected format {date_format}")
+
+    amount = _parse_amount(fields.get("amount"))
+    if expense_sign == "negative":
+        amount = -amount
+    amount_paise = to_paise(amount)
+    if amount_paise <= 0:
+        return None
+
+    category = (fields.get("category") or "").strip() or default_category
+    merchant = (fields.get("merchant") or "").strip() or None
+    note = (fields.get("note") or "").strip() or None
+
+    return {
+        "expense_date": expense_date,
+        "amount_paise": amount_paise,
+        "category": category,
+        "merchant": merchant,
+        "note": note,
+    }
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".ofx", ".qfx"):
+        return "ofx"
+    if extension in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(f"Cannot detect statement format of '{path}', pass csv or ofx")
+
+
+def import_statement(
+    user_id: str,
+    path: str,
+    file_format: Optional[str] = None,
+    column_map: Optional[Dict[str, str]] = None,
+    date_format: Optional[str] = None,
+    expense_sign: Optional[str] = None,
+    default_category: str = DEFAULT_CATEGORY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Stream a statement file into the expenses table.
+
+    Each batch is written (and committed) with one COPY before the next
+    one is parsed, which bounds memory to a single batch and applies
+    backpressure to the parser.
+
+    Args:
+        user_id: User identifier (required)
+        path: Statement file path
+        file_format: "csv" or "ofx" (default: from the file extension)
+        column_map: CSV only, {expense field: header}, e.g.
+                    {"merchant": "Description"}
+        date_format: strptime format of the date column
+                     (default %Y-%m-%d; OFX dates are always normalised)
+        expense_sign: "positive" if expenses are positive amounts,
+                      "negative" if they are negative (bank debits).
+                      Default: positive for CSV, negative for OFX
+        default_category: Category for rows without one
+        batch_size: Rows per COPY batch
+        on_progress: Called after every batch with the running totals
+
+    Returns:
+        {imported, skipped, errors, error_samples, batches, seconds,
+         rows_per_second}
+
+    Raises:
+        ValueError: If arguments or the file header are invalid
+    """
+    if not user_id or not user_id.strip():
+        raise ValueError("user_id is required and cannot be empty")
+
+    file_format = (file_format or detect_format(path)).lower()
+    if file_format not in ("csv", "ofx"):
+        raise ValueError(f"file_format must be csv or ofx, got '{file_format}'")
+
+    expense_sign = expense_sign or ("negative" if file_format == "ofx" else "positive")
+    if expense_sign not in EXPENSE_SIGNS:
+        raise ValueError(f"expense_sign must be one of {EXPENSE_SIGNS}, got '{expense_sign}'")
+
+    if file_format == "ofx":
+        date_format = "%Y-%m-%d"
+    date_format = date_format or "%Y-%m-%d"
+
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+
+    stats: Dict[str, Any] = {
+        "imported": 0,
+        "skipped": 0,
+        "errors": 0,
+        "error_samples": [],
+        "batches": 0,
+    }
+    started = time.perf_counter()
+
+    def progress() -> Dict[str, Any]:
+        seconds = time.perf_counter() - started
+        return {
+            **stats,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(stats["imported"] / seconds, 1) if seconds else 0.0,
+        }
+
+    def flush(batch: List[Dict[str, Any]]) -> None:
+        ExpenseModel.add_expenses(user_id, batch)
+        stats["imported"] += len(batch)
+        stats["batches"] += 1
+        batch.clear()
+        if on_progress:
+            on_progress(progress())
+
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as stream:
+        if file_format == "csv":
+            records = iter_csv_records(stream, column_map)
+        else:
+            records = iter_ofx_records(stream)
+
+        batch: List[Dict[str, Any]] = []
+        for line_num, fields in records:
+            try:
+                expense = _to_expense(fields, date_format, expense_sign, default_category)
+            except ValueError as e:
+                stats["errors"] += 1
+                if len(stats["error_samples"]) < MAX_REPORTED_ERRORS:
+                    stats["error_samples"].append(f"line {line_num}: {e}")
+                continue
+
+            if expense is None:
+                stats["skipped"] += 1
+                continue
+
+            batch.append(expense)
+            if len(batch) >= batch_size:
+                flush(batch)
+
+        if batch:
+            flush(batch)
+
+    return progress()
+
+
+def _parse_column(value: str) -> Tuple[str, str]:
+    field, sep, header = value.partition("=")
+    if not sep or field not in DEFAULT_COLUMN_MAP:
+        raise argparse.ArgumentTypeError(
+            f"expected FIELD=HEADER with FIELD in {sorted(DEFAULT_COLUMN_MAP)}"
+        )
+    return field, header
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Import a CSV/OFX bank or card statement as expenses."
+    )
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--file", required=True, help="Statement file (.csv, .ofx, .qfx)")
+    parser.add_argument("--format", choices=["csv", "ofx"], help="Default: from extension")
+    parser.add_argument(
+        "--column", type=_parse_column, action="append", default=[],
+        metavar="FIELD=HEADER", help="CSV column mapping, repeatable"
+    )
+    parser.add_argument("--date-format", help="strptime format (default %%Y-%%m-%%d)")
+    parser.add_argument("--expense-sign", choices=EXPENSE_SIGNS)
+    parser.add_argument("--default-category", default=DEFAULT_CATEGORY)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    def report(progress: Dict[str, Any]) -> None:
+        print(
+            f"imported {progress['imported']:>10,}  skipped {progress['skipped']:>8,}  "
+            f"errors {progress['errors']:>6,}  {progress['rows_per_second']:>10,.0f} rows/s",
+            file=sys.stderr
+        )
+
+    result = import_statement(
+        user_id=args.user_id,
+        path=args.file,
+        file_format=args.format,
+        column_map=dict(args.column),
+        date_format=args.date_format,
+        expense_sign=args.expense_sign,
+        default_category=args.default_category,
+        batch_size=args.batch_size,
+        on_progress=report
+    )
+
+    for sample in result["error_samples"]:
+        print(f"  {sample}", file=sys.stderr)
+    print(
+        f"Imported {result['imported']:,} expenses in {result['seconds']:.1f}s "
+        f"({result['rows_per_second']:,.0f} rows/s), skipped {result['skipped']:,}, "
+        f"errors {result['errors']:,}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,33 +4,79 @@ Expense Management MCP Server
 A FastMCP-based Model Context Protocol server for expense tracking.
 Designed for cloud deployment with PostgreSQL and multi-user support.
 
-This server exposes 4 MCP tools:
+This server exposes 9 MCP tools:
 - add_expense: Add a new expense
+- add_expenses: Add a batch of expenses in one transaction
+- import_statement: Stream a CSV/OFX statement file into expenses
 - list_expenses: List expenses in a date range
 - summarize_expenses: Summarize expenses by category
 - monthly_report: Generate monthly expense report
+- spending_trend: Total spending per day/week/month/year over a range
+- spending_breakdown: Top merchants and expense amount percentiles over a range
+- category_trend: Category totals per time bucket (only with ANALYTICS_DIR set)
+
+And 2 operational resources:
+- metrics://server: Pool stats, result cache stats, prepared statements
+  and query latency histograms (JSON)
+- metrics://server/prometheus: The same data in Prometheus text format
 
 Architecture:
 - Each user's data is isolated via user_id
 - No authentication (user_id injected by backend orchestrator)
 - Cloud-ready (FastMCP Cloud deployment)
-- PostgreSQL for persistent storage
+- PostgreSQL for persistent storage (or an embedded SQLite file, see storage.py)
+- Async tools on an asyncio connection pool (many in-flight calls per process)
 """
 
+from contextlib import asynccontextmanager
+
 from fastmcp import FastMCP
+from db import PoolConfig, close_async_db, open_async_pools, pool_stats, statements
+from metrics import metrics, render_pool_stats
+from cache import result_cache, start_invalidation_listener, stop_invalidation_listener
+from models import async_store
+from analytics import analytics_enabled, get_analytics
 from tools import (
-    add_expense_tool,
-    list_expenses_tool,
-    summarize_expenses_tool,
-    monthly_report_tool
+    add_expense_tool_async,
+    add_expenses_tool_async,
+    import_statement_tool_async,
+    list_expenses_tool_async,
+    summarize_expenses_tool_async,
+    monthly_report_tool_async,
+    spending_trend_tool_async,
+    spending_breakdown_tool_async,
+    category_trend_tool_async
 )
 
+@asynccontextmanager
+async def lifespan(server):
+    """
+    Optionally warm the connection pools (primary, shards and replicas)
+    and start the cache invalidation listener at startup; stop both on
+    shutdown. The embedded SQLite store uses neither. With ANALYTICS_DIR,
+    build (or catch up) the analytics copy in the background.
+    """
+    postgres = async_store.name == "postgres"
+    if postgres and PoolConfig.from_env().warmup:
+        await open_async_pools()
+    if analytics_enabled():
+        get_analytics().refresh_in_background()
+    if postgres:
+        start_invalidation_listener()
+    try:
+        yield
+    finally:
+        stop_invalidation_listener()
+        await close_async_db()
+        await async_store.close()
+
+
 # Initialize FastMCP server
-mcp = FastMCP("Expense Management")
+mcp = FastMCP("Expense Management", lifespan=lifespan)
 
 
 @mcp.tool()
-def add_expense(
+async def add_expense(
     user_id: str,
     date: str,
     amount: float,
@@ -62,38 +108,125 @@ def add_expense(
             "note": "Coffee meeting"
         }
     """
-    return add_expense_tool(user_id, date, amount, category, merchant, note)
+    return await add_expense_tool_async(user_id, date, amount, category, merchant, note)
+
+
+@mcp.tool()
+async def add_expenses(
+    user_id: str,
+    expenses: list[dict]
+) -> dict:
+    """
+    Add many expenses for a user in one call (e.g. a bank statement import).
+    
+    All rows are validated first; if any row is invalid nothing is inserted.
+    
+    Args:
+        user_id: User identifier (required)
+        expenses: Array of expense objects (required, max 10,000), each with
+            date (YYYY-MM-DD), amount (positive), category, and optional
+            merchant and note
+        
+    Returns:
+        {"inserted": count, "ids": [generated ids in input order]}
+        
+    Example:
+        {
+            "user_id": "user_123",
+            "expenses": [
+                {"date": "2025-01-15", "amount": 45.50, "category": "Food"},
+                {"date": "2025-01-16", "amount": 120.00, "category": "Transport",
+                 "merchant": "Uber"}
+            ]
+        }
+    """
+    return await add_expenses_tool_async(user_id, expenses)
+
+
+@mcp.tool()
+async def import_statement(
+    user_id: str,
+    path: str,
+    file_format: str = None,
+    column_map: dict = None,
+    date_format: str = None,
+    expense_sign: str = None,
+    default_category: str = None
+) -> dict:
+    """
+    Import a bank/card statement (CSV or OFX) that was uploaded to the
+    server's import directory. Large files are streamed in batches.
+    
+    Args:
+        user_id: User identifier (required)
+        path: File path relative to the import directory (required)
+        file_format: "csv" or "ofx" (optional, detected from extension)
+        column_map: CSV header mapping, e.g. {"date": "Txn Date",
+            "amount": "Debit", "merchant": "Description"} (optional)
+        date_format: Date format of the CSV, e.g. "%d/%m/%Y" (optional,
+            default YYYY-MM-DD)
+        expense_sign: "positive" if expenses are positive numbers,
+            "negative" if debits are negative (optional; default
+            positive for CSV, negative for OFX)
+        default_category: Category for rows without one (optional)
+        
+    Returns:
+        {imported, skipped, errors, error_samples, batches, seconds,
+         rows_per_second}
+        
+    Example:
+        {
+            "user_id": "user_123",
+            "path": "hdfc-2024.csv",
+            "column_map": {"amount": "Withdrawal", "merchant": "Narration"},
+            "date_format": "%d/%m/%y"
+        }
+    """
+    return await import_statement_tool_async(
+        user_id, path, file_format, column_map, date_format,
+        expense_sign, default_category
+    )
 
 
 @mcp.tool()
-def list_expenses(
+async def list_expenses(
     user_id: str,
     start_date: str,
-    end_date: str
-) -> list:
+    end_date: str,
+    limit: int = None,
+    cursor: str = None
+) -> list | dict:
     """
     List a user's expenses within a date range.
     
+    Without `limit` at most 1000 expenses are returned (more is an error).
+    For long ranges pass `limit` to get one page at a time, then pass the
+    returned `next_cursor` as `cursor` to get the next page.
+    
     Args:
         user_id: User identifier (required)
         start_date: Range start in YYYY-MM-DD format (required)
         end_date: Range end in YYYY-MM-DD format (required)
+        limit: Page size, 1-1000 (optional)
+        cursor: next_cursor from the previous page (optional)
         
     Returns:
-        Array of expense objects ordered by date ASC
+        Array of expense objects ordered by date ASC; when paginating,
+        {"expenses": [...], "next_cursor": "..." or null on the last page}
         
     Example:
         {
             "user_id": "user_123",
-            "start_date": "2025-01-01",
-            "end_date": "2025-01-31"
+            "start_date": "2020-01-01",
+            "end_date": "2025-12-31",
+            "limit": 200
         }
     """
-    return list_expenses_tool(user_id, start_date, end_date)
+    return await list_expenses_tool_async(user_id, start_date, end_date, limit, cursor)
 
 
 @mcp.tool()
-def summarize_expenses(
+async def summarize_expenses(
     user_id: str,
     start_date: str,
     end_date: str
@@ -116,11 +249,11 @@ def summarize_expenses(
             "end_date": "2025-01-31"
         }
     """
-    return summarize_expenses_tool(user_id, start_date, end_date)
+    return await summarize_expenses_tool_async(user_id, start_date, end_date)
 
 
 @mcp.tool()
-def monthly_report(
+async def monthly_report(
     user_id: str,
     month: str
 ) -> dict:
@@ -140,7 +273,157 @@ def monthly_report(
             "month": "2025-01"
         }
     """
-    return monthly_report_tool(user_id, month)
+    return await monthly_report_tool_async(user_id, month)
+
+
+@mcp.tool()
+async def spending_trend(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    bucket: str = "month"
+) -> dict:
+    """
+    Total spending per time bucket over a date range, e.g. spend per week
+    over the last 2 years, in one call. Use it instead of calling
+    monthly_report per month or listing every expense.
+        
+    Args:
+        user_id: User identifier (required)
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (required)
+        bucket: day, week (starting Monday), month or year (default month)
+        
+    Returns:
+        {"periods": [bucket start dates], "totals": [spend per period],
+         "counts": [expenses per period], "total": ...}; periods without
+        expenses are omitted
+        
+    Example:
+        {
+            "user_id": "user_123",
+            "start_date": "2024-01-01",
+            "end_date": "2025-12-31",
+            "bucket": "week"
+        }
+    """
+    return await spending_trend_tool_async(user_id, start_date, end_date, bucket)
+
+
+@mcp.tool()
+async def spending_breakdown(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    top: int = 10
+) -> dict:
+    """
+    Where the money went over a date range: the merchants with the highest
+    spend and the typical (p50), large (p90) and extreme (p99) expense
+    amount. Use summarize_expenses for per-category totals.
+        
+    Args:
+        user_id: User identifier (required)
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (required)
+        top: Number of merchants to return, 1-100 (default 10)
+        
+    Returns:
+        {"total": ..., "expense_count": ..., "merchants": [{"merchant",
+         "total", "count"}], "amount_percentiles": {"p50", "p90", "p99"}};
+        merchant is null for expenses recorded without one
+        
+    Example:
+        {
+            "user_id": "user_123",
+            "start_date": "2025-01-01",
+            "end_date": "2025-06-30",
+            "top": 5
+        }
+    """
+    return await spending_breakdown_tool_async(user_id, start_date, end_date, top)
+
+
+async def category_trend(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    bucket: str = "month"
+) -> dict:
+    """
+    Spending per category per time bucket over a long range (e.g. monthly
+    category trend over 5 years), from the columnar analytics copy. The
+    copy may lag recent writes by up to ANALYTICS_MAX_AGE seconds, and the
+    tool returns an error while the copy is first being built.
+    
+    Args:
+        user_id: User identifier (required)
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (required)
+        bucket: day, week, month, quarter or year (default month)
+    
+    Returns:
+        {"periods": [...], "categories": {category: [total per period]},
+         "totals": [...], "as_of": {...}}
+    
+    Example:
+        {
+            "user_id": "user_123",
+            "start_date": "2021-01-01",
+            "end_date": "2025-12-31",
+            "bucket": "month"
+        }
+    """
+    return await category_trend_tool_async(user_id, start_date, end_date, bucket)
+
+
+# The analytics copy is optional; only offer the tool when it is configured
+if analytics_enabled():
+    mcp.tool()(category_trend)
+
+
+@mcp.resource("metrics://server", mime_type="application/json")
+def server_metrics() -> dict:
+    """
+    Connection pool stats, result cache stats, prepared statements and
+    per-query latency histograms.
+    
+    Returns:
+        {
+            "pools": {pool_name: {connections_in_use, requests_waiting, ...}},
+            "result_cache": {entries, bytes, hits, misses, hit_ratio, ...},
+            "prepared_statements": {
+                "connections": n,
+                "statements": {statement name: connections prepared on}
+            },
+            "histograms": {
+                "pool_checkout_seconds": [{pool, count, p50_ms, p95_ms, ...}],
+                "query_latency_seconds": [{method, count, p50_ms, p95_ms, ...}]
+            },
+            "counters": {
+                "pool_timeouts_total": [{pool, value}],
+                "result_cache_requests_total": [{method, result, value}],
+                "statements_prepared_total": [{statement, value}]
+            }
+        }
+    """
+    return {
+        "pools": pool_stats(),
+        "result_cache": result_cache.stats(),
+        "prepared_statements": statements.snapshot(),
+        **metrics.snapshot()
+    }
+
+
+@mcp.resource("metrics://server/prometheus", mime_type="text/plain")
+def server_metrics_prometheus() -> str:
+    """Pool stats, cache size and query latency histograms in Prometheus text format."""
+    lines = (
+        render_pool_stats("expense_db", pool_stats())
+        + result_cache.render_prometheus("expense_result_cache")
+        + metrics.render_prometheus()
+    )
+    return "\n".join(lines) + "\n"
 
 
 # Entry point for FastMCP Cloud deployment
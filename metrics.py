@@ -0,0 +1,224 @@
+"""
+In-process metrics for Expense MCP Server.
+
+Records connection pool checkout latency, pool timeouts and per-query
+latency histograms (keyed by ExpenseModel method). main.py exposes them
+as MCP resources in JSON and Prometheus text format.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe on its own)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 3) if seconds is not None else None
+
+        return {
+            "count": self.count,
+            "avg_ms": ms(self.sum / self.count) if self.count else None,
+            "max_ms": ms(self.max),
+            "p50_ms": ms(self.quantile(0.50)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+        }
+
+
+class Metrics:
+    """Thread-safe registry of labelled histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, int]] = {}
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: int = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: {metric: [{labels..., stats...}]}."""
+        with self._lock:
+            histograms = {
+                name: [
+                    {**dict(key), **histogram.snapshot()}
+                    for key, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+            counters = {
+                name: [{**dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+        return {"histograms": histograms, "counters": counters}
+
+    def render_prometheus(self) -> List[str]:
+        """Prometheus text exposition lines for all histograms and counters."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, bucket_count in zip(
+                        histogram.buckets + (float("inf"),), histogram.counts
+                    ):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(
+                            f"{name}_bucket{_labels(key, le=le)} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_labels(key)} {value}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render_pool_stats(prefix: str, pools: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Prometheus lines for {pool_name: {stat: number}}. Stats ending in
+    _total are cumulative counters; everything else is a gauge.
+    """
+    lines: List[str] = []
+    stat_names = sorted({stat for stats in pools.values() for stat in stats})
+    for stat in stat_names:
+        metric = f"{prefix}_{stat}"
+        metric_type = "counter" if stat.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for pool_name, stats in pools.items():
+            if stat in stats:
+                lines.append(f'{metric}{{pool="{pool_name}"}} {stats[stat]}')
+    return lines
+
+
+# Process-wide registry
+metrics = Metrics()
+
+
+def timed_query(method: str) -> Callable:
+    """
+    Record the latency of an ExpenseModel method in the
+    query_latency_seconds histogram. Works for sync and async methods and
+    for (async) generators, which are timed until they are exhausted.
+    """
+    def record(started: float) -> None:
+        metrics.observe(
+            "query_latency_seconds",
+            time.perf_counter() - started,
+            method=method
+        )
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def async_gen_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                generator = fn(*args, **kwargs)
+                try:
+                    async for item in generator:
+                        yield item
+                finally:
+                    await generator.aclose()
+                    record(started)
+            return async_gen_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    yield from fn(*args, **kwargs)
+                finally:
+                    record(started)
+            return gen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(started)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(started)
+        return wrapper
+
+    return decorator
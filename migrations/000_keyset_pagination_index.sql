@@ -0,0 +1,11 @@
+-- Migration 000: index for keyset-paginated list_expenses.
+-- Run on databases created from a schema.sql without
+-- idx_expenses_user_date_created, before 003_partition_expenses.sql:
+--   psql $DATABASE_URL < migrations/000_keyset_pagination_index.sql
+--
+-- CONCURRENTLY builds the index without blocking writes, so this file
+-- runs outside a transaction. Partitioned databases (003 applied) already
+-- have the index.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_date_created
+ON expenses(user_id, date, created_at, id);
@@ -0,0 +1,80 @@
+-- Migration 001: monthly category rollup for fast range summaries.
+-- Run once on databases created from an older schema.sql:
+--   psql $DATABASE_URL < migrations/001_monthly_rollup.sql
+
+BEGIN;
+
+-- Per-user monthly category rollup, maintained by statement-level triggers
+-- on expenses so every write path (add_expense, COPY batches, imports,
+-- manual deletes) keeps it exact. Range summaries read whole months from
+-- here and only the partial edge months from raw rows.
+CREATE TABLE expense_monthly_rollup (
+    user_id TEXT NOT NULL,
+    month DATE NOT NULL,                -- first day of the month
+    category TEXT NOT NULL,
+    total NUMERIC(14,2) NOT NULL,
+    expense_count BIGINT NOT NULL,
+    PRIMARY KEY (user_id, month, category)
+);
+
+CREATE FUNCTION expense_rollup_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE expense_monthly_rollup r
+        SET total = r.total - d.total,
+            expense_count = r.expense_count - d.expense_count
+        FROM (
+            SELECT user_id, date_trunc('month', date)::date AS month, category,
+                   SUM(amount) AS total, COUNT(*) AS expense_count
+            FROM old_rows
+            GROUP BY 1, 2, 3
+        ) d
+        WHERE r.user_id = d.user_id AND r.month = d.month AND r.category = d.category;
+
+        DELETE FROM expense_monthly_rollup r
+        USING (SELECT DISTINCT user_id, date_trunc('month', date)::date AS month, category
+               FROM old_rows) d
+        WHERE r.user_id = d.user_id AND r.month = d.month AND r.category = d.category
+          AND r.expense_count <= 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO expense_monthly_rollup (user_id, month, category, total, expense_count)
+        SELECT user_id, date_trunc('month', date)::date, category, SUM(amount), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, month, category) DO UPDATE
+        SET total = expense_monthly_rollup.total + EXCLUDED.total,
+            expense_count = expense_monthly_rollup.expense_count + EXCLUDED.expense_count;
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+-- Transition tables allow one event per trigger
+CREATE TRIGGER expenses_rollup_insert
+AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_rollup_update
+AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_rollup_delete
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+-- Backfill from existing rows (the triggers only see new writes)
+LOCK TABLE expenses IN SHARE MODE;
+
+INSERT INTO expense_monthly_rollup (user_id, month, category, total, expense_count)
+SELECT user_id, date_trunc('month', date)::date, category, SUM(amount), COUNT(*)
+FROM expenses
+GROUP BY 1, 2, 3;
+
+COMMIT;
@@ -0,0 +1,60 @@
+-- Migration 002: write notifications for cross-replica cache invalidation.
+--   psql $DATABASE_URL < migrations/002_expense_write_notify.sql
+
+BEGIN;
+
+-- NOTIFY expense_writes with {"user_id", "from", "to", "dates"} for every
+-- user touched by a write statement, so each server replica can drop its
+-- cached summaries (see cache.InvalidationListener). "dates" is omitted
+-- for writes spanning many days to stay under the payload limit.
+CREATE FUNCTION expense_notify_writes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    changed_rows TEXT;
+    change RECORD;
+BEGIN
+    changed_rows := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT user_id, date FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT user_id, date FROM old_rows'
+        ELSE 'SELECT user_id, date FROM new_rows UNION ALL SELECT user_id, date FROM old_rows'
+    END;
+
+    FOR change IN EXECUTE format($query$
+        SELECT
+            user_id,
+            MIN(date) AS first_date,
+            MAX(date) AS last_date,
+            CASE WHEN COUNT(DISTINCT date) <= 100
+                 THEN array_agg(DISTINCT date ORDER BY date) END AS dates
+        FROM (%s) changed
+        GROUP BY user_id
+    $query$, changed_rows)
+    LOOP
+        PERFORM pg_notify('expense_writes', json_strip_nulls(json_build_object(
+            'user_id', change.user_id,
+            'from', change.first_date,
+            'to', change.last_date,
+            'dates', change.dates
+        ))::text);
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER expenses_notify_insert
+AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+CREATE TRIGGER expenses_notify_update
+AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+CREATE TRIGGER expenses_notify_delete
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+COMMIT;
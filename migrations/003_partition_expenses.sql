@@ -0,0 +1,116 @@
+-- Migration 003: convert expenses to a monthly range-partitioned table.
+--   psql $DATABASE_URL < migrations/003_partition_expenses.sql
+--
+-- Requires 001 and 002. Rows are copied into the new table while expenses
+-- is locked against writes (plan a maintenance window for large tables).
+-- The old table is kept as expenses_unpartitioned; drop it once verified:
+--   DROP TABLE expenses_unpartitioned;
+
+BEGIN;
+
+LOCK TABLE expenses IN ACCESS EXCLUSIVE MODE;
+
+-- Move the old table and its index names out of the way (the keyset index
+-- is missing on databases that skipped 000)
+ALTER TABLE expenses RENAME TO expenses_unpartitioned;
+ALTER TABLE expenses_unpartitioned RENAME CONSTRAINT expenses_pkey TO expenses_unpartitioned_pkey;
+ALTER INDEX idx_expenses_user_date RENAME TO idx_expenses_unpartitioned_user_date;
+ALTER INDEX IF EXISTS idx_expenses_user_date_created RENAME TO idx_expenses_unpartitioned_user_date_created;
+ALTER INDEX idx_expenses_user_category RENAME TO idx_expenses_unpartitioned_user_category;
+DROP TRIGGER expenses_rollup_insert ON expenses_unpartitioned;
+DROP TRIGGER expenses_rollup_update ON expenses_unpartitioned;
+DROP TRIGGER expenses_rollup_delete ON expenses_unpartitioned;
+DROP TRIGGER expenses_notify_insert ON expenses_unpartitioned;
+DROP TRIGGER expenses_notify_update ON expenses_unpartitioned;
+DROP TRIGGER expenses_notify_delete ON expenses_unpartitioned;
+
+CREATE TABLE expenses (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id TEXT NOT NULL,
+    date DATE NOT NULL,
+    amount NUMERIC(10,2) NOT NULL CHECK (amount > 0),
+    category TEXT NOT NULL,
+    merchant TEXT,
+    note TEXT,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+CREATE FUNCTION ensure_expense_partitions(months DATE[]) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+BEGIN
+    FOREACH month_start IN ARRAY months LOOP
+        month_start := date_trunc('month', month_start)::date;
+        partition_name := format('expenses_%s', to_char(month_start, 'YYYY_MM'));
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF expenses FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + interval '1 month')::date
+            );
+        EXCEPTION WHEN duplicate_table OR unique_violation THEN
+            NULL;  -- created concurrently by another session
+        END;
+    END LOOP;
+END
+$$;
+
+-- One partition per month with data, plus the current and next month
+SELECT ensure_expense_partitions(ARRAY(
+    SELECT DISTINCT date_trunc('month', date)::date FROM expenses_unpartitioned
+    UNION
+    SELECT date_trunc('month', now() + step * interval '1 month')::date
+    FROM generate_series(0, 1) AS step
+));
+
+-- Copy before creating indexes and triggers: faster, and the rollup
+-- already holds these rows
+INSERT INTO expenses (id, user_id, date, amount, category, merchant, note, created_at)
+SELECT id, user_id, date, amount, category, merchant, note, created_at
+FROM expenses_unpartitioned;
+
+CREATE INDEX idx_expenses_user_date
+ON expenses(user_id, date);
+
+CREATE INDEX idx_expenses_user_date_created
+ON expenses(user_id, date, created_at, id);
+
+CREATE INDEX idx_expenses_user_category
+ON expenses(user_id, category);
+
+CREATE TRIGGER expenses_rollup_insert
+AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_rollup_update
+AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_rollup_delete
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_notify_insert
+AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+CREATE TRIGGER expenses_notify_update
+AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+CREATE TRIGGER expenses_notify_delete
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+ANALYZE expenses;
+
+COMMIT;
@@ -0,0 +1,17 @@
+-- Migration 004: make idx_expenses_user_date covering for the aggregates.
+--   psql $DATABASE_URL < migrations/004_covering_indexes.sql
+--
+-- Partitioned indexes cannot be built CONCURRENTLY; writes to expenses
+-- wait while the index is rebuilt on every partition.
+
+BEGIN;
+
+DROP INDEX idx_expenses_user_date;
+
+CREATE INDEX idx_expenses_user_date
+ON expenses(user_id, date) INCLUDE (amount, category);
+
+COMMIT;
+
+-- Index-only scans need an up-to-date visibility map
+VACUUM ANALYZE expenses;
@@ -0,0 +1,5 @@
+-- Migration 005: BRIN index on created_at for analytics.py refreshes.
+--   psql $DATABASE_URL < migrations/005_created_at_brin.sql
+
+CREATE INDEX IF NOT EXISTS idx_expenses_created_at
+ON expenses USING brin (created_at);
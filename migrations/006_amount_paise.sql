@@ -0,0 +1,79 @@
+-- Migration 006: store amounts as integer paise (BIGINT) instead of NUMERIC.
+--   psql $DATABASE_URL < migrations/006_amount_paise.sql
+--
+-- Requires 001-005. expenses and the rollup are rewritten under an
+-- exclusive lock (plan a maintenance window for large tables); deploy the
+-- server version that reads amount_paise at the same time. Afterwards:
+--   - run `python analytics.py rebuild` if ANALYTICS_DIR is used
+--   - restart or flush shared result caches (RESULT_CACHE_BACKEND=sqlite
+--     or redis), or wait RESULT_CACHE_TTL, so no NUMERIC-era entries are read
+
+BEGIN;
+
+LOCK TABLE expenses, expense_monthly_rollup IN ACCESS EXCLUSIVE MODE;
+
+-- The amount CHECK would survive the type change as a NUMERIC comparison;
+-- its name depends on the migration history, so look it up
+DO $$
+DECLARE
+    check_name TEXT;
+BEGIN
+    FOR check_name IN
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = 'expenses'::regclass AND contype = 'c' AND NOT coninhcount > 0
+          AND pg_get_constraintdef(oid) LIKE '%amount%'
+    LOOP
+        EXECUTE format('ALTER TABLE expenses DROP CONSTRAINT %I', check_name);
+    END LOOP;
+END
+$$;
+
+-- idx_expenses_user_date (INCLUDE amount) is rebuilt with the column
+ALTER TABLE expenses RENAME COLUMN amount TO amount_paise;
+ALTER TABLE expenses ALTER COLUMN amount_paise TYPE BIGINT USING (amount_paise * 100)::bigint;
+ALTER TABLE expenses ADD CONSTRAINT expenses_amount_paise_check CHECK (amount_paise > 0);
+
+ALTER TABLE expense_monthly_rollup RENAME COLUMN total TO total_paise;
+ALTER TABLE expense_monthly_rollup
+    ALTER COLUMN total_paise TYPE BIGINT USING (total_paise * 100)::bigint;
+
+CREATE OR REPLACE FUNCTION expense_rollup_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE expense_monthly_rollup r
+        SET total_paise = r.total_paise - d.total_paise,
+            expense_count = r.expense_count - d.expense_count
+        FROM (
+            SELECT user_id, date_trunc('month', date)::date AS month, category,
+                   SUM(amount_paise) AS total_paise, COUNT(*) AS expense_count
+            FROM old_rows
+            GROUP BY 1, 2, 3
+        ) d
+        WHERE r.user_id = d.user_id AND r.month = d.month AND r.category = d.category;
+
+        DELETE FROM expense_monthly_rollup r
+        USING (SELECT DISTINCT user_id, date_trunc('month', date)::date AS month, category
+               FROM old_rows) d
+        WHERE r.user_id = d.user_id AND r.month = d.month AND r.category = d.category
+          AND r.expense_count <= 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO expense_monthly_rollup (user_id, month, category, total_paise, expense_count)
+        SELECT user_id, date_trunc('month', date)::date, category, SUM(amount_paise), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, month, category) DO UPDATE
+        SET total_paise = expense_monthly_rollup.total_paise + EXCLUDED.total_paise,
+            expense_count = expense_monthly_rollup.expense_count + EXCLUDED.expense_count;
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+
+COMMIT;
+
+VACUUM ANALYZE expenses;
@@ -0,0 +1,19 @@
+-- Migration 007: make expenses.created_at NOT NULL.
+--   psql $DATABASE_URL < migrations/007_created_at_not_null.sql
+--
+-- list_expenses pages on (date, created_at, id) > (...); a NULL created_at
+-- makes that comparison NULL, so such rows (inserted by other tools with
+-- an explicit NULL) silently dropped out of every page after the first.
+-- Existing NULLs are backfilled with the migration time, which also lets
+-- the next analytics.py refresh pick them up. SET NOT NULL scans every
+-- partition under an exclusive lock; plan a short maintenance window.
+
+BEGIN;
+
+UPDATE expenses SET created_at = now() WHERE created_at IS NULL;
+
+ALTER TABLE expenses
+    ALTER COLUMN created_at SET DEFAULT now(),
+    ALTER COLUMN created_at SET NOT NULL;
+
+COMMIT;
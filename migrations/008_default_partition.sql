@@ -0,0 +1,65 @@
+-- Migration 008: add a DEFAULT partition to expenses.
+--   psql $DATABASE_URL < migrations/008_default_partition.sql
+--
+-- Requires 003. Without it, an insert into a month that has no partition
+-- yet failed: other tools had to call ensure_expense_partitions first, and
+-- the server trusted its in-process list of ensured months. Such rows now
+-- land in expenses_default, and ensure_expense_partitions moves them into
+-- the month's partition when it creates it. To drain the default
+-- partition (e.g. from a nightly job):
+--   SELECT ensure_expense_partitions(ARRAY(SELECT DISTINCT date FROM expenses_default));
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS expenses_default PARTITION OF expenses DEFAULT;
+
+CREATE OR REPLACE FUNCTION ensure_expense_partitions(months DATE[]) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    partition_name TEXT;
+BEGIN
+    FOREACH month_start IN ARRAY months LOOP
+        month_start := date_trunc('month', month_start)::date;
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := format('expenses_%s', to_char(month_start, 'YYYY_MM'));
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        BEGIN
+            -- Creating a partition scans the default partition anyway;
+            -- locking it first keeps rows from landing there meanwhile
+            LOCK TABLE expenses_default IN SHARE ROW EXCLUSIVE MODE;
+            IF EXISTS (
+                SELECT 1 FROM expenses_default WHERE date >= month_start AND date < month_end
+            ) THEN
+                -- Move the month's rows out of the default partition. This
+                -- bypasses the triggers on expenses: the rows only change
+                -- partition, so the rollup and caches stay valid.
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE expenses INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                    partition_name
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM expenses_default'
+                    ' WHERE date >= %L AND date < %L RETURNING *)'
+                    ' INSERT INTO %I SELECT * FROM moved',
+                    month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE expenses ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF expenses FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            END IF;
+        EXCEPTION WHEN duplicate_table OR unique_violation THEN
+            NULL;  -- created concurrently by another session
+        END;
+    END LOOP;
+END
+$$;
+
+COMMIT;
@@ -2,25 +2,715 @@
 SQL query helpers and data access layer for Expense MCP Server.
 
 All queries enforce user_id isolation for multi-user safety.
+
+ExpenseModel is the synchronous API (scripts, tests); AsyncExpenseModel
+the asyncio one used by the MCP tools. Both validate their arguments and
+delegate storage to the backend chosen by STORAGE_BACKEND (see
+storage.py): PostgresStore below, or the embedded SQLiteStore.
+
+On Postgres, summary reads go through cache.result_cache; every write
+method of PostgresStore invalidates the cached ranges it touches, so new
+writes must do the same.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable, Iterator, AsyncIterator
+from calendar import monthrange
 from datetime import datetime, date
-from decimal import Decimal
-from db import get_db 
+from uuid import UUID, uuid4
+from db import (
+    Statement, get_db, get_async_db, get_read_db, get_async_read_db,
+    record_write, statements
+)
+from metrics import timed_query
+from cache import CacheKey, result_cache
+from storage import (
+    TREND_BUCKETS, AsyncExpenseStore, AsyncSQLiteStore, ExpenseStore, SQLiteStore,
+    sqlite_path, storage_backend
+)
+
+
+ADD_EXPENSE_SQL = """
+    INSERT INTO expenses (user_id, date, amount_paise, category, merchant, note)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id, user_id, date, amount_paise, category, merchant, note, created_at
+"""
+
+# ids are generated client-side because COPY cannot RETURN them
+# expenses is partitioned by month; see ensure_expense_partitions in schema.sql
+ENSURE_PARTITIONS_SQL = "SELECT ensure_expense_partitions(%s::date[])"
+
+COPY_EXPENSES_SQL = """
+    COPY expenses (id, user_id, date, amount_paise, category, merchant, note)
+    FROM STDIN
+"""
+
+EXPENSE_COLUMNS = "id, user_id, date, amount_paise, category, merchant, note, created_at"
+
+# The same columns rendered by Postgres as JSON-ready values (text id,
+# ISO date and timestamp, float rupee amount), so fetched rows can be
+# handed to MCP clients as they are instead of being rebuilt in Python
+# row by row.
+# created_at matches datetime.isoformat(): microseconds always six digits,
+# omitted when zero. float8 division is correctly rounded, so amounts below
+# 2**53 paise (any real expense) match storage.from_paise.
+EXPENSE_JSON_COLUMNS = """
+        id::text AS id, user_id, to_char(date, 'YYYY-MM-DD') AS date,
+        amount_paise::float8 / 100 AS amount, category, merchant, note,
+        to_char(created_at, CASE WHEN date_trunc('second', created_at) = created_at
+            THEN 'YYYY-MM-DD"T"HH24:MI:SSTZH:TZM'
+            ELSE 'YYYY-MM-DD"T"HH24:MI:SS.USTZH:TZM' END) AS created_at
+"""
+
+
+def _list_expenses_sql(columns: str, after: bool = False, limit: bool = False) -> str:
+    # Keyset pagination on (date, created_at, id): each page seeks straight
+    # to the last row of the previous one via idx_expenses_user_date_created,
+    # so page cost does not depend on how deep into the range it is.
+    # ORDER BY is table-qualified: bare names would resolve to the text
+    # output columns of EXPENSE_JSON_COLUMNS and defeat the index order.
+    return f"""
+    SELECT {columns}
+    FROM expenses
+    WHERE user_id = %s
+      AND date BETWEEN %s AND %s
+      {"AND (date, created_at, id) > (%s, %s, %s)" if after else ""}
+    ORDER BY expenses.date ASC, expenses.created_at ASC, expenses.id ASC
+    {"LIMIT %s" if limit else ""}
+"""
+
+
+LIST_EXPENSES_SQL = _list_expenses_sql(EXPENSE_COLUMNS)
+LIST_EXPENSES_FIRST_PAGE_SQL = _list_expenses_sql(EXPENSE_COLUMNS, limit=True)
+LIST_EXPENSES_NEXT_PAGE_SQL = _list_expenses_sql(EXPENSE_COLUMNS, after=True, limit=True)
+
+LIST_EXPENSES_JSON_SQL = _list_expenses_sql(EXPENSE_JSON_COLUMNS)
+LIST_EXPENSES_FIRST_PAGE_JSON_SQL = _list_expenses_sql(EXPENSE_JSON_COLUMNS, limit=True)
+LIST_EXPENSES_NEXT_PAGE_JSON_SQL = _list_expenses_sql(
+    EXPENSE_JSON_COLUMNS, after=True, limit=True
+)
+
+# Ranges are split into whole months, read from the trigger-maintained
+# expense_monthly_rollup table, and the partial months at either edge,
+# read from raw rows. Multi-year summaries touch one rollup row per
+# (month, category) instead of every expense. See _range_params.
+# Amounts are BIGINT paise; SUM(bigint) is numeric, cast back to bigint.
+_RANGE_PARTS_SQL = """
+        SELECT category, total_paise, expense_count
+        FROM expense_monthly_rollup
+        WHERE user_id = %s
+          AND month >= %s AND month < %s
+        UNION ALL
+        SELECT category, amount_paise, 1
+        FROM expenses
+        WHERE user_id = %s
+          AND date >= %s AND date < %s
+        UNION ALL
+        SELECT category, amount_paise, 1
+        FROM expenses
+        WHERE user_id = %s
+          AND date >= %s AND date <= %s
+"""
+
+SUMMARIZE_BY_CATEGORY_SQL = f"""
+    SELECT
+        category,
+        SUM(total_paise)::bigint as total_paise
+    FROM ({_RANGE_PARTS_SQL}) parts
+    GROUP BY category
+    ORDER BY total_paise DESC
+"""
+
+# GROUPING SETS ((category), ()) returns one row per category plus a
+# grand-total row, so a whole report costs a single round trip.
+PERIOD_REPORT_SQL = f"""
+    SELECT
+        category,
+        COALESCE(SUM(total_paise), 0)::bigint as total_paise,
+        COALESCE(SUM(expense_count), 0)::bigint as expense_count,
+        GROUPING(category) as is_grand_total
+    FROM ({_RANGE_PARTS_SQL}) parts
+    GROUP BY GROUPING SETS ((category), ())
+    ORDER BY is_grand_total DESC, total_paise DESC
+"""
+
+# spending_trend: one row per date_trunc bucket. Day and week buckets read
+# raw rows through the covering idx_expenses_user_date (index-only scan).
+# Month and year buckets are unions of whole months, so like the
+# summaries they read the rollup for whole months and raw rows only for
+# the partial months at the edges (_range_params).
+SPENDING_TREND_SQL = """
+    SELECT
+        date_trunc(%s, date::timestamp)::date AS period,
+        SUM(amount_paise)::bigint AS total_paise,
+        COUNT(*) AS expense_count
+    FROM expenses
+    WHERE user_id = %s
+      AND date BETWEEN %s AND %s
+    GROUP BY period
+    ORDER BY period
+"""
+
+SPENDING_TREND_ROLLUP_SQL = """
+    SELECT
+        date_trunc(%s, day::timestamp)::date AS period,
+        SUM(total_paise)::bigint AS total_paise,
+        SUM(expense_count)::bigint AS expense_count
+    FROM (
+        SELECT month AS day, total_paise, expense_count
+        FROM expense_monthly_rollup
+        WHERE user_id = %s
+          AND month >= %s AND month < %s
+        UNION ALL
+        SELECT date, amount_paise, 1
+        FROM expenses
+        WHERE user_id = %s
+          AND date >= %s AND date < %s
+        UNION ALL
+        SELECT date, amount_paise, 1
+        FROM expenses
+        WHERE user_id = %s
+          AND date >= %s AND date <= %s
+    ) parts
+    GROUP BY period
+    ORDER BY period
+"""
+
+
+# Hot-path queries, run as prepared statements once per pooled connection
+# (see db.StatementRegistry). Streaming queries use server-side cursors,
+# which cannot be prepared, and stay plain SQL.
+ADD_EXPENSE = statements.register("add_expense", ADD_EXPENSE_SQL)
+LIST_EXPENSES = statements.register("list_expenses", LIST_EXPENSES_SQL)
+LIST_EXPENSES_FIRST_PAGE = statements.register(
+    "list_expenses_first_page", LIST_EXPENSES_FIRST_PAGE_SQL
+)
+LIST_EXPENSES_NEXT_PAGE = statements.register(
+    "list_expenses_next_page", LIST_EXPENSES_NEXT_PAGE_SQL
+)
+LIST_EXPENSES_FIRST_PAGE_JSON = statements.register(
+    "list_expenses_first_page_json", LIST_EXPENSES_FIRST_PAGE_JSON_SQL
+)
+LIST_EXPENSES_NEXT_PAGE_JSON = statements.register(
+    "list_expenses_next_page_json", LIST_EXPENSES_NEXT_PAGE_JSON_SQL
+)
+SUMMARIZE_BY_CATEGORY = statements.register("summarize_by_category", SUMMARIZE_BY_CATEGORY_SQL)
+PERIOD_REPORT = statements.register("period_report", PERIOD_REPORT_SQL)
+SPENDING_TREND = statements.register("spending_trend", SPENDING_TREND_SQL)
+SPENDING_TREND_ROLLUP = statements.register("spending_trend_rollup", SPENDING_TREND_ROLLUP_SQL)
+
+def _validate_user_id(user_id: str) -> None:
+    if not user_id or not user_id.strip():
+        raise ValueError("user_id is required and cannot be empty")
+
+
+def _validate_amount(amount_paise: int) -> None:
+    if amount_paise <= 0:
+        raise ValueError(f"amount must be positive, got {amount_paise} paise")
+
+
+def _copy_rows(
+    user_id: str,
+    expenses: List[Dict[str, Any]]
+) -> tuple[List[UUID], List[tuple]]:
+    """Validate a batch and build (ids, COPY rows) for COPY_EXPENSES_SQL."""
+    _validate_user_id(user_id)
+    
+    ids: List[UUID] = []
+    rows: List[tuple] = []
+    for expense in expenses:
+        _validate_amount(expense["amount_paise"])
+        expense_id = uuid4()
+        ids.append(expense_id)
+        rows.append((
+            expense_id,
+            user_id,
+            expense["expense_date"],
+            expense["amount_paise"],
+            expense["category"],
+            expense.get("merchant"),
+            expense.get("note")
+        ))
+    return ids, rows
+
+
+# (pool name, month) pairs whose partition this process has already
+# ensured; each shard has its own partitions. Only saves round trips: if
+# it is stale, rows land in expenses_default rather than failing.
+_partition_months: Set[Tuple[str, date]] = set()
+
+
+def _unseen_months(db, dates: Iterable[date]) -> List[date]:
+    months = {day.replace(day=1) for day in dates}
+    return sorted(month for month in months if (db.name, month) not in _partition_months)
+
+
+def _ensure_partitions(db, dates: Iterable[date]) -> None:
+    """Create missing monthly partitions before writing rows on `dates`."""
+    months = _unseen_months(db, dates)
+    if months:
+        db.execute_query(ENSURE_PARTITIONS_SQL, (months,))
+        _partition_months.update((db.name, month) for month in months)
+
+
+async def _ensure_partitions_async(db, dates: Iterable[date]) -> None:
+    months = _unseen_months(db, dates)
+    if months:
+        await db.execute_query(ENSURE_PARTITIONS_SQL, (months,))
+        _partition_months.update((db.name, month) for month in months)
+
+
+def _page_query(
+    user_id: str,
+    start_date: date,
+    end_date: date,
+    limit: int,
+    after: Optional[Tuple[date, datetime, UUID]],
+    json_ready: bool
+) -> Tuple[Statement, tuple]:
+    """Statement and params for up to `limit` rows after the key `after`."""
+    if after is None:
+        query = LIST_EXPENSES_FIRST_PAGE_JSON if json_ready else LIST_EXPENSES_FIRST_PAGE
+        return query, (user_id, start_date, end_date, limit)
+    
+    query = LIST_EXPENSES_NEXT_PAGE_JSON if json_ready else LIST_EXPENSES_NEXT_PAGE
+    return query, (user_id, start_date, end_date, *after, limit)
+
+
+def _validate_page_limit(user_id: str, limit: int) -> None:
+    _validate_user_id(user_id)
+    if limit < 1:
+        raise ValueError(f"limit must be positive, got {limit}")
+
+
+def _page_from_rows(
+    rows: List[Dict[str, Any]],
+    limit: int
+) -> Dict[str, Any]:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if has_more else None
+    
+    return {
+        "expenses": rows,
+        "next_key": (last["date"], last["created_at"], last["id"]) if last else None
+    }
+
+
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
+    last_day = monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, last_day)
+
+
+def _next_month(month_start: date) -> date:
+    # date.max stands in for 10000-01-01, which date cannot hold
+    if (month_start.year, month_start.month) == (9999, 12):
+        return date.max
+    return date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+
+
+def _range_params(user_id: str, start_date: date, end_date: date) -> tuple:
+    """
+    Params for _RANGE_PARTS_SQL: the whole months [full_start, full_end)
+    come from the rollup, [start, full_start) and [full_end, end] from raw
+    rows. A range without a whole month is read entirely from raw rows.
+    """
+    full_start = start_date.replace(day=1)
+    if full_start < start_date:
+        full_start = _next_month(full_start)
+    full_end = end_date.replace(day=1)
+    # the month of date.max stays a raw edge: its next month is not a date
+    if end_date == _month_bounds(end_date.year, end_date.month)[1] and end_date < date.max:
+        full_end = _next_month(full_end)
+    if full_start >= full_end:
+        full_start = full_end = start_date
+    
+    return (
+        user_id, full_start, full_end,
+        user_id, start_date, full_start,
+        user_id, full_end, end_date
+    )
+
+
+def _trend_query(
+    user_id: str,
+    start_date: date,
+    end_date: date,
+    bucket: str
+) -> Tuple[Statement, tuple]:
+    if bucket in ("month", "year"):
+        return SPENDING_TREND_ROLLUP, (bucket, *_range_params(user_id, start_date, end_date))
+    return SPENDING_TREND, (bucket, user_id, start_date, end_date)
+
+
+def _validate_bucket(bucket: str) -> None:
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(
+            f"bucket must be one of {', '.join(TREND_BUCKETS)}, got '{bucket}'"
+        )
+
+
+def _period_report_from_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # The grand-total row is always present (even for an empty range)
+    # and sorts first.
+    grand_total, categories = rows[0], rows[1:]
+    
+    return {
+        "total_paise": grand_total["total_paise"],
+        "expense_count": grand_total["expense_count"],
+        "category_breakdown": [
+            {
+                "category": row["category"],
+                "total_paise": row["total_paise"],
+                "expense_count": row["expense_count"]
+            }
+            for row in categories
+        ]
+    }
+
+
+def _monthly_summary(
+    user_id: str,
+    year: int,
+    month: int,
+    report: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "year": year,
+        "month": month,
+        "total_paise": report["total_paise"],
+        "category_breakdown": report["category_breakdown"],
+        "expense_count": report["expense_count"]
+    }
+
+
+class PostgresStore(ExpenseStore):
+    """
+    ExpenseStore on the Postgres pools of db.py: writes go to the user's
+    primary (or shard), reads to a replica when one is configured, and
+    summaries read through the result cache.
+    """
+    
+    name = "postgres"
+    
+    def add_expense(
+        self,
+        user_id: str,
+        expense_date: date,
+        amount_paise: int,
+        category: str,
+        merchant: Optional[str],
+        note: Optional[str]
+    ) -> Dict[str, Any]:
+        db = get_db(user_id)
+        _ensure_partitions(db, [expense_date])
+        
+        result = db.execute_insert_returning(
+            ADD_EXPENSE,
+            (user_id, expense_date, amount_paise, category, merchant, note)
+        )
+        
+        if not result:
+            raise RuntimeError("Failed to insert expense")
+        
+        record_write(user_id)
+        result_cache.invalidate(user_id, [expense_date])
+        return result
+    
+    def add_expenses(self, user_id: str, rows: List[tuple]) -> None:
+        db = get_db(user_id)
+        _ensure_partitions(db, (row[2] for row in rows))
+        db.execute_copy(COPY_EXPENSES_SQL, rows)
+        record_write(user_id)
+        result_cache.invalidate(user_id, (row[2] for row in rows))
+    
+    def delete_expenses(self, user_id: str) -> int:
+        deleted = get_db(user_id).execute_update(
+            "DELETE FROM expenses WHERE user_id = %s", (user_id,)
+        )
+        record_write(user_id)
+        result_cache.invalidate_ranges(user_id, [(date.min, date.max)])
+        return deleted
+    
+    def list_expenses(self, user_id: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        db = get_read_db(user_id)
+        
+        return db.execute_query(LIST_EXPENSES, (user_id, start_date, end_date))
+    
+    def iter_expenses(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        json_ready: bool
+    ) -> Iterator[List[Dict[str, Any]]]:
+        db = get_read_db(user_id)
+        query = LIST_EXPENSES_JSON_SQL if json_ready else LIST_EXPENSES_SQL
+        
+        yield from db.stream_query(query, (user_id, start_date, end_date))
+    
+    def list_expenses_page(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[Tuple[date, datetime, UUID]],
+        json_ready: bool
+    ) -> List[Dict[str, Any]]:
+        query, params = _page_query(
+            user_id, start_date, end_date, limit, after, json_ready
+        )
+        db = get_read_db(user_id)
+        
+        return db.execute_query(query, params)
+    
+    def summarize_by_category(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        key = CacheKey("summarize_by_category", user_id, start_date, end_date)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        generation = result_cache.generation(user_id)
+        db = get_read_db(user_id)
+        rows = db.execute_query(
+            SUMMARIZE_BY_CATEGORY, _range_params(user_id, start_date, end_date)
+        )
+        
+        return result_cache.put(key, rows, generation)
+    
+    def get_period_reports(
+        self,
+        user_id: str,
+        ranges: List[Tuple[date, date]]
+    ) -> List[Dict[str, Any]]:
+        # Cached ranges come from the result cache; the rest run as
+        # independent statements pipelined on one connection, so N ranges
+        # cost about one round trip. A single range is a plain query.
+        keys = [
+            CacheKey("get_period_report", user_id, start_date, end_date)
+            for start_date, end_date in ranges
+        ]
+        reports = [result_cache.get(key) for key in keys]
+        missing = [i for i, report in enumerate(reports) if report is None]
+        if not missing:
+            return reports
+        
+        generation = result_cache.generation(user_id)
+        db = get_read_db(user_id)
+        queries = [(PERIOD_REPORT, _range_params(user_id, *ranges[i])) for i in missing]
+        if len(queries) == 1:
+            results = [db.execute_query(*queries[0])]
+        else:
+            results = db.execute_pipeline(queries)
+        for i, rows in zip(missing, results):
+            reports[i] = result_cache.put(
+                keys[i], _period_report_from_rows(rows), generation
+            )
+        
+        return reports
+    
+    def spending_trend(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str
+    ) -> List[Dict[str, Any]]:
+        key = CacheKey(f"spending_trend_{bucket}", user_id, start_date, end_date)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        generation = result_cache.generation(user_id)
+        db = get_read_db(user_id)
+        rows = db.execute_query(*_trend_query(user_id, start_date, end_date, bucket))
+        
+        return result_cache.put(key, rows, generation)
+
+
+class AsyncPostgresStore(AsyncExpenseStore):
+    """PostgresStore on the asyncio pools: same SQL, same caching."""
+    
+    name = "postgres"
+    
+    async def add_expense(
+        self,
+        user_id: str,
+        expense_date: date,
+        amount_paise: int,
+        category: str,
+        merchant: Optional[str],
+        note: Optional[str]
+    ) -> Dict[str, Any]:
+        db = await get_async_db(user_id)
+        await _ensure_partitions_async(db, [expense_date])
+        
+        result = await db.execute_insert_returning(
+            ADD_EXPENSE,
+            (user_id, expense_date, amount_paise, category, merchant, note)
+        )
+        
+        if not result:
+            raise RuntimeError("Failed to insert expense")
+        
+        record_write(user_id)
+        result_cache.invalidate(user_id, [expense_date])
+        return result
+    
+    async def add_expenses(self, user_id: str, rows: List[tuple]) -> None:
+        db = await get_async_db(user_id)
+        await _ensure_partitions_async(db, (row[2] for row in rows))
+        await db.execute_copy(COPY_EXPENSES_SQL, rows)
+        record_write(user_id)
+        result_cache.invalidate(user_id, (row[2] for row in rows))
+    
+    async def delete_expenses(self, user_id: str) -> int:
+        db = await get_async_db(user_id)
+        deleted = await db.execute_update(
+            "DELETE FROM expenses WHERE user_id = %s", (user_id,)
+        )
+        record_write(user_id)
+        result_cache.invalidate_ranges(user_id, [(date.min, date.max)])
+        return deleted
+    
+    async def list_expenses(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        db = await get_async_read_db(user_id)
+        
+        return await db.execute_query(
+            LIST_EXPENSES, (user_id, start_date, end_date)
+        )
+    
+    async def iter_expenses(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        json_ready: bool
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        db = await get_async_read_db(user_id)
+        query = LIST_EXPENSES_JSON_SQL if json_ready else LIST_EXPENSES_SQL
+        
+        async for chunk in db.stream_query(query, (user_id, start_date, end_date)):
+            yield chunk
+    
+    async def list_expenses_page(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[Tuple[date, datetime, UUID]],
+        json_ready: bool
+    ) -> List[Dict[str, Any]]:
+        query, params = _page_query(
+            user_id, start_date, end_date, limit, after, json_ready
+        )
+        db = await get_async_read_db(user_id)
+        
+        return await db.execute_query(query, params)
+    
+    async def summarize_by_category(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        key = CacheKey("summarize_by_category", user_id, start_date, end_date)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        generation = result_cache.generation(user_id)
+        db = await get_async_read_db(user_id)
+        rows = await db.execute_query(
+            SUMMARIZE_BY_CATEGORY, _range_params(user_id, start_date, end_date)
+        )
+        
+        return result_cache.put(key, rows, generation)
+    
+    async def get_period_reports(
+        self,
+        user_id: str,
+        ranges: List[Tuple[date, date]]
+    ) -> List[Dict[str, Any]]:
+        keys = [
+            CacheKey("get_period_report", user_id, start_date, end_date)
+            for start_date, end_date in ranges
+        ]
+        reports = [result_cache.get(key) for key in keys]
+        missing = [i for i, report in enumerate(reports) if report is None]
+        if not missing:
+            return reports
+        
+        generation = result_cache.generation(user_id)
+        db = await get_async_read_db(user_id)
+        queries = [(PERIOD_REPORT, _range_params(user_id, *ranges[i])) for i in missing]
+        if len(queries) == 1:
+            results = [await db.execute_query(*queries[0])]
+        else:
+            results = await db.execute_pipeline(queries)
+        for i, rows in zip(missing, results):
+            reports[i] = result_cache.put(
+                keys[i], _period_report_from_rows(rows), generation
+            )
+        
+        return reports
+    
+    async def spending_trend(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str
+    ) -> List[Dict[str, Any]]:
+        key = CacheKey(f"spending_trend_{bucket}", user_id, start_date, end_date)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        generation = result_cache.generation(user_id)
+        db = await get_async_read_db(user_id)
+        rows = await db.execute_query(*_trend_query(user_id, start_date, end_date, bucket))
+        
+        return result_cache.put(key, rows, generation)
+
+
+def _stores_from_env() -> Tuple[ExpenseStore, AsyncExpenseStore]:
+    """The sync and async stores selected by STORAGE_BACKEND."""
+    if storage_backend() == "sqlite":
+        sqlite = SQLiteStore(sqlite_path())
+        return sqlite, AsyncSQLiteStore(sqlite)
+    return PostgresStore(), AsyncPostgresStore()
+
+
+store, async_store = _stores_from_env()
 
 
 class ExpenseModel:
     """
     Data access layer for expense operations.
     All methods enforce user_id isolation.
+    
+    Arguments are validated here; storage is delegated to `store`.
     """
     
     @staticmethod
+    @timed_query("add_expense")
     def add_expense(
         user_id: str,
         expense_date: date,
-        amount: Decimal,
+        amount_paise: int,
         category: str,
         merchant: Optional[str] = None,
         note: Optional[str] = None
@@ -31,43 +721,51 @@ class ExpenseModel:
         Args:
             user_id: User identifier (mandatory)
             expense_date: Date of expense
-            amount: Expense amount in INR (Indian Rupees). 
-                    Always pass the numeric value assuming INR.
-                    Do NOT convert currencies.
+            amount_paise: Expense amount in paise (1/100 INR), see
+                          storage.to_paise. Do NOT convert currencies.
             category: Expense category
             merchant: Optional merchant name
             note: Optional note
-            
+        
         Returns:
             Created expense record with id
-            
+        
         Raises:
-            ValueError: If amount <= 0 or user_id is empty
+            ValueError: If amount_paise <= 0 or user_id is empty
         """
-        db = get_db()
-        if not user_id or not user_id.strip():
-            raise ValueError("user_id is required and cannot be empty")
+        _validate_user_id(user_id)
+        _validate_amount(amount_paise)
         
-        if amount <= 0:
-            raise ValueError(f"amount must be positive, got {amount}")
-        
-        query = """
-            INSERT INTO expenses (user_id, date, amount, category, merchant, note)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id, user_id, date, amount, category, merchant, note, created_at
+        return store.add_expense(user_id, expense_date, amount_paise, category, merchant, note)
+    
+    @staticmethod
+    @timed_query("add_expenses")
+    def add_expenses(
+        user_id: str,
+        expenses: List[Dict[str, Any]]
+    ) -> List[UUID]:
         """
+        Insert a batch of expenses in a single transaction (COPY on Postgres).
         
-        result = db.execute_insert_returning(
-            query,
-            (user_id, expense_date, amount, category, merchant, note)
-        )
+        Args:
+            user_id: User identifier (mandatory)
+            expenses: List of dicts with expense_date, amount_paise, category
+                      and optional merchant, note (same meaning as
+                      add_expense arguments)
         
-        if not result:
-            raise RuntimeError("Failed to insert expense")
+        Returns:
+            Generated expense ids, in input order
         
-        return result
+        Raises:
+            ValueError: If any amount_paise <= 0 or user_id is empty
+        """
+        ids, rows = _copy_rows(user_id, expenses)
+        store.add_expenses(user_id, rows)
+        
+        return ids
     
     @staticmethod
+    @timed_query("list_expenses")
     def list_expenses(
         user_id: str,
         start_date: date,
@@ -80,25 +778,78 @@ class ExpenseModel:
             user_id: User identifier
             start_date: Range start (inclusive)
             end_date: Range end (inclusive)
-            
+        
         Returns:
             List of expense records ordered by date ASC
         """
-        db = get_db()
-        if not user_id or not user_id.strip():
-            raise ValueError("user_id is required and cannot be empty")
+        _validate_user_id(user_id)
+        
+        return store.list_expenses(user_id, start_date, end_date)
+    
+    @staticmethod
+    @timed_query("iter_expenses")
+    def iter_expenses(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        json_ready: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream a user's expenses within a date range in chunks.
         
-        query = """
-            SELECT id, user_id, date, amount, category, merchant, note, created_at
-            FROM expenses
-            WHERE user_id = %s
-              AND date BETWEEN %s AND %s
-            ORDER BY date ASC, created_at ASC
+        Same rows and order as list_expenses, read through a server-side
+        cursor so only one chunk is in memory at a time.
+        
+        Args:
+            user_id: User identifier
+            start_date: Range start (inclusive)
+            end_date: Range end (inclusive)
+            json_ready: Return JSON-serializable values rendered by
+                        the database (str id/date/created_at, float
+                        rupee `amount` instead of amount_paise)
+        
+        Yields:
+            Lists of expense records ordered by date ASC
         """
+        _validate_user_id(user_id)
         
-        return db.execute_query(query, (user_id, start_date, end_date))
+        yield from store.iter_expenses(user_id, start_date, end_date, json_ready)
     
     @staticmethod
+    @timed_query("list_expenses_page")
+    def list_expenses_page(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[Tuple[date, datetime, UUID]] = None,
+        json_ready: bool = False
+    ) -> Dict[str, Any]:
+        """
+        List one page of a user's expenses using keyset pagination.
+        
+        Args:
+            user_id: User identifier
+            start_date: Range start (inclusive)
+            end_date: Range end (inclusive)
+            limit: Maximum rows in the page
+            after: (date, created_at, id) of the last row of the previous
+                   page, or None for the first page
+            json_ready: Return JSON-serializable values (see iter_expenses)
+        
+        Returns:
+            {"expenses": rows ordered by date, created_at, id,
+             "next_key": key to pass as `after`, or None on the last page}
+        """
+        _validate_page_limit(user_id, limit)
+        rows = store.list_expenses_page(
+            user_id, start_date, end_date, limit + 1, after, json_ready
+        )
+        
+        return _page_from_rows(rows, limit)
+    
+    @staticmethod
+    @timed_query("summarize_by_category")
     def summarize_by_category(
         user_id: str,
         start_date: date,
@@ -111,28 +862,63 @@ class ExpenseModel:
             user_id: User identifier
             start_date: Range start (inclusive)
             end_date: Range end (inclusive)
-            
+        
         Returns:
-            List of {category, total} dicts ordered by total DESC
+            List of {category, total_paise} dicts ordered by total DESC
         """
-        if not user_id or not user_id.strip():
-            raise ValueError("user_id is required and cannot be empty")
+        _validate_user_id(user_id)
         
-        query = """
-            SELECT 
-                category,
-                SUM(amount) as total
-            FROM expenses
-            WHERE user_id = %s
-              AND date BETWEEN %s AND %s
-            GROUP BY category
-            ORDER BY total DESC
+        return store.summarize_by_category(user_id, start_date, end_date)
+    
+    @staticmethod
+    @timed_query("get_period_report")
+    def get_period_report(
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Any]:
         """
-        db = get_db()
+        Get grand total, count and category breakdown in one statement.
         
-        return db.execute_query(query, (user_id, start_date, end_date))
+        Args:
+            user_id: User identifier
+            start_date: Range start (inclusive)
+            end_date: Range end (inclusive)
+        
+        Returns:
+            Dictionary with total_paise, expense_count and category_breakdown
+            (list of {category, total_paise, expense_count} ordered by
+            total DESC)
+        """
+        reports = ExpenseModel.get_period_reports(user_id, [(start_date, end_date)])
+        return reports[0]
     
     @staticmethod
+    @timed_query("get_period_reports")
+    def get_period_reports(
+        user_id: str,
+        ranges: List[Tuple[date, date]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Period reports for several date ranges in one network flight.
+        
+        On Postgres, cached ranges come from the result cache; the rest run
+        as independent statements pipelined on one connection, so N ranges
+        cost about one round trip (one range runs as a plain query).
+        
+        Args:
+            user_id: User identifier
+            ranges: (start_date, end_date) pairs, both inclusive
+        
+        Returns:
+            One get_period_report result per range, in order
+        """
+        _validate_user_id(user_id)
+        
+        return store.get_period_reports(user_id, ranges)
+    
+    @staticmethod
+    @timed_query("get_monthly_summary")
     def get_monthly_summary(
         user_id: str,
         year: int,
@@ -145,42 +931,187 @@ class ExpenseModel:
             user_id: User identifier
             year: Year (e.g., 2025)
             month: Month (1-12)
-            
+        
         Returns:
-            Dictionary with total_spending and category_breakdown
-        """
-        if not user_id or not user_id.strip():
-            raise ValueError("user_id is required and cannot be empty")
-        
-        # Calculate month boundaries
-        from calendar import monthrange
-        last_day = monthrange(year, month)[1]
-        start_date = date(year, month, 1)
-        end_date = date(year, month, last_day)
-        
-        # Get total spending
-        total_query = """
-            SELECT COALESCE(SUM(amount), 0) as total
-            FROM expenses
-            WHERE user_id = %s
-              AND date BETWEEN %s AND %s
-        """
-        db = get_db()
-        total_result = db.execute_query(total_query, (user_id, start_date, end_date))
-        total_spending = float(total_result[0]['total']) if total_result else 0.0
-        
-        # Get category breakdown
-        category_breakdown = ExpenseModel.summarize_by_category(
+            Dictionary with total_paise, expense_count and category_breakdown
+        """
+        _validate_user_id(user_id)
+        start_date, end_date = _month_bounds(year, month)
+        report = ExpenseModel.get_period_report(user_id, start_date, end_date)
+        
+        return _monthly_summary(user_id, year, month, report)
+    
+    @staticmethod
+    @timed_query("spending_trend")
+    def spending_trend(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str = "month"
+    ) -> List[Dict[str, Any]]:
+        """
+        Spending per day, week, month or year in one grouped query.
+        
+        Args:
+            user_id: User identifier
+            start_date: Range start (inclusive)
+            end_date: Range end (inclusive)
+            bucket: One of TREND_BUCKETS (weeks start on Monday)
+        
+        Returns:
+            List of {period, total_paise, expense_count} dicts ordered by
+            period (first day of the bucket); buckets without expenses
+            are omitted
+        
+        Raises:
+            ValueError: If user_id is empty or bucket is unknown
+        """
+        _validate_user_id(user_id)
+        _validate_bucket(bucket)
+        
+        return store.spending_trend(user_id, start_date, end_date, bucket)
+
+
+class AsyncExpenseModel:
+    """
+    asyncio variant of ExpenseModel on `async_store`.
+    Same validation, same return shapes.
+    """
+    
+    @staticmethod
+    @timed_query("add_expense")
+    async def add_expense(
+        user_id: str,
+        expense_date: date,
+        amount_paise: int,
+        category: str,
+        merchant: Optional[str] = None,
+        note: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of ExpenseModel.add_expense."""
+        _validate_user_id(user_id)
+        _validate_amount(amount_paise)
+        
+        return await async_store.add_expense(
+            user_id, expense_date, amount_paise, category, merchant, note
+        )
+    
+    @staticmethod
+    @timed_query("add_expenses")
+    async def add_expenses(
+        user_id: str,
+        expenses: List[Dict[str, Any]]
+    ) -> List[UUID]:
+        """Async variant of ExpenseModel.add_expenses."""
+        ids, rows = _copy_rows(user_id, expenses)
+        await async_store.add_expenses(user_id, rows)
+        
+        return ids
+    
+    @staticmethod
+    @timed_query("list_expenses")
+    async def list_expenses(
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        """Async variant of ExpenseModel.list_expenses."""
+        _validate_user_id(user_id)
+        
+        return await async_store.list_expenses(user_id, start_date, end_date)
+    
+    @staticmethod
+    @timed_query("iter_expenses")
+    async def iter_expenses(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        json_ready: bool = False
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Async variant of ExpenseModel.iter_expenses."""
+        _validate_user_id(user_id)
+        
+        async for chunk in async_store.iter_expenses(user_id, start_date, end_date, json_ready):
+            yield chunk
+    
+    @staticmethod
+    @timed_query("list_expenses_page")
+    async def list_expenses_page(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[Tuple[date, datetime, UUID]] = None,
+        json_ready: bool = False
+    ) -> Dict[str, Any]:
+        """Async variant of ExpenseModel.list_expenses_page."""
+        _validate_page_limit(user_id, limit)
+        rows = await async_store.list_expenses_page(
+            user_id, start_date, end_date, limit + 1, after, json_ready
+        )
+        
+        return _page_from_rows(rows, limit)
+    
+    @staticmethod
+    @timed_query("summarize_by_category")
+    async def summarize_by_category(
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        """Async variant of ExpenseModel.summarize_by_category."""
+        _validate_user_id(user_id)
+        
+        return await async_store.summarize_by_category(user_id, start_date, end_date)
+    
+    @staticmethod
+    @timed_query("get_period_report")
+    async def get_period_report(
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Any]:
+        """Async variant of ExpenseModel.get_period_report."""
+        reports = await AsyncExpenseModel.get_period_reports(user_id, [(start_date, end_date)])
+        return reports[0]
+    
+    @staticmethod
+    @timed_query("get_period_reports")
+    async def get_period_reports(
+        user_id: str,
+        ranges: List[Tuple[date, date]]
+    ) -> List[Dict[str, Any]]:
+        """Async variant of ExpenseModel.get_period_reports."""
+        _validate_user_id(user_id)
+        
+        return await async_store.get_period_reports(user_id, ranges)
+    
+    @staticmethod
+    @timed_query("get_monthly_summary")
+    async def get_monthly_summary(
+        user_id: str,
+        year: int,
+        month: int
+    ) -> Dict[str, Any]:
+        """Async variant of ExpenseModel.get_monthly_summary."""
+        _validate_user_id(user_id)
+        start_date, end_date = _month_bounds(year, month)
+        report = await AsyncExpenseModel.get_period_report(
             user_id, start_date, end_date
         )
         
-        return {
-            "user_id": user_id,
-            "year": year,
-            "month": month,
-            "total_spending": total_spending,
-            "category_breakdown": category_breakdown,
-            "expense_count": len(
-                ExpenseModel.list_expenses(user_id, start_date, end_date)
-            )
-        }
+        return _monthly_summary(user_id, year, month, report)
+    
+    @staticmethod
+    @timed_query("spending_trend")
+    async def spending_trend(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str = "month"
+    ) -> List[Dict[str, Any]]:
+        """Async variant of ExpenseModel.spending_trend."""
+        _validate_user_id(user_id)
+        _validate_bucket(bucket)
+        
+        return await async_store.spending_trend(user_id, start_date, end_date, bucket)
@@ -0,0 +1,154 @@
+"""
+Move users' expenses to the shard the hash ring assigns them.
+
+After DATABASE_SHARD_URLS changes (a shard added or removed), about 1/N
+of the users hash to a different shard. New writes already go to the new
+owner; this tool moves their existing rows there.
+
+Each move deletes the user's rows on the source with
+COPY (DELETE ... RETURNING) and streams them into the target, which
+commits first. A crash between the two commits leaves the rows on both
+shards; re-running skips the copies already present (ON CONFLICT DO
+NOTHING), so a move is safe to retry. The rollup and cache-invalidation
+triggers on both shards fire as for any other write.
+
+Usage (CLI):
+    python rebalance.py --plan                  # list misplaced users
+    python rebalance.py --all                   # move all of them
+    python rebalance.py --user-id user_123      # move one user
+"""
+
+import argparse
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+from db import get_shard_db, shard_ring
+from models import ENSURE_PARTITIONS_SQL
+
+EXPENSE_COPY_COLUMNS = "id, user_id, date, amount_paise, category, merchant, note, created_at"
+
+
+def _require_ring():
+    ring = shard_ring()
+    if ring is None:
+        raise ValueError("DATABASE_SHARD_URLS is not set; there is nothing to rebalance")
+    return ring
+
+
+def find_user(user_id: str) -> List[str]:
+    """Names of the shards holding rows of `user_id`."""
+    ring = _require_ring()
+    return [
+        name for name in ring.names
+        if get_shard_db(name).execute_query(
+            "SELECT 1 FROM expenses WHERE user_id = %s LIMIT 1", (user_id,)
+        )
+    ]
+
+
+def misplaced_users() -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield (user_id, source shard, target shard) for every user with rows
+    outside their ring owner. Reads the small rollup table, not expenses.
+    """
+    ring = _require_ring()
+    for source in ring.names:
+        for chunk in get_shard_db(source).stream_query(
+            "SELECT DISTINCT user_id FROM expense_monthly_rollup"
+        ):
+            for row in chunk:
+                target = ring.shard_for(row["user_id"])
+                if target != source:
+                    yield row["user_id"], source, target
+
+
+def move_user(user_id: str, source: str, target: str) -> int:
+    """
+    Move every row of `user_id` from shard `source` to shard `target`.
+
+    Returns:
+        Number of rows inserted on the target
+    """
+    if source == target:
+        return 0
+
+    with get_shard_db(source).connection() as src:
+        months = [
+            row["month"] for row in src.execute(
+                "SELECT DISTINCT date_trunc('month', date)::date AS month "
+                "FROM expenses WHERE user_id = %s",
+                (user_id,)
+            )
+        ]
+        if not months:
+            return 0
+
+        with get_shard_db(target).connection() as dst:
+            dst.execute(ENSURE_PARTITIONS_SQL, (months,))
+            dst.execute(
+                "CREATE TEMP TABLE moving_expenses "
+                "(LIKE expenses INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            with src.cursor().copy(
+                f"COPY (DELETE FROM expenses WHERE user_id = %s "
+                f"RETURNING {EXPENSE_COPY_COLUMNS}) TO STDOUT (FORMAT BINARY)",
+                (user_id,)
+            ) as rows_out, dst.cursor().copy(
+                f"COPY moving_expenses ({EXPENSE_COPY_COLUMNS}) FROM STDIN (FORMAT BINARY)"
+            ) as rows_in:
+                for data in rows_out:
+                    rows_in.write(data)
+
+            inserted = dst.execute(
+                f"INSERT INTO expenses ({EXPENSE_COPY_COLUMNS}) "
+                f"SELECT {EXPENSE_COPY_COLUMNS} FROM moving_expenses "
+                "ON CONFLICT (id, date) DO NOTHING"
+            ).rowcount
+        # Target committed on leaving its block; the source delete commits here
+
+    return inserted
+
+
+def rebalance_user(user_id: str) -> int:
+    """Move `user_id` from every other shard to its ring owner."""
+    target = _require_ring().shard_for(user_id)
+    return sum(
+        move_user(user_id, source, target)
+        for source in find_user(user_id)
+        if source != target
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Move users' expenses to their shard after a shard change."
+    )
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--plan", action="store_true", help="List misplaced users")
+    action.add_argument("--all", action="store_true", help="Move all misplaced users")
+    action.add_argument("--user-id", help="Move one user")
+    args = parser.parse_args(argv)
+
+    if args.user_id:
+        moved = rebalance_user(args.user_id)
+        print(f"Moved {moved:,} expenses of {args.user_id}")
+        return
+
+    total = users = 0
+    for user_id, source, target in list(misplaced_users()):
+        if args.plan:
+            print(f"{user_id}\t{source} -> {target}")
+        else:
+            moved = move_user(user_id, source, target)
+            print(f"{user_id}\t{source} -> {target}\t{moved:,} expenses", file=sys.stderr)
+            total += moved
+        users += 1
+
+    if args.plan:
+        print(f"{users:,} users to move", file=sys.stderr)
+    else:
+        print(f"Moved {total:,} expenses of {users:,} users")
+
+
+if __name__ == "__main__":
+    main()
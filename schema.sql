@@ -1,21 +1,215 @@
 -- Expense Management MCP Server - PostgreSQL Schema
 -- Multi-user expense tracking with strict data isolation
 
+-- Range-partitioned by month on date: every query filters on date, so
+-- the planner prunes to the months in range, and indexes and vacuum stay
+-- per-partition. The partition key must be part of the primary key.
+-- Amounts are integer paise: 8-byte fixed-width values that sum exactly
+-- and faster than NUMERIC; the MCP tools convert to rupees at the edge.
 CREATE TABLE expenses (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     user_id TEXT NOT NULL,
     date DATE NOT NULL,
-    amount NUMERIC(10,2) NOT NULL CHECK (amount > 0),
+    amount_paise BIGINT NOT NULL CHECK (amount_paise > 0),  -- 1/100 INR
     category TEXT NOT NULL,
     merchant TEXT,
     note TEXT,
-    created_at TIMESTAMPTZ DEFAULT now()
-);
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+-- Rows for a month without its own partition land here instead of being
+-- rejected, e.g. inserts from other tools, or a server whose list of
+-- ensured months is stale. ensure_expense_partitions moves them out.
+CREATE TABLE expenses_default PARTITION OF expenses DEFAULT;
+
+-- Create the monthly partitions (expenses_YYYY_MM) for the given dates if
+-- they do not exist, moving any rows of those months out of
+-- expenses_default. ExpenseModel calls this before writing to a month it
+-- has not seen yet.
+CREATE FUNCTION ensure_expense_partitions(months DATE[]) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    partition_name TEXT;
+BEGIN
+    FOREACH month_start IN ARRAY months LOOP
+        month_start := date_trunc('month', month_start)::date;
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := format('expenses_%s', to_char(month_start, 'YYYY_MM'));
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        BEGIN
+            -- Creating a partition scans the default partition anyway;
+            -- locking it first keeps rows from landing there meanwhile
+            LOCK TABLE expenses_default IN SHARE ROW EXCLUSIVE MODE;
+            IF EXISTS (
+                SELECT 1 FROM expenses_default WHERE date >= month_start AND date < month_end
+            ) THEN
+                -- Move the month's rows out of the default partition. This
+                -- bypasses the triggers on expenses: the rows only change
+                -- partition, so the rollup and caches stay valid.
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE expenses INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                    partition_name
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM expenses_default'
+                    ' WHERE date >= %L AND date < %L RETURNING *)'
+                    ' INSERT INTO %I SELECT * FROM moved',
+                    month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE expenses ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF expenses FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            END IF;
+        EXCEPTION WHEN duplicate_table OR unique_violation THEN
+            NULL;  -- created concurrently by another session
+        END;
+    END LOOP;
+END
+$$;
 
--- Index for efficient user-specific date range queries
+-- Index for user-specific date range queries. INCLUDE makes it covering
+-- for the summarize/report aggregates (index-only scans, no heap fetches)
 CREATE INDEX idx_expenses_user_date
-ON expenses(user_id, date);
+ON expenses(user_id, date) INCLUDE (amount_paise, category);
+
+-- Index for keyset-paginated listing (ORDER BY date, created_at, id)
+CREATE INDEX idx_expenses_user_date_created
+ON expenses(user_id, date, created_at, id);
 
 -- Optional: Index for category-based queries
 CREATE INDEX idx_expenses_user_category
 ON expenses(user_id, category);
+
+-- Incremental refresh of the analytics copy (analytics.py) reads rows by
+-- created_at; rows are appended in created_at order, so a BRIN index is
+-- enough and costs next to nothing on writes
+CREATE INDEX idx_expenses_created_at
+ON expenses USING brin (created_at);
+
+-- Per-user monthly category rollup, maintained by statement-level triggers
+-- on expenses so every write path (add_expense, COPY batches, imports,
+-- manual deletes) keeps it exact. Range summaries read whole months from
+-- here and only the partial edge months from raw rows.
+CREATE TABLE expense_monthly_rollup (
+    user_id TEXT NOT NULL,
+    month DATE NOT NULL,                -- first day of the month
+    category TEXT NOT NULL,
+    total_paise BIGINT NOT NULL,
+    expense_count BIGINT NOT NULL,
+    PRIMARY KEY (user_id, month, category)
+);
+
+CREATE FUNCTION expense_rollup_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE expense_monthly_rollup r
+        SET total_paise = r.total_paise - d.total_paise,
+            expense_count = r.expense_count - d.expense_count
+        FROM (
+            SELECT user_id, date_trunc('month', date)::date AS month, category,
+                   SUM(amount_paise) AS total_paise, COUNT(*) AS expense_count
+            FROM old_rows
+            GROUP BY 1, 2, 3
+        ) d
+        WHERE r.user_id = d.user_id AND r.month = d.month AND r.category = d.category;
+
+        DELETE FROM expense_monthly_rollup r
+        USING (SELECT DISTINCT user_id, date_trunc('month', date)::date AS month, category
+               FROM old_rows) d
+        WHERE r.user_id = d.user_id AND r.month = d.month AND r.category = d.category
+          AND r.expense_count <= 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO expense_monthly_rollup (user_id, month, category, total_paise, expense_count)
+        SELECT user_id, date_trunc('month', date)::date, category, SUM(amount_paise), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, month, category) DO UPDATE
+        SET total_paise = expense_monthly_rollup.total_paise + EXCLUDED.total_paise,
+            expense_count = expense_monthly_rollup.expense_count + EXCLUDED.expense_count;
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+-- Transition tables allow one event per trigger
+CREATE TRIGGER expenses_rollup_insert
+AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_rollup_update
+AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+CREATE TRIGGER expenses_rollup_delete
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_apply();
+
+-- NOTIFY expense_writes with {"user_id", "from", "to", "dates"} for every
+-- user touched by a write statement, so each server replica can drop its
+-- cached summaries (see cache.InvalidationListener). "dates" is omitted
+-- for writes spanning many days to stay under the payload limit.
+CREATE FUNCTION expense_notify_writes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    changed_rows TEXT;
+    change RECORD;
+BEGIN
+    changed_rows := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT user_id, date FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT user_id, date FROM old_rows'
+        ELSE 'SELECT user_id, date FROM new_rows UNION ALL SELECT user_id, date FROM old_rows'
+    END;
+
+    FOR change IN EXECUTE format($query$
+        SELECT
+            user_id,
+            MIN(date) AS first_date,
+            MAX(date) AS last_date,
+            CASE WHEN COUNT(DISTINCT date) <= 100
+                 THEN array_agg(DISTINCT date ORDER BY date) END AS dates
+        FROM (%s) changed
+        GROUP BY user_id
+    $query$, changed_rows)
+    LOOP
+        PERFORM pg_notify('expense_writes', json_strip_nulls(json_build_object(
+            'user_id', change.user_id,
+            'from', change.first_date,
+            'to', change.last_date,
+            'dates', change.dates
+        ))::text);
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER expenses_notify_insert
+AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+CREATE TRIGGER expenses_notify_update
+AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
+
+CREATE TRIGGER expenses_notify_delete
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION expense_notify_writes();
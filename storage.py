@@ -0,0 +1,559 @@
+"""
+Storage backends behind ExpenseModel / AsyncExpenseModel.
+
+ExpenseModel validates arguments and times every call, then delegates to
+an ExpenseStore; a store only writes and queries. Two implementations:
+
+    postgres  models.PostgresStore: the connection pools of db.py, with
+              read replicas, sharding, partitions, the monthly rollup
+              and the result cache (default)
+    sqlite    SQLiteStore below: one embedded WAL-mode SQLite file, for
+              single-tenant or edge deployments and for running the
+              tools without a Postgres server
+
+The SQLite store needs no network round trip, so it does not use the
+result cache, read routing or pipelining; its reads are index range scans
+answered in microseconds. One file serves any number of threads and
+processes on one host (WAL: readers never block the writer).
+
+Configuration (environment):
+    STORAGE_BACKEND   postgres | sqlite (default postgres)
+    SQLITE_PATH       database file of the sqlite backend
+                      (default expenses.sqlite3)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
+
+ExpenseKey = Tuple[date, datetime, UUID]
+
+STREAM_CHUNK_ROWS = 2000
+
+# Period sizes of spending_trend; periods start on the first day of the
+# bucket (weeks on Monday)
+TREND_BUCKETS = ("day", "week", "month", "year")
+
+
+def storage_backend() -> str:
+    kind = os.getenv("STORAGE_BACKEND", "postgres").strip().lower()
+    if kind not in ("postgres", "sqlite"):
+        raise ValueError(f"STORAGE_BACKEND must be postgres or sqlite, got '{kind}'")
+    return kind
+
+
+def sqlite_path() -> str:
+    return os.getenv("SQLITE_PATH") or "expenses.sqlite3"
+
+
+# Amounts are integer paise everywhere below the MCP tools: stored as
+# BIGINT / INTEGER, summed exactly, and converted to rupees only when a
+# tool reads its input or renders its output.
+
+def to_paise(amount: Union[Decimal, float, int, str]) -> int:
+    """
+    Rupees to integer paise, rounding half up to the nearest paisa.
+
+    Floats are read through their shortest repr, so 45.1 is 4510 paise
+    rather than the binary value just below it.
+
+    Raises:
+        ValueError: If amount is not a finite number
+    """
+    try:
+        value = Decimal(repr(amount) if isinstance(amount, float) else amount)
+    except (ArithmeticError, ValueError, TypeError):
+        raise ValueError(f"Invalid amount: {amount!r}")
+    if not value.is_finite():
+        raise ValueError(f"amount must be a finite number, got {amount}")
+    return int(value.scaleb(2).to_integral_value(ROUND_HALF_UP))
+
+
+def from_paise(paise: int) -> float:
+    """Paise to rupees for JSON output (the nearest float to the exact value)."""
+    return paise / 100
+
+
+def format_paise(paise: int) -> str:
+    """Paise as a fixed-point rupee string, e.g. 4510 -> "45.10"."""
+    sign = "-" if paise < 0 else ""
+    rupees, rest = divmod(abs(paise), 100)
+    return f"{sign}{rupees}.{rest:02d}"
+
+
+class ExpenseStore:
+    """
+    Storage for expenses. Arguments arrive validated by ExpenseModel.
+
+    Rows are dicts with id (UUID), user_id, date (date), amount_paise
+    (int), category, merchant, note and created_at (datetime). With
+    json_ready the values are JSON-serializable instead: str id, date and
+    created_at (ISO 8601), and `amount` as float rupees in place of
+    amount_paise.
+    """
+
+    name = "base"
+
+    def add_expense(
+        self,
+        user_id: str,
+        expense_date: date,
+        amount_paise: int,
+        category: str,
+        merchant: Optional[str],
+        note: Optional[str]
+    ) -> Dict[str, Any]:
+        """Insert one expense; returns the created row."""
+        raise NotImplementedError
+
+    def add_expenses(self, user_id: str, rows: List[tuple]) -> None:
+        """
+        Insert (id, user_id, date, amount_paise, category, merchant, note) rows
+        in one transaction.
+        """
+        raise NotImplementedError
+
+    def delete_expenses(self, user_id: str) -> int:
+        """Delete every expense of `user_id`; returns the count."""
+        raise NotImplementedError
+
+    def list_expenses(self, user_id: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Rows in [start_date, end_date] ordered by date, created_at, id."""
+        raise NotImplementedError
+
+    def iter_expenses(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        json_ready: bool
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """The rows of list_expenses in chunks."""
+        raise NotImplementedError
+
+    def list_expenses_page(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[ExpenseKey],
+        json_ready: bool
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` rows of list_expenses that sort after `after`."""
+        raise NotImplementedError
+
+    def summarize_by_category(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        """{category, total_paise} rows ordered by total DESC."""
+        raise NotImplementedError
+
+    def get_period_reports(
+        self,
+        user_id: str,
+        ranges: List[Tuple[date, date]]
+    ) -> List[Dict[str, Any]]:
+        """
+        One {total_paise, expense_count, category_breakdown} report per
+        range; the breakdown lists {category, total_paise, expense_count}
+        by total DESC.
+        """
+        raise NotImplementedError
+
+    def spending_trend(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str
+    ) -> List[Dict[str, Any]]:
+        """
+        {period, total_paise, expense_count} per TREND_BUCKETS bucket with
+        expenses, ordered by period (the bucket's first day).
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncExpenseStore:
+    """asyncio counterpart of ExpenseStore: same methods, awaitable."""
+
+    name = "base"
+
+    async def add_expense(self, user_id: str, expense_date: date, amount_paise: int,
+                          category: str, merchant: Optional[str],
+                          note: Optional[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def add_expenses(self, user_id: str, rows: List[tuple]) -> None:
+        raise NotImplementedError
+
+    async def delete_expenses(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    async def list_expenses(self, user_id: str, start_date: date,
+                            end_date: date) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_expenses(self, user_id: str, start_date: date, end_date: date,
+                      json_ready: bool) -> AsyncIterator[List[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    async def list_expenses_page(self, user_id: str, start_date: date, end_date: date,
+                                 limit: int, after: Optional[ExpenseKey],
+                                 json_ready: bool) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def summarize_by_category(self, user_id: str, start_date: date,
+                                    end_date: date) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def get_period_reports(self, user_id: str,
+                                 ranges: List[Tuple[date, date]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def spending_trend(self, user_id: str, start_date: date, end_date: date,
+                             bucket: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+# Amounts are integer paise, as on Postgres. The primary key is the list
+# order (WITHOUT ROWID keeps the table clustered on it) and the second
+# index covers the aggregates.
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS expenses (
+        user_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        id TEXT NOT NULL,
+        amount_paise INTEGER NOT NULL CHECK (amount_paise > 0),
+        category TEXT NOT NULL,
+        merchant TEXT,
+        note TEXT,
+        PRIMARY KEY (user_id, date, created_at, id)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_expenses_user_date
+    ON expenses (user_id, date, category, amount_paise);
+"""
+
+SQLITE_COLUMNS = "id, user_id, date, amount_paise, category, merchant, note, created_at"
+
+# First day of each spending_trend bucket, from the ISO date text
+# ('weekday 0' moves to the next Sunday unless already there)
+SQLITE_TREND_PERIODS = {
+    "day": "date",
+    "week": "date(date, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', date)",
+    "year": "strftime('%Y-01-01', date)",
+}
+
+
+def _timestamp(value: datetime) -> str:
+    # Fixed-width UTC text sorts like the timestamp it encodes
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _sqlite_row(row: tuple, json_ready: bool) -> Dict[str, Any]:
+    expense_id, user_id, expense_date, paise, category, merchant, note, created_at = row
+    created = datetime.fromisoformat(created_at)
+    if json_ready:
+        return {
+            "id": expense_id,
+            "user_id": user_id,
+            "date": expense_date,
+            "amount": from_paise(paise),
+            "category": category,
+            "merchant": merchant,
+            "note": note,
+            "created_at": created.isoformat(),
+        }
+    return {
+        "id": UUID(expense_id),
+        "user_id": user_id,
+        "date": date.fromisoformat(expense_date),
+        "amount_paise": paise,
+        "category": category,
+        "merchant": merchant,
+        "note": note,
+        "created_at": created,
+    }
+
+
+class SQLiteStore(ExpenseStore):
+    """
+    Expenses in an embedded WAL-mode SQLite file. Each thread gets its own
+    connection, so concurrent readers do not serialize on a lock; writers
+    take the database lock with BEGIN IMMEDIATE.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._conn().executescript(SQLITE_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self, rows: List[tuple]) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT INTO expenses ({SQLITE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def add_expense(
+        self,
+        user_id: str,
+        expense_date: date,
+        amount_paise: int,
+        category: str,
+        merchant: Optional[str],
+        note: Optional[str]
+    ) -> Dict[str, Any]:
+        row = (
+            str(uuid4()), user_id, expense_date.isoformat(), amount_paise,
+            category, merchant, note, _timestamp(datetime.now(timezone.utc))
+        )
+        self._write([row])
+        return _sqlite_row(row, json_ready=False)
+
+    def add_expenses(self, user_id: str, rows: List[tuple]) -> None:
+        created_at = _timestamp(datetime.now(timezone.utc))
+        self._write([
+            (str(expense_id), user_id, expense_date.isoformat(), amount_paise,
+             category, merchant, note, created_at)
+            for expense_id, _, expense_date, amount_paise, category, merchant, note in rows
+        ])
+
+    def delete_expenses(self, user_id: str) -> int:
+        return self._conn().execute("DELETE FROM expenses WHERE user_id = ?", (user_id,)).rowcount
+
+    def _select(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        after: Optional[ExpenseKey] = None,
+        limit: Optional[int] = None
+    ) -> sqlite3.Cursor:
+        sql = f"SELECT {SQLITE_COLUMNS} FROM expenses WHERE user_id = ? AND date BETWEEN ? AND ?"
+        params: List[Any] = [user_id, start_date.isoformat(), end_date.isoformat()]
+        if after is not None:
+            sql += " AND (date, created_at, id) > (?, ?, ?)"
+            params += [after[0].isoformat(), _timestamp(after[1]), str(after[2])]
+        sql += " ORDER BY date, created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._conn().execute(sql, params)
+
+    def list_expenses(self, user_id: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        return [
+            _sqlite_row(row, json_ready=False)
+            for row in self._select(user_id, start_date, end_date)
+        ]
+
+    def iter_expenses(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        json_ready: bool
+    ) -> Iterator[List[Dict[str, Any]]]:
+        cursor = self._select(user_id, start_date, end_date)
+        try:
+            while True:
+                rows = cursor.fetchmany(STREAM_CHUNK_ROWS)
+                if not rows:
+                    return
+                yield [_sqlite_row(row, json_ready) for row in rows]
+        finally:
+            cursor.close()
+
+    def list_expenses_page(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[ExpenseKey],
+        json_ready: bool
+    ) -> List[Dict[str, Any]]:
+        return [
+            _sqlite_row(row, json_ready)
+            for row in self._select(user_id, start_date, end_date, after, limit)
+        ]
+
+    def _category_totals(self, user_id: str, start_date: date, end_date: date) -> List[tuple]:
+        return self._conn().execute(
+            """
+            SELECT category, SUM(amount_paise) AS total, COUNT(*) AS expense_count
+            FROM expenses
+            WHERE user_id = ? AND date BETWEEN ? AND ?
+            GROUP BY category
+            ORDER BY total DESC
+            """,
+            (user_id, start_date.isoformat(), end_date.isoformat())
+        ).fetchall()
+
+    def summarize_by_category(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict[str, Any]]:
+        return [
+            {"category": category, "total_paise": total}
+            for category, total, _ in self._category_totals(user_id, start_date, end_date)
+        ]
+
+    def get_period_reports(
+        self,
+        user_id: str,
+        ranges: List[Tuple[date, date]]
+    ) -> List[Dict[str, Any]]:
+        reports = []
+        for start_date, end_date in ranges:
+            rows = self._category_totals(user_id, start_date, end_date)
+            reports.append({
+                "total_paise": sum(total for _, total, _ in rows),
+                "expense_count": sum(count for _, _, count in rows),
+                "category_breakdown": [
+                    {"category": category, "total_paise": total, "expense_count": count}
+                    for category, total, count in rows
+                ],
+            })
+        return reports
+
+    def spending_trend(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: str
+    ) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            f"""
+            SELECT {SQLITE_TREND_PERIODS[bucket]} AS period,
+                   SUM(amount_paise) AS total, COUNT(*) AS expense_count
+            FROM expenses
+            WHERE user_id = ? AND date BETWEEN ? AND ?
+            GROUP BY period
+            ORDER BY period
+            """,
+            (user_id, start_date.isoformat(), end_date.isoformat())
+        ).fetchall()
+        return [
+            {"period": date.fromisoformat(period), "total_paise": total, "expense_count": count}
+            for period, total, count in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            while self._connections:
+                self._connections.pop().close()
+        self._local = threading.local()
+
+
+class AsyncSQLiteStore(AsyncExpenseStore):
+    """
+    SQLiteStore for the asyncio tools. Every call runs in a worker thread
+    (asyncio.to_thread): a write can wait up to the 5 s busy timeout for
+    the database lock, and that must not stall the other tools' calls.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, store: SQLiteStore):
+        self.store = store
+
+    async def add_expense(self, user_id: str, expense_date: date, amount_paise: int,
+                          category: str, merchant: Optional[str],
+                          note: Optional[str]) -> Dict[str, Any]:
+        return await asyncio.to_thread(
+            self.store.add_expense, user_id, expense_date, amount_paise, category, merchant, note
+        )
+
+    async def add_expenses(self, user_id: str, rows: List[tuple]) -> None:
+        await asyncio.to_thread(self.store.add_expenses, user_id, rows)
+
+    async def delete_expenses(self, user_id: str) -> int:
+        return await asyncio.to_thread(self.store.delete_expenses, user_id)
+
+    async def list_expenses(self, user_id: str, start_date: date,
+                            end_date: date) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.list_expenses, user_id, start_date, end_date)
+
+    async def iter_expenses(self, user_id: str, start_date: date, end_date: date,
+                            json_ready: bool) -> AsyncIterator[List[Dict[str, Any]]]:
+        chunks = self.store.iter_expenses(user_id, start_date, end_date, json_ready)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
+
+    async def list_expenses_page(self, user_id: str, start_date: date, end_date: date,
+                                 limit: int, after: Optional[ExpenseKey],
+                                 json_ready: bool) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.store.list_expenses_page,
+            user_id, start_date, end_date, limit, after, json_ready
+        )
+
+    async def summarize_by_category(self, user_id: str, start_date: date,
+                                    end_date: date) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.store.summarize_by_category, user_id, start_date, end_date
+        )
+
+    async def get_period_reports(self, user_id: str,
+                                 ranges: List[Tuple[date, date]]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get_period_reports, user_id, ranges)
+
+    async def spending_trend(self, user_id: str, start_date: date, end_date: date,
+                             bucket: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.store.spending_trend, user_id, start_date, end_date, bucket
+        )
+
+    async def close(self) -> None:
+        self.store.close()
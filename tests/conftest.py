@@ -0,0 +1,75 @@
+"""
+Shared fixtures. Tests that need Postgres run against the scratch database
+named by TEST_DATABASE_URL (schema.sql is applied when it is empty) and
+are skipped without it.
+"""
+
+import os
+from uuid import uuid4
+
+import pytest
+
+from storage import SQLiteStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+USER_PREFIX = "__test_"
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "expenses.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    # db.py reads its configuration when the first pool is created
+    os.environ["DATABASE_URL"] = url
+    for name in ("DATABASE_READ_URL", "DATABASE_SHARD_URLS"):
+        os.environ.pop(name, None)
+
+    import psycopg
+    with psycopg.connect(url, autocommit=True) as conn:
+        if conn.execute("SELECT to_regclass('expenses')").fetchone()[0] is None:
+            with open(os.path.join(ROOT, "schema.sql")) as f:
+                conn.execute(f.read())
+    return url
+
+
+@pytest.fixture
+def postgres_store(postgres_url):
+    from db import get_db
+    from models import PostgresStore
+    yield PostgresStore()
+    get_db().execute_update(
+        "DELETE FROM expenses WHERE starts_with(user_id, %s)", (USER_PREFIX,)
+    )
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def expense_store(request):
+    return request.getfixturevalue(f"{request.param}_store")
+
+
+@pytest.fixture
+def model_store(expense_store, monkeypatch):
+    """Point ExpenseModel / AsyncExpenseModel (and so the tools) at expense_store."""
+    import models
+    from storage import AsyncSQLiteStore, SQLiteStore
+    if isinstance(expense_store, SQLiteStore):
+        async_store = AsyncSQLiteStore(expense_store)
+    else:
+        async_store = models.AsyncPostgresStore()
+    monkeypatch.setattr(models, "store", expense_store)
+    monkeypatch.setattr(models, "async_store", async_store)
+    return expense_store
+
+
+@pytest.fixture
+def user_id():
+    return f"{USER_PREFIX}{uuid4().hex[:12]}"
@@ -0,0 +1,131 @@
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from analytics import AnalyticsCopy
+
+ROWS = [
+    "00000000-0000-4000-8000-000000000001,u1,2024-01-05,12550,Food,Swiggy,2024-01-05 10:00:00.000000",
+    "00000000-0000-4000-8000-000000000002,u1,2024-02-10,900,Transport,,2024-02-10 09:30:00.000000",
+    "00000000-0000-4000-8000-000000000003,u2,2024-01-07,4000,Food,Zomato,2024-02-10 09:28:00.000000",
+]
+
+
+@pytest.fixture
+def copy(tmp_path, monkeypatch):
+    copy = AnalyticsCopy(str(tmp_path), max_age=0, overlap=300)
+    pulls = []
+
+    def pull(db, since, csv_path):
+        # as EXPORT_SQL: the rows created after `since`
+        pulls.append(since)
+        with open(csv_path, "w") as f:
+            for line in copy.source_rows:
+                if datetime.fromisoformat(line.rsplit(",", 1)[1]) > since:
+                    f.write(line + "\n")
+
+    copy.source_rows = []
+    copy.pulls = pulls
+    monkeypatch.setattr(copy, "_sources", lambda: {"primary": None})
+    monkeypatch.setattr(copy, "_pull", pull)
+    yield copy
+    copy.close()
+
+
+def test_refresh_of_an_empty_source_adds_nothing(copy):
+    assert copy.refresh() == 0
+    assert copy.as_of() == {}
+    assert copy.category_trend("u1", date(2024, 1, 1), date(2024, 12, 31)) == {
+        "periods": [], "categories": {}, "totals": []
+    }
+
+
+def test_refresh_of_an_idle_source_keeps_the_copy(copy):
+    copy.source_rows = ROWS
+    assert copy.refresh() == 3
+    watermark = copy.as_of()["primary"]
+
+    copy.source_rows = []
+    assert copy.refresh() == 0
+    assert copy.as_of() == {"primary": watermark}
+    trend = copy.category_trend("u1", date(2024, 1, 1), date(2024, 12, 31), "year")
+    assert trend["categories"] == {"Food": [12550], "Transport": [900]}
+
+
+def test_overlap_rereads_are_not_copied_twice(copy):
+    copy.source_rows = ROWS[:2]
+    assert copy.refresh() == 2
+
+    # a row committed late, with created_at inside the overlap window
+    copy.source_rows = ROWS
+    assert copy.refresh() == 1
+    assert copy.refresh() == 0
+    trend = copy.category_trend("u1", date(2024, 1, 1), date(2024, 12, 31))
+    assert trend == {
+        "periods": [date(2024, 1, 1), date(2024, 2, 1)],
+        "categories": {"Food": [12550, 0], "Transport": [0, 900]},
+        "totals": [12550, 900],
+    }
+
+
+def test_queries_fail_fast_until_the_copy_is_built(copy):
+    copy.source_rows = ROWS
+    assert not copy.is_built()
+    with pytest.raises(ValueError, match="still being built"):
+        copy.refresh_if_stale()
+    # ... and the first query started the build
+    copy._refresh_thread.join()
+    assert copy.is_built()
+    assert copy.pulls == [datetime(1970, 1, 1)]
+
+
+def test_stale_copy_refreshes_in_the_background(copy):
+    copy.refresh()
+    copy.source_rows = ROWS
+    with copy._refresh_lock:
+        # another refresh is running: answer from the copy as it is
+        copy.refresh_if_stale()
+        assert not copy.refresh_in_background()
+    assert len(copy.pulls) == 1
+
+    copy.refresh_if_stale()
+    copy._refresh_thread.join()
+    assert len(copy.pulls) == 2
+    assert copy.category_trend("u2", date(2024, 1, 1), date(2024, 1, 31))["totals"] == [4000]
+
+    copy.max_age = 3600
+    copy.refresh_if_stale()
+    assert len(copy.pulls) == 2
+
+
+def test_background_refresh_errors_release_the_lock(copy, monkeypatch):
+    monkeypatch.setattr(copy, "_pull", lambda db, since, csv_path: 1 / 0)
+    assert copy.refresh_in_background()
+    copy._refresh_thread.join()
+    assert not copy.is_built()
+    assert copy._refresh_lock.acquire(blocking=False)
+
+
+def test_category_trend_tool(copy, monkeypatch):
+    import analytics
+    from tools import category_trend_tool
+    monkeypatch.setattr(analytics, "_analytics", copy)
+    copy.source_rows = ROWS
+    with pytest.raises(ValueError, match="still being built"):
+        category_trend_tool("u1", "2024-01-01", "2024-12-31")
+    copy._refresh_thread.join()
+
+    trend = category_trend_tool("u1", "2024-01-01", "2024-12-31", "quarter")
+    copy._refresh_thread.join()
+    assert trend == {
+        "user_id": "u1",
+        "bucket": "quarter",
+        "start_date": "2024-01-01",
+        "end_date": "2024-12-31",
+        "periods": ["2024-01-01"],
+        "categories": {"Food": [125.5], "Transport": [9.0]},
+        "totals": [134.5],
+        "as_of": {"primary": "2024-02-10T09:30:00"},
+    }
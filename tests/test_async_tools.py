@@ -0,0 +1,47 @@
+import asyncio
+
+import db
+from db import close_async_db
+from tools import (
+    add_expense_tool_async, add_expenses_tool_async, list_expenses_tool_async,
+    monthly_report_tool_async, summarize_expenses_tool_async
+)
+
+
+def test_each_event_loop_gets_its_own_pools():
+    async def pools_twice():
+        return db._loop_pools(), db._loop_pools()
+
+    first, again = asyncio.run(pools_twice())
+    assert first is again
+    second, _ = asyncio.run(pools_twice())
+    assert second is not first
+    # The first loop is closed, so its entry was dropped
+    assert first not in db._async_pools.values()
+
+
+def test_async_tools_work_across_event_loops(model_store, user_id):
+    async def session(day):
+        await add_expense_tool_async(user_id, f"2024-02-{day:02d}", 10.25, "Food")
+        await add_expenses_tool_async(user_id, [
+            {"date": f"2024-02-{day:02d}", "amount": 4.75, "category": "Travel"},
+        ])
+        listed = await list_expenses_tool_async(user_id, "2024-02-01", "2024-02-29")
+        summary = await summarize_expenses_tool_async(user_id, "2024-02-01", "2024-02-29")
+        report = await monthly_report_tool_async(user_id, "2024-02")
+        return len(listed), summary, report["total_spending"]
+
+    # A second asyncio.run() must not reuse pools or locks of the first loop,
+    # with or without close_async_db() in between
+    assert asyncio.run(session(1)) == (
+        2, [{"category": "Food", "total": 10.25}, {"category": "Travel", "total": 4.75}], 15.0
+    )
+    assert asyncio.run(session(2))[0] == 4
+
+    async def closing_session():
+        try:
+            return await session(3)
+        finally:
+            await close_async_db()
+
+    assert asyncio.run(closing_session())[2] == 45.0
@@ -0,0 +1,154 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from cache import (
+    CacheKey, InvalidationListener, MemoryBackend, ResultCache, SQLiteBackend,
+    decode_value, encode_value, parse_notification
+)
+
+JAN = CacheKey("get_period_report", "u1", date(2024, 1, 1), date(2024, 1, 31))
+FEB = CacheKey("get_period_report", "u1", date(2024, 2, 1), date(2024, 2, 29))
+Q1 = CacheKey("summarize_by_category", "u1", date(2024, 1, 1), date(2024, 3, 31))
+OTHER_USER = CacheKey("get_period_report", "u2", date(2024, 1, 1), date(2024, 1, 31))
+
+
+@pytest.fixture
+def memory_cache():
+    return ResultCache(MemoryBackend(max_entries=100, max_bytes=1 << 20), ttl=60)
+
+
+def _fill(cache, *keys):
+    for key in keys:
+        cache.put(key, {"key": key.method}, cache.generation(key.user_id))
+
+
+def test_values_round_trip():
+    value = [{"total": Decimal("45.10"), "day": date(2024, 1, 5),
+              "at": datetime(2024, 1, 5, 10, 0), "count": 3}]
+    assert decode_value(encode_value(value)) == value
+
+
+def test_put_then_get(memory_cache):
+    assert memory_cache.get(JAN) is None
+    _fill(memory_cache, JAN)
+    assert memory_cache.get(JAN) == {"key": "get_period_report"}
+    assert memory_cache.stats()["hits"] == 1
+
+
+def test_write_invalidates_overlapping_ranges_only(memory_cache):
+    _fill(memory_cache, JAN, FEB, Q1, OTHER_USER)
+    memory_cache.invalidate("u1", [date(2024, 2, 10)])
+    assert memory_cache.get(FEB) is None
+    assert memory_cache.get(Q1) is None
+    assert memory_cache.get(JAN) is not None
+    assert memory_cache.get(OTHER_USER) is not None
+
+
+def test_put_after_a_racing_write_is_dropped(memory_cache):
+    # a read takes its generation, a write lands, then the read finishes
+    generation = memory_cache.generation("u1")
+    memory_cache.invalidate("u1", [date(2024, 1, 5)])
+    memory_cache.put(JAN, {"stale": True}, generation)
+    assert memory_cache.get(JAN) is None
+
+    # other users are not affected by u1's write
+    memory_cache.put(OTHER_USER, {"fresh": True}, memory_cache.generation("u2"))
+    assert memory_cache.get(OTHER_USER) == {"fresh": True}
+
+
+def test_lru_eviction():
+    cache = ResultCache(MemoryBackend(max_entries=2, max_bytes=1 << 20), ttl=60)
+    _fill(cache, JAN, FEB)
+    cache.get(JAN)
+    _fill(cache, Q1)
+    assert cache.get(FEB) is None
+    assert cache.get(JAN) is not None and cache.get(Q1) is not None
+
+
+def test_expired_entries_miss():
+    cache = ResultCache(MemoryBackend(max_entries=10, max_bytes=1 << 20), ttl=0)
+    _fill(cache, JAN)
+    assert cache.get(JAN) is None
+
+
+def test_disabled_cache_passes_values_through():
+    cache = ResultCache(None, ttl=60)
+    assert cache.put(JAN, [1], cache.generation("u1")) == [1]
+    assert cache.get(JAN) is None
+
+
+def test_cached_summary_follows_writes(model_store, user_id, monkeypatch):
+    import models
+    from models import ExpenseModel
+    monkeypatch.setattr(
+        models, "result_cache", ResultCache(MemoryBackend(100, 1 << 20), ttl=60)
+    )
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+    ExpenseModel.add_expense(user_id, date(2024, 1, 5), 1000, "Food")
+    assert ExpenseModel.summarize_by_category(user_id, start, end) == [
+        {"category": "Food", "total_paise": 1000}
+    ]
+    ExpenseModel.add_expense(user_id, date(2024, 1, 6), 250, "Food")
+    assert ExpenseModel.summarize_by_category(user_id, start, end) == [
+        {"category": "Food", "total_paise": 1250}
+    ]
+
+
+def test_sqlite_backend_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = ResultCache(SQLiteBackend(path, 100, 1 << 20), ttl=60)
+    second = ResultCache(SQLiteBackend(path, 100, 1 << 20), ttl=60)
+    _fill(first, JAN, FEB, OTHER_USER)
+    assert second.get(JAN) == {"key": "get_period_report"}
+
+    second.invalidate_ranges("u1", [(date(2024, 1, 31), date(2024, 2, 1))])
+    assert first.get(JAN) is None and first.get(FEB) is None
+    assert first.get(OTHER_USER) is not None
+    first.close()
+    second.close()
+
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(SQLiteBackend(str(tmp_path / "cache.sqlite3"), 2, 1 << 20), ttl=60)
+    _fill(cache, JAN, FEB)
+    cache.get(JAN)
+    _fill(cache, Q1)
+    assert cache.stats()["entries"] == 2
+    assert cache.get(JAN) is not None and cache.get(FEB) is None
+    cache.close()
+
+
+def test_parse_notification():
+    assert parse_notification('{"user_id": "u1", "from": "2024-01-05", "to": "2024-03-01", '
+                              '"dates": ["2024-01-05", "2024-03-01"]}') == (
+        "u1", [(date(2024, 1, 5), date(2024, 1, 5)), (date(2024, 3, 1), date(2024, 3, 1))]
+    )
+    # wide writes only carry their bounds
+    assert parse_notification('{"user_id": "u1", "from": "2020-01-01", "to": "2024-12-31"}') == (
+        "u1", [(date(2020, 1, 1), date(2024, 12, 31))]
+    )
+
+
+def test_listener_invalidates_on_notification(memory_cache):
+    _fill(memory_cache, JAN, FEB)
+    listener = InvalidationListener(memory_cache)
+    listener.handle('{"user_id": "u1", "from": "2024-02-03", "to": "2024-02-03", '
+                    '"dates": ["2024-02-03"]}')
+    listener.handle("not json")
+    assert listener.notifications == 1
+    assert memory_cache.get(FEB) is None and memory_cache.get(JAN) is not None
+
+
+def test_writes_notify_listeners(postgres_store, postgres_url, user_id):
+    import psycopg
+    with psycopg.connect(postgres_url, autocommit=True) as conn:
+        conn.execute("LISTEN expense_writes")
+        postgres_store.add_expense(user_id, date(2024, 1, 5), 1000, "Food", None, None)
+        payloads = [
+            notify.payload for notify in conn.notifies(timeout=2.0, stop_after=1)
+        ]
+    assert [parse_notification(payload) for payload in payloads] == [
+        (user_id, [(date(2024, 1, 5), date(2024, 1, 5))])
+    ]
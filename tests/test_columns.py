@@ -0,0 +1,112 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.bench_columns import loops, vectorised
+from benchmarks.datagen import Dataset, user_rows
+from columns import ExpenseColumns, _codes, load_columns
+from models import ExpenseModel
+from tools import add_expenses_tool, spending_breakdown_tool, spending_breakdown_tool_async
+
+
+def _columns(*rows):
+    """Rows of (date, paise, category, merchant)."""
+    return ExpenseColumns.from_rows([
+        {"date": day, "amount_paise": paise, "category": category, "merchant": merchant}
+        for day, paise, category, merchant in rows
+    ])
+
+
+ROWS = [
+    (date(2024, 1, 1), 500, "Food", "Swiggy"),     # Monday
+    (date(2024, 1, 3), 1_500, "Travel", None),
+    (date(2024, 1, 7), 250, "Food", "Zomato"),      # Sunday, same week
+    (date(2024, 1, 8), 250, "Food", "Swiggy"),
+    (date(2024, 2, 29), 10_000, "Rent", None),
+]
+
+
+def test_codes_sort_labels_and_put_none_last():
+    codes, labels = _codes(["b", None, "a", "b"])
+    assert labels == ["a", "b", None]
+    assert codes.tolist() == [1, 2, 0, 1]
+    codes, labels = _codes([])
+    assert (codes.tolist(), labels) == ([], [])
+
+
+def test_breakdowns_order_by_total():
+    columns = _columns(*ROWS)
+    assert columns.total() == 12_500
+    assert columns.by_category() == [("Rent", 10_000, 1), ("Travel", 1_500, 1), ("Food", 1_000, 3)]
+    assert columns.by_merchant() == [(None, 11_500, 2), ("Swiggy", 750, 2), ("Zomato", 250, 1)]
+
+
+@pytest.mark.parametrize("bucket, starts, totals", [
+    ("week", ["2024-01-01", "2024-01-08", "2024-02-26"], [2_250, 250, 10_000]),
+    ("month", ["2024-01-01", "2024-02-01"], [2_500, 10_000]),
+    ("year", ["2024-01-01"], [12_500]),
+])
+def test_by_period(bucket, starts, totals):
+    periods, sums, counts = _columns(*ROWS).by_period(bucket)
+    assert periods.astype(str).tolist() == starts
+    assert sums.tolist() == totals
+    assert counts.sum() == len(ROWS)
+
+
+def test_running_total_and_bad_bucket():
+    _, running = _columns(*ROWS).running_total("month")
+    assert running.tolist() == [2_500, 12_500]
+    with pytest.raises(ValueError, match="bucket must be one of"):
+        _columns(*ROWS).periods("quarter")
+
+
+def test_columns_match_the_python_loops():
+    dataset = Dataset(users=1, rows=3_000, years=2)
+    rows = [
+        {"date": day, "amount_paise": paise, "category": category, "merchant": merchant}
+        for _, _, day, paise, category, merchant, _ in user_rows(dataset, 1, 3_000)
+    ]
+    assert loops(rows) == vectorised(ExpenseColumns.from_rows(rows))
+
+
+def test_load_columns_matches_the_stored_rows(model_store, user_id):
+    add_expenses_tool(user_id, [
+        {"date": day.isoformat(), "amount": paise / 100, "category": category,
+         "merchant": merchant}
+        for day, paise, category, merchant in ROWS
+    ])
+    start, end = date(2024, 1, 1), date(2024, 2, 29)
+    columns = load_columns(user_id, start, end)
+    expected = ExpenseColumns.from_rows(ExpenseModel.list_expenses(user_id, start, end))
+    assert len(columns) == len(ROWS)
+    assert columns.by_merchant() == expected.by_merchant()
+    assert columns.by_period("week")[1].tolist() == [2_250, 250, 10_000]
+    assert len(load_columns(user_id, date(2023, 1, 1), date(2023, 12, 31))) == 0
+
+
+def test_spending_breakdown_tool(model_store, user_id):
+    add_expenses_tool(user_id, [
+        {"date": day.isoformat(), "amount": paise / 100, "category": category,
+         "merchant": merchant}
+        for day, paise, category, merchant in ROWS
+    ])
+    breakdown = spending_breakdown_tool(user_id, "2024-01-01", "2024-01-31", top=2)
+    assert breakdown["total"] == 25.0 and breakdown["expense_count"] == 4
+    assert breakdown["merchants"] == [
+        {"merchant": None, "total": 15.0, "count": 1},
+        {"merchant": "Swiggy", "total": 7.5, "count": 2},
+    ]
+    assert breakdown["amount_percentiles"] == {"p50": 3.75, "p90": 12.0, "p99": 14.7}
+
+    empty = asyncio.run(spending_breakdown_tool_async(user_id, "2023-01-01", "2023-12-31"))
+    assert (empty["total"], empty["merchants"]) == (0.0, [])
+    assert empty["amount_percentiles"] == {"p50": None, "p90": None, "p99": None}
+
+
+@pytest.mark.parametrize("top", [0, 101])
+def test_spending_breakdown_rejects_bad_top(top):
+    with pytest.raises(ValueError, match="top must be between 1 and 100"):
+        spending_breakdown_tool("u1", "2024-01-01", "2024-01-31", top=top)
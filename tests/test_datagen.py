@@ -0,0 +1,56 @@
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from benchmarks import datagen
+from benchmarks.datagen import CATEGORIES, Dataset, user_rows
+
+
+def test_row_counts_follow_zipf():
+    dataset = Dataset(users=100, rows=10_000, skew=1.0)
+    weights = dataset.weights()
+    assert sum(weights) == pytest.approx(1.0)
+    # user k gets 1/k of user 1's share
+    assert weights[9] == pytest.approx(weights[0] / 10)
+    counts = dataset.row_counts()
+    assert counts == sorted(counts, reverse=True)
+    assert min(counts) >= 1
+    assert sum(counts) == pytest.approx(10_000, rel=0.01)
+    # a few heavy users hold most of the rows
+    assert sum(counts[:10]) > sum(counts[10:])
+
+
+def test_rows_are_reproducible_per_user():
+    dataset = Dataset(users=50, rows=2_000, seed=7)
+    first = list(user_rows(dataset, 3, 40))
+    assert first == list(user_rows(dataset, 3, 40))
+    # a user's rows do not depend on the number of users or on other seeds
+    assert first == list(user_rows(Dataset(users=500, rows=2_000, seed=7), 3, 40))
+    assert first != list(user_rows(Dataset(users=50, rows=2_000, seed=8), 3, 40))
+    assert first[:10] == list(user_rows(dataset, 3, 10))
+
+
+def test_rows_are_valid_expenses():
+    dataset = Dataset(users=10, rows=5_000, years=2, end=date(2024, 6, 30))
+    rows = list(user_rows(dataset, 1, 3_000))
+    assert len({row[0] for row in rows}) == len(rows)
+    for _, user_id, day, paise, category, merchant, _ in rows:
+        assert user_id == "__bench_zipf_000001"
+        assert dataset.start <= day <= date(2024, 6, 30)
+        assert isinstance(paise, int) and paise >= 100
+        assert merchant in CATEGORIES[category][0]
+    # Food is the most frequent category, Travel the least
+    counts = Counter(row[4] for row in rows).most_common()
+    assert counts[0][0] == "Food" and counts[-1][0] == "Travel"
+
+
+def test_load_replaces_the_generated_users(sqlite_store, monkeypatch):
+    monkeypatch.setattr(datagen, "store", sqlite_store)
+    dataset = Dataset(users=5, rows=60, years=1)
+    assert datagen.load(dataset) == sum(dataset.row_counts())
+    first = sqlite_store.list_expenses(dataset.user_id(1), dataset.start, dataset.end)
+    assert datagen.load(dataset) == sum(dataset.row_counts())
+    again = sqlite_store.list_expenses(dataset.user_id(1), dataset.start, dataset.end)
+    assert [row["id"] for row in again] == [row["id"] for row in first]
+    assert datagen.drop(dataset) == sum(dataset.row_counts())
@@ -0,0 +1,209 @@
+import asyncio
+
+import pytest
+
+import db
+from db import PoolConfig, close_async_db, open_async_pools, pool_stats
+
+POOL_ENV = [
+    "DB_POOL_MIN_SIZE", "DB_POOL_MAX_SIZE", "DB_POOL_TIMEOUT", "DB_POOL_MAX_IDLE",
+    "DB_POOL_MAX_LIFETIME", "DB_POOL_RECONNECT_TIMEOUT", "DB_POOL_CHECK", "DB_POOL_WARMUP",
+    "DB_PREPARE",
+]
+
+
+@pytest.fixture
+def pool_env(monkeypatch):
+    for name in POOL_ENV:
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_pool_config_defaults(pool_env):
+    config = PoolConfig.from_env()
+    assert (config.min_size, config.timeout, config.check, config.warmup, config.prepare) == (
+        1, 5.0, False, False, True
+    )
+    assert 3 <= config.max_size <= 10
+
+
+def test_pool_config_reads_the_environment(pool_env):
+    for name, value in [
+        ("DB_POOL_MIN_SIZE", "2"), ("DB_POOL_MAX_SIZE", "8"), ("DB_POOL_TIMEOUT", "1.5"),
+        ("DB_POOL_MAX_IDLE", " "), ("DB_POOL_CHECK", "yes"), ("DB_POOL_WARMUP", "ON"),
+        ("DB_PREPARE", "0"),
+    ]:
+        pool_env.setenv(name, value)
+    config = PoolConfig.from_env()
+    assert (config.min_size, config.max_size, config.timeout, config.max_idle) == (
+        2, 8, 1.5, PoolConfig.max_idle
+    )
+    assert (config.check, config.warmup, config.prepare) == (True, True, False)
+
+
+def test_pool_max_size_is_at_least_min_size(pool_env):
+    pool_env.setenv("DB_POOL_MIN_SIZE", "6")
+    pool_env.setenv("DB_POOL_MAX_SIZE", "4")
+    assert PoolConfig.from_env().max_size == 6
+
+
+@pytest.mark.parametrize("name, value, message", [
+    ("DB_POOL_MAX_SIZE", "ten", "DB_POOL_MAX_SIZE must be a number"),
+    ("DB_POOL_MIN_SIZE", "-1", "DB_POOL_MIN_SIZE must be >= 0"),
+    ("DB_POOL_MAX_SIZE", "0", "DB_POOL_MAX_SIZE >= 1"),
+])
+def test_pool_config_rejects_bad_values(pool_env, name, value, message):
+    pool_env.setenv(name, value)
+    with pytest.raises(ValueError, match=message):
+        PoolConfig.from_env()
+
+
+def test_open_async_pools_opens_shards_and_replicas(postgres_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_SHARD_URLS", f"a={postgres_url} b={postgres_url}")
+    monkeypatch.setenv("DATABASE_READ_URL", postgres_url)
+    monkeypatch.setattr(db, "_ring", None)
+    monkeypatch.setattr(db, "_ring_loaded", False)
+
+    async def warm():
+        try:
+            await open_async_pools()
+            return set(pool_stats())
+        finally:
+            await close_async_db()
+
+    assert {"async", "async-shard-a", "async-shard-b", "async-read-0"} <= asyncio.run(warm())
+
+
+class FakeConnection:
+    pass
+
+
+def test_statement_registry_registers_each_name_once():
+    registry = db.StatementRegistry()
+    first = registry.register("q", "SELECT 1")
+    assert registry.register("q", "SELECT 1") == first
+    with pytest.raises(ValueError, match="'q' is already registered"):
+        registry.register("q", "SELECT 2")
+    assert registry.statements() == [first]
+
+
+def test_statement_registry_tracks_prepares_per_connection():
+    registry = db.StatementRegistry()
+    q1, q2 = registry.register("q1", "SELECT 1"), registry.register("q2", "SELECT 2")
+    a, b = FakeConnection(), FakeConnection()
+    assert [registry.mark_prepared(a, q1), registry.mark_prepared(a, q1)] == [True, False]
+    assert registry.mark_prepared(b, q1) and registry.mark_prepared(b, q2)
+    assert registry.snapshot() == {"connections": 2, "statements": {"q1": 2, "q2": 1}}
+    # Closed connections drop out with their prepared statements
+    del b
+    assert registry.snapshot() == {"connections": 1, "statements": {"q1": 1, "q2": 0}}
+
+
+def test_execute_args_prepare_only_registered_statements(monkeypatch):
+    monkeypatch.setattr(db, "statements", db.StatementRegistry())
+    statement = db.statements.register("q", "SELECT %s")
+    conn = FakeConnection()
+    assert db._execute_args(conn, "SELECT 1", True) == ("SELECT 1", None)
+    assert db._execute_args(conn, statement, False) == ("SELECT %s", False)
+    assert db._execute_args(conn, statement, True) == ("SELECT %s", True)
+    assert db.statements.snapshot()["statements"] == {"q": 1}
+
+
+def test_registered_statements_run_prepared(postgres_url, monkeypatch):
+    monkeypatch.setattr(db, "statements", db.StatementRegistry())
+    statement = db.statements.register("test_echo", "SELECT %s::int AS n")
+    pool = db.DatabaseConnection(PoolConfig(min_size=1, max_size=1), name="test-prepared")
+    try:
+        assert [pool.execute_query(statement, (n,)) for n in (1, 2)] == [[{"n": 1}], [{"n": 2}]]
+        with pool.get_cursor() as cursor:
+            cursor.execute("SELECT count(*) AS n FROM pg_prepared_statements")
+            assert cursor.fetchone()["n"] == 1
+        assert db.statements.snapshot()["statements"] == {"test_echo": 1}
+    finally:
+        pool.close()
+
+
+def test_pipeline_returns_results_in_query_order(postgres_url, monkeypatch):
+    monkeypatch.setattr(db, "statements", db.StatementRegistry())
+    pool = db.DatabaseConnection(PoolConfig(min_size=1, max_size=1), name="test-pipeline")
+    try:
+        results = pool.execute_pipeline([
+            ("SELECT generate_series(1, %s) AS n", (3,)),
+            ("SELECT 'b' AS s WHERE false", None),
+            (db.statements.register("test_echo", "SELECT %s::text AS s"), ("c",)),
+        ])
+        assert results == [[{"n": 1}, {"n": 2}, {"n": 3}], [], [{"s": "c"}]]
+
+        async def run_async():
+            async_pool = db.AsyncDatabaseConnection(
+                PoolConfig(min_size=1, max_size=1), name="test-pipeline-async"
+            )
+            await async_pool.open()
+            try:
+                return await async_pool.execute_pipeline([
+                    ("SELECT %s::int AS n", (n,)) for n in (5, 4, 6)
+                ])
+            finally:
+                await async_pool.close()
+
+        assert asyncio.run(run_async()) == [[{"n": 5}], [{"n": 4}], [{"n": 6}]]
+    finally:
+        pool.close()
+
+
+def test_read_router_pins_recent_writers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db.time, "monotonic", lambda: now[0])
+    router = db.ReadRouter(pin_seconds=5.0)
+    router.record_write("alice")
+    assert router.is_pinned("alice") and not router.is_pinned("bob")
+    now[0] += 4.9
+    assert router.is_pinned("alice")
+    now[0] += 0.2
+    assert not router.is_pinned("alice")
+
+
+def test_read_router_forgets_expired_pins(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(db.time, "monotonic", lambda: now[0])
+    router = db.ReadRouter(pin_seconds=1.0)
+    for n in range(10_001):
+        router.record_write(f"user{n}")
+    now[0] = 2.0
+    router.record_write("late")
+    assert list(router._pinned_until) == ["late"]
+
+
+@pytest.mark.parametrize("value, urls", [
+    ("", []),
+    ("postgresql://r1/db", ["postgresql://r1/db"]),
+    (" postgresql://r1/db \n postgres://r2/db ", ["postgresql://r1/db", "postgres://r2/db"]),
+    ("postgresql://r1/db,postgresql://r2/db", ["postgresql://r1/db", "postgresql://r2/db"]),
+    # A multi-host URL keeps its commas
+    ("postgresql://r1:5432,r2:5432/db?target_session_attrs=any",
+     ["postgresql://r1:5432,r2:5432/db?target_session_attrs=any"]),
+])
+def test_read_urls(monkeypatch, value, urls):
+    monkeypatch.setenv("DATABASE_READ_URL", value)
+    assert db._read_urls() == urls
+
+
+def test_reads_go_to_the_primary_while_pinned(monkeypatch):
+    monkeypatch.setattr(db, "read_router", db.ReadRouter(pin_seconds=60.0))
+    monkeypatch.setattr(db, "_ring", None)
+    monkeypatch.setattr(db, "_ring_loaded", True)
+    replicas = ["replica"]
+    assert db._route_to_replica("alice", replicas)
+    assert db._route_to_replica(None, replicas)
+    db.record_write("alice")
+    assert not db._route_to_replica("alice", replicas)
+    assert db._route_to_replica("bob", replicas)
+    assert not db._route_to_replica("bob", [])
+
+
+def test_sharded_users_read_their_shard(monkeypatch):
+    monkeypatch.setattr(db, "read_router", db.ReadRouter(pin_seconds=60.0))
+    monkeypatch.setattr(db, "_ring", db.HashRing(["a", "b"]))
+    monkeypatch.setattr(db, "_ring_loaded", True)
+    assert not db._route_to_replica("alice", ["replica"])
+    assert db._route_to_replica(None, ["replica"])
@@ -0,0 +1,71 @@
+from datetime import date
+from uuid import uuid4
+
+import pytest
+
+from db import statements
+from explain import _describe, _flag, _nodes, explain_all, representative_params
+
+
+def _seq_scan(rows, removed, loops=1):
+    return {
+        "Node Type": "Seq Scan", "Relation Name": "expenses_2024_01",
+        "Actual Rows": rows, "Rows Removed by Filter": removed, "Actual Loops": loops,
+    }
+
+
+def test_flags_scans_that_discard_most_rows():
+    assert _flag(_seq_scan(100, 50_000)) == (
+        "Seq Scan on expenses_2024_01 read 50,100 rows to keep 100"
+    )
+    assert _flag(_seq_scan(10, 200, loops=10)) == (
+        "Seq Scan on expenses_2024_01 read 2,100 rows to keep 100"
+    )
+
+
+@pytest.mark.parametrize("node", [
+    _seq_scan(10, 500),                     # small table
+    _seq_scan(40_000, 10_000),              # the user owns most of the partition
+    {"Node Type": "Index Only Scan", "Relation Name": "expenses_2024_01",
+     "Actual Rows": 10, "Rows Removed by Filter": 90_000},
+])
+def test_does_not_flag(node):
+    assert _flag(node) is None
+
+
+def test_describe_folds_partitions():
+    node = {"Node Type": "Index Only Scan", "Relation Name": "expenses_2024_01",
+            "Index Name": "expenses_2024_01_user_id_date_amount_paise_category_idx"}
+    assert _describe(node) == (
+        "Index Only Scan on expenses_* using expenses_*_user_id_date_amount_paise_category_idx"
+    )
+
+
+def test_nodes_walks_the_plan():
+    plan = {"Node Type": "Append", "Plans": [
+        {"Node Type": "Sort", "Plans": [_seq_scan(1, 2)]}, _seq_scan(3, 4)
+    ]}
+    assert [node["Node Type"] for node in _nodes(plan)] == [
+        "Append", "Sort", "Seq Scan", "Seq Scan"
+    ]
+
+
+def test_every_read_statement_has_params():
+    read_names = {
+        statement.name for statement in statements.statements()
+        if statement.sql.lstrip().upper().startswith("SELECT")
+    }
+    assert "period_report" in read_names
+    assert read_names <= set(representative_params("u1", date(2024, 1, 10), date(2024, 6, 20)))
+
+
+def test_registered_statements_explain(postgres_store, user_id):
+    postgres_store.add_expenses(user_id, [
+        (uuid4(), user_id, date(2024, month, 15), 100, "Food", None, None)
+        for month in range(1, 7)
+    ])
+    results = explain_all(user_id, date(2024, 1, 10), date(2024, 6, 20))
+    assert {result["statement"] for result in results} == set(
+        representative_params(user_id, date(2024, 1, 10), date(2024, 6, 20))
+    )
+    assert all(result["execution_ms"] >= 0 for result in results)
@@ -0,0 +1,98 @@
+import io
+from datetime import date
+
+import pytest
+
+from importer import _parse_amount, import_statement, iter_csv_records, iter_ofx_records
+from models import ExpenseModel
+
+OFX_SGML = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[+5.5:IST]
+<TRNAMT>-450.10
+<NAME>Swiggy
+<MEMO>dinner
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240106
+<TRNAMT>1000.00
+<NAME>Refund
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_csv_records_map_headers_case_insensitively():
+    stream = io.StringIO("Txn Date,AMOUNT,Description\n2024-01-05,12.50,Swiggy\n\n2024-01-06,3,\n")
+    records = list(iter_csv_records(stream, {"date": "txn date", "merchant": "description"}))
+    assert records == [
+        (2, {"date": "2024-01-05", "amount": "12.50", "category": None,
+             "merchant": "Swiggy", "note": None}),
+        (4, {"date": "2024-01-06", "amount": "3", "category": None,
+             "merchant": "", "note": None}),
+    ]
+
+
+def test_csv_without_required_columns():
+    with pytest.raises(ValueError, match="missing required column"):
+        list(iter_csv_records(io.StringIO("when,amount\n2024-01-01,1\n")))
+
+
+def test_ofx_sgml_records():
+    records = [fields for _, fields in iter_ofx_records(io.StringIO(OFX_SGML))]
+    assert records == [
+        {"date": "2024-01-05", "amount": "-450.10", "merchant": "Swiggy", "note": "dinner"},
+        {"date": "2024-01-06", "amount": "1000.00", "merchant": "Refund", "note": None},
+    ]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1,234.50", "1234.50"),
+    ("(99.99)", "-99.99"),
+    ("Rs. 45", "45"),
+    ("INR 1,200.00", "1200.00"),
+    ("₹99", "99"),
+    ("-12", "-12"),
+])
+def test_parse_amount(raw, expected):
+    assert str(_parse_amount(raw)) == expected
+
+
+def test_import_csv(model_store, user_id, tmp_path):
+    path = tmp_path / "statement.csv"
+    path.write_text(
+        "date,amount,category,merchant\n"
+        "05/01/2024,-450.10,Food,Swiggy\n"
+        "06/01/2024,1000.00,,Salary\n"
+        "not a date,-1,,\n"
+        "07/01/2024,-20,,Uber\n"
+    )
+    result = import_statement(
+        user_id, str(path), date_format="%d/%m/%Y", expense_sign="negative", batch_size=1
+    )
+    assert (result["imported"], result["skipped"], result["errors"], result["batches"]) == (
+        2, 1, 1, 2
+    )
+    assert result["error_samples"] == [
+        "line 4: Invalid date 'not a date', expected format %d/%m/%Y"
+    ]
+
+    rows = ExpenseModel.list_expenses(user_id, date(2024, 1, 1), date(2024, 1, 31))
+    assert [
+        (row["date"], row["amount_paise"], row["category"], row["merchant"]) for row in rows
+    ] == [
+        (date(2024, 1, 5), 45010, "Food", "Swiggy"),
+        (date(2024, 1, 7), 2000, "Uncategorized", "Uber"),
+    ]
+
+
+def test_import_ofx(model_store, user_id, tmp_path):
+    path = tmp_path / "statement.ofx"
+    path.write_text(OFX_SGML)
+    result = import_statement(user_id, str(path))
+    assert (result["imported"], result["skipped"]) == (1, 1)
+    row, = ExpenseModel.list_expenses(user_id, date(2024, 1, 1), date(2024, 1, 31))
+    assert (row["amount_paise"], row["merchant"], row["note"]) == (45010, "Swiggy", "dinner")
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from metrics import Histogram, Metrics, render_pool_stats, timed_query
+
+
+def test_histogram_quantiles_are_bucket_upper_bounds():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for seconds in [0.005] * 50 + [0.05] * 45 + [0.5] * 4 + [3.0]:
+        histogram.observe(seconds)
+    assert histogram.counts == [50, 45, 4, 1]
+    assert (histogram.quantile(0.5), histogram.quantile(0.95), histogram.quantile(0.99)) == (
+        0.01, 0.1, 1.0
+    )
+    # Past the last bound the observed maximum is reported
+    assert histogram.quantile(1.0) == 3.0
+    assert histogram.snapshot() == {
+        "count": 100, "avg_ms": 75.0, "max_ms": 3000.0,
+        "p50_ms": 10.0, "p95_ms": 100.0, "p99_ms": 1000.0,
+    }
+
+
+def test_empty_histogram_snapshot():
+    assert Histogram().snapshot() == {
+        "count": 0, "avg_ms": None, "max_ms": 0.0,
+        "p50_ms": None, "p95_ms": None, "p99_ms": None,
+    }
+
+
+def test_snapshot_groups_series_by_labels():
+    registry = Metrics()
+    registry.observe("query_latency_seconds", 0.002, method="list_expenses")
+    registry.increment("pool_timeouts_total", pool="async")
+    registry.increment("pool_timeouts_total", 2, pool="async")
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == {"pool_timeouts_total": [{"pool": "async", "value": 3}]}
+    series, = snapshot["histograms"]["query_latency_seconds"]
+    assert (series["method"], series["count"], series["p50_ms"]) == ("list_expenses", 1, 2.5)
+
+
+def test_prometheus_histograms_are_cumulative():
+    registry = Metrics()
+    for seconds in (0.0005, 0.004, 20.0):
+        registry.observe("query_latency_seconds", seconds, method='say "hi"')
+    registry.increment("read_routing_total", target="replica")
+    lines = registry.render_prometheus()
+
+    label = 'method="say \\"hi\\""'
+    assert lines[0] == "# TYPE query_latency_seconds histogram"
+    assert f'query_latency_seconds_bucket{{{label},le="0.001"}} 1' in lines
+    assert f'query_latency_seconds_bucket{{{label},le="0.005"}} 2' in lines
+    assert f'query_latency_seconds_bucket{{{label},le="10.0"}} 2' in lines
+    assert f'query_latency_seconds_bucket{{{label},le="+Inf"}} 3' in lines
+    assert f"query_latency_seconds_count{{{label}}} 3" in lines
+    assert lines[-2:] == [
+        "# TYPE read_routing_total counter", 'read_routing_total{target="replica"} 1'
+    ]
+
+
+def test_pool_stats_render_as_gauges_and_counters():
+    lines = render_pool_stats("expense_db", {
+        "async": {"pool_size": 4, "requests_total": 10},
+        "async-read-0": {"pool_size": 2},
+    })
+    assert lines == [
+        "# TYPE expense_db_pool_size gauge",
+        'expense_db_pool_size{pool="async"} 4',
+        'expense_db_pool_size{pool="async-read-0"} 2',
+        "# TYPE expense_db_requests_total counter",
+        'expense_db_requests_total{pool="async"} 10',
+    ]
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    import metrics
+    registry = Metrics()
+    monkeypatch.setattr(metrics, "metrics", registry)
+
+    def counts():
+        return {
+            series["method"]: series["count"]
+            for series in registry.snapshot()["histograms"].get("query_latency_seconds", [])
+        }
+    return counts
+
+
+def test_timed_query_times_every_kind_of_callable(recorded):
+    @timed_query("plain")
+    def plain():
+        return 1
+
+    @timed_query("failing")
+    def failing():
+        raise ValueError("boom")
+
+    @timed_query("chunks")
+    def chunks():
+        yield [1]
+        yield [2]
+
+    @timed_query("coroutine")
+    async def coroutine():
+        return 2
+
+    @timed_query("async_chunks")
+    async def async_chunks():
+        yield [3]
+
+    async def consume():
+        return await coroutine(), [chunk async for chunk in async_chunks()]
+
+    assert plain() == 1
+    with pytest.raises(ValueError):
+        failing()
+    generator = chunks()
+    assert next(generator) == [1]
+    assert recorded() == {"plain": 1, "failing": 1}
+    # Generators are timed once they are exhausted or closed
+    generator.close()
+    assert asyncio.run(consume()) == (2, [[3]])
+    assert recorded() == {
+        "plain": 1, "failing": 1, "chunks": 1, "coroutine": 1, "async_chunks": 1
+    }
@@ -0,0 +1,127 @@
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+import models
+from models import _unseen_months
+
+# Far enough ahead that no other data has a partition there
+MONTHS = [date(2091, 7, 1), date(2091, 8, 1), date(2091, 9, 1)]
+
+
+@pytest.fixture
+def partition_months(monkeypatch):
+    months = set()
+    monkeypatch.setattr(models, "_partition_months", months)
+    return months
+
+
+def test_unseen_months(partition_months):
+    db = SimpleNamespace(name="primary")
+    partition_months.add(("primary", date(2024, 2, 1)))
+    partition_months.add(("shard-b", date(2024, 3, 1)))
+    days = [date(2024, 3, 9), date(2024, 2, 29), date(2024, 3, 1), date(2024, 1, 31)]
+    assert _unseen_months(db, days) == [date(2024, 1, 1), date(2024, 3, 1)]
+
+
+def _partitions(db):
+    rows = db.execute_query(
+        "SELECT inhrelid::regclass::text AS name FROM pg_inherits "
+        "WHERE inhparent = 'expenses'::regclass"
+    )
+    return {row["name"] for row in rows}
+
+
+@pytest.fixture
+def far_months(postgres_store, partition_months):
+    from db import get_db
+    db = get_db()
+    for month in MONTHS:
+        db.execute_update(f"DROP TABLE IF EXISTS expenses_{month:%Y_%m}", ())
+    yield db
+    # delete first: dropping a partition would skip the rollup triggers
+    db.execute_update("DELETE FROM expenses WHERE date >= %s", (MONTHS[0],))
+    for month in MONTHS:
+        db.execute_update(f"DROP TABLE IF EXISTS expenses_{month:%Y_%m}", ())
+
+
+def test_writes_create_missing_partitions(
+    postgres_store, far_months, partition_months, user_id
+):
+    db = far_months
+    postgres_store.add_expense(user_id, date(2091, 7, 14), 1000, "Food", None, None)
+    assert "expenses_2091_07" in _partitions(db)
+    assert (db.name, date(2091, 7, 1)) in partition_months
+
+    postgres_store.add_expenses(user_id, [
+        (uuid4(), user_id, day, 500, "Food", None, None)
+        for day in (date(2091, 7, 20), date(2091, 8, 31), date(2091, 9, 1))
+    ])
+    assert {"expenses_2091_07", "expenses_2091_08", "expenses_2091_09"} <= _partitions(db)
+
+    rows = db.execute_query(
+        "SELECT tableoid::regclass::text AS partition, date FROM expenses "
+        "WHERE user_id = %s ORDER BY date", (user_id,)
+    )
+    assert [(row["partition"], row["date"].month) for row in rows] == [
+        ("expenses_2091_07", 7), ("expenses_2091_07", 7),
+        ("expenses_2091_08", 8), ("expenses_2091_09", 9),
+    ]
+
+
+def test_ensure_partitions_tolerates_existing_ones(postgres_store, far_months, partition_months):
+    db = far_months
+    models._ensure_partitions(db, [date(2091, 7, 1)])
+    # another process created it: this one has not seen it yet
+    partition_months.clear()
+    models._ensure_partitions(db, [date(2091, 7, 2), date(2091, 8, 3)])
+    assert {"expenses_2091_07", "expenses_2091_08"} <= _partitions(db)
+
+
+def _placement(db, user_id):
+    rows = db.execute_query(
+        "SELECT tableoid::regclass::text AS partition, date FROM expenses "
+        "WHERE user_id = %s ORDER BY date", (user_id,)
+    )
+    return [(row["partition"], row["date"]) for row in rows]
+
+
+def _rollup(db, user_id):
+    rows = db.execute_query(
+        "SELECT month, total_paise FROM expense_monthly_rollup WHERE user_id = %s ORDER BY month",
+        (user_id,)
+    )
+    return [(row["month"], row["total_paise"]) for row in rows]
+
+
+def test_rows_without_a_partition_use_the_default_one(
+    postgres_store, far_months, partition_months, user_id
+):
+    db = far_months
+    # A stale list of ensured months no longer makes the write fail
+    partition_months.add((db.name, date(2091, 7, 1)))
+    postgres_store.add_expense(user_id, date(2091, 7, 14), 1000, "Food", None, None)
+    db.execute_update(
+        "INSERT INTO expenses (user_id, date, amount_paise, category) "
+        "VALUES (%s, '2091-07-31', 200, 'Food'), (%s, '2091-08-01', 300, 'Food')",
+        (user_id, user_id)
+    )
+    assert _placement(db, user_id) == [
+        ("expenses_default", date(2091, 7, 14)), ("expenses_default", date(2091, 7, 31)),
+        ("expenses_default", date(2091, 8, 1)),
+    ]
+    rollup = _rollup(db, user_id)
+    assert rollup == [(date(2091, 7, 1), 1200), (date(2091, 8, 1), 300)]
+
+    # Creating the month's partition moves its rows out of the default one
+    partition_months.clear()
+    models._ensure_partitions(db, [date(2091, 7, 1)])
+    assert _placement(db, user_id) == [
+        ("expenses_2091_07", date(2091, 7, 14)), ("expenses_2091_07", date(2091, 7, 31)),
+        ("expenses_default", date(2091, 8, 1)),
+    ]
+    assert _rollup(db, user_id) == rollup
+    rows = postgres_store.list_expenses(user_id, date(2091, 7, 1), date(2091, 8, 31))
+    assert [row["amount_paise"] for row in rows] == [1000, 200, 300]
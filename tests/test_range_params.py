@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import pytest
+
+from models import _range_params
+
+
+def _parts(start, end):
+    _, full_start, full_end, _, edge_start, edge_end, _, tail_start, tail_end = (
+        _range_params("u1", start, end)
+    )
+    assert (edge_start, edge_end) == (start, full_start)
+    return full_start, full_end, tail_start, tail_end
+
+
+def _covered_days(start, end):
+    """Every day of [start, end] as the three parts read it, with repeats."""
+    full_start, full_end, tail_start, tail_end = _parts(start, end)
+    days = []
+    month = full_start
+    while month < full_end:
+        assert month.day == 1  # the rollup holds whole months only
+        next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        days += [month + timedelta(n) for n in range((next_month - month).days)]
+        month = next_month
+    day = start
+    while day < full_start:
+        days.append(day)
+        day += timedelta(1)
+    day = tail_start
+    while day <= tail_end:
+        days.append(day)
+        if day == date.max:
+            break
+        day += timedelta(1)
+    return days
+
+
+def _every_day(start, end):
+    return [start + timedelta(n) for n in range((end - start).days + 1)]
+
+
+@pytest.mark.parametrize("start, end", [
+    (date(2024, 1, 1), date(2024, 1, 31)),
+    (date(2024, 1, 1), date(2024, 3, 31)),
+    (date(2024, 1, 15), date(2024, 3, 10)),
+    (date(2024, 1, 15), date(2024, 1, 20)),
+    (date(2024, 1, 15), date(2024, 2, 10)),
+    (date(2024, 2, 1), date(2024, 2, 29)),
+    (date(2023, 12, 2), date(2024, 1, 31)),
+    (date(2023, 11, 30), date(2025, 1, 1)),
+    (date(2024, 3, 5), date(2024, 3, 5)),
+])
+def test_parts_cover_each_day_once(start, end):
+    assert sorted(_covered_days(start, end)) == _every_day(start, end)
+
+
+def test_whole_months_come_from_the_rollup():
+    assert _parts(date(2024, 1, 15), date(2024, 4, 10))[:2] == (
+        date(2024, 2, 1), date(2024, 4, 1)
+    )
+    assert _parts(date(2024, 1, 1), date(2024, 12, 31))[:2] == (
+        date(2024, 1, 1), date(2025, 1, 1)
+    )
+
+
+def test_range_without_a_whole_month_reads_raw_rows():
+    full_start, full_end, tail_start, tail_end = _parts(date(2024, 1, 15), date(2024, 2, 10))
+    assert full_start == full_end
+    assert (tail_start, tail_end) == (date(2024, 1, 15), date(2024, 2, 10))
+
+
+@pytest.mark.parametrize("start", [
+    date(9999, 1, 1), date(9999, 11, 20), date(9999, 12, 1), date(9999, 12, 31)
+])
+def test_end_of_calendar(start):
+    assert sorted(_covered_days(start, date.max)) == _every_day(start, date.max)
+
+
+def test_start_of_calendar():
+    assert sorted(_covered_days(date.min, date(1, 3, 31))) == _every_day(date.min, date(1, 3, 31))
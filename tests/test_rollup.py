@@ -0,0 +1,53 @@
+from datetime import date
+from uuid import uuid4
+
+ROLLUP_SQL = """
+    SELECT month, category, total_paise, expense_count
+    FROM expense_monthly_rollup
+    WHERE user_id = %s AND expense_count > 0
+    ORDER BY month, category
+"""
+
+RAW_SQL = """
+    SELECT date_trunc('month', date)::date AS month, category,
+           SUM(amount_paise)::bigint AS total_paise, COUNT(*) AS expense_count
+    FROM expenses
+    WHERE user_id = %s
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+
+def test_rollup_follows_every_write_path(postgres_store, user_id):
+    from db import get_db
+    db = get_db(user_id)
+
+    def assert_rollup_exact():
+        assert db.execute_query(ROLLUP_SQL, (user_id,)) == db.execute_query(RAW_SQL, (user_id,))
+
+    postgres_store.add_expense(user_id, date(2024, 1, 31), 1000, "Food", None, None)
+    postgres_store.add_expenses(user_id, [
+        (uuid4(), user_id, day, paise, category, None, None)
+        for day, paise, category in [
+            (date(2024, 1, 1), 250, "Food"),
+            (date(2024, 2, 1), 4000, "Travel"),
+            (date(2024, 2, 29), 99, "Food"),
+            (date(2024, 3, 15), 700, "Bills"),
+        ]
+    ])
+    assert_rollup_exact()
+
+    # an update that moves rows across months and categories
+    db.execute_update(
+        "UPDATE expenses SET date = date + 14, category = 'Food', amount_paise = amount_paise + 1 "
+        "WHERE user_id = %s AND category = 'Travel'", (user_id,)
+    )
+    assert_rollup_exact()
+
+    db.execute_update(
+        "DELETE FROM expenses WHERE user_id = %s AND date < %s", (user_id, date(2024, 2, 1))
+    )
+    assert_rollup_exact()
+
+    postgres_store.delete_expenses(user_id)
+    assert db.execute_query(ROLLUP_SQL, (user_id,)) == []
@@ -0,0 +1,50 @@
+from collections import Counter
+
+import pytest
+
+from db import HashRing, shard_urls
+
+USERS = [f"user_{n}" for n in range(5000)]
+
+
+def test_placement_is_stable_and_independent_of_order():
+    ring, shuffled = HashRing(["a", "b", "c"]), HashRing(["c", "a", "b"])
+    assert [ring.shard_for(user) for user in USERS] == [
+        shuffled.shard_for(user) for user in USERS
+    ]
+    assert ring.names == ["a", "b", "c"]
+
+
+def test_users_spread_over_every_shard():
+    ring = HashRing(["a", "b", "c", "d"])
+    counts = Counter(ring.shard_for(user) for user in USERS)
+    assert set(counts) == {"a", "b", "c", "d"}
+    assert min(counts.values()) > len(USERS) / 4 * 0.6
+
+
+def test_adding_a_shard_only_moves_users_onto_it():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    moved = [user for user in USERS if before.shard_for(user) != after.shard_for(user)]
+    assert all(after.shard_for(user) == "d" for user in moved)
+    assert len(moved) < len(USERS) / 4 * 1.5
+
+
+def test_empty_ring():
+    with pytest.raises(ValueError):
+        HashRing([])
+
+
+def test_shard_urls(monkeypatch):
+    monkeypatch.setenv(
+        "DATABASE_SHARD_URLS",
+        "east=postgresql://h1/db postgresql://h2/db west=postgres://h3/db"
+    )
+    assert shard_urls() == {
+        "east": "postgresql://h1/db",
+        "shard1": "postgresql://h2/db",
+        "west": "postgres://h3/db",
+    }
+    monkeypatch.setenv("DATABASE_SHARD_URLS", "a=postgresql://h1/db a=postgresql://h2/db")
+    with pytest.raises(ValueError, match="Duplicate shard name"):
+        shard_urls()
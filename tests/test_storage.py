@@ -0,0 +1,296 @@
+import asyncio
+import sqlite3
+import time
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+
+from models import _period_report_from_rows
+from storage import AsyncSQLiteStore, format_paise, from_paise, to_paise
+
+# (id, date, amount_paise, category, merchant); spans partial and whole
+# months so the Postgres summaries use both the rollup and raw edges
+EXPENSES = [
+    (1, date(2023, 12, 30), 1500, "Food", "Swiggy"),
+    (2, date(2024, 1, 1), 45010, "Bills", "Airtel"),
+    (3, date(2024, 1, 15), 12550, "Food", None),
+    (4, date(2024, 1, 15), 2000, "Transport", "Uber"),
+    (5, date(2024, 2, 3), 99, "Food", "Zomato"),
+    (6, date(2024, 2, 29), 350000, "Travel", "IRCTC"),
+    (7, date(2024, 3, 4), 800, "Transport", "Metro Card"),
+]
+
+
+@pytest.mark.parametrize("amount, paise", [
+    (45.1, 4510),
+    (0.1 + 0.2, 30),
+    (19.99, 1999),
+    (1.005, 101),
+    (0.004, 0),
+    (0.005, 1),
+    (-2.5, -250),
+    (100, 10000),
+    ("12.345", 1235),
+    (Decimal("99999999.99"), 9999999999),
+    (1e15, 100000000000000000),
+])
+def test_to_paise_rounds_half_up(amount, paise):
+    assert to_paise(amount) == paise
+
+
+@pytest.mark.parametrize("amount", [float("nan"), float("inf"), "abc", None, "1e"])
+def test_to_paise_rejects_non_numbers(amount):
+    with pytest.raises(ValueError):
+        to_paise(amount)
+
+
+@pytest.mark.parametrize("paise, rupees, text", [
+    (4510, 45.1, "45.10"),
+    (5, 0.05, "0.05"),
+    (100, 1.0, "1.00"),
+    (-1999, -19.99, "-19.99"),
+    (0, 0.0, "0.00"),
+])
+def test_from_and_format_paise(paise, rupees, text):
+    assert from_paise(paise) == rupees
+    assert format_paise(paise) == text
+    assert to_paise(text) == paise
+
+
+def _load(store, user_id):
+    store.add_expenses(user_id, [
+        (UUID(int=n, version=4), user_id, day, paise, category, merchant, None)
+        for n, day, paise, category, merchant in EXPENSES
+    ])
+
+
+def _slim(rows):
+    return [(row["date"], row["amount_paise"], row["category"], row["merchant"]) for row in rows]
+
+
+def test_list_expenses_in_date_order(expense_store, user_id):
+    _load(expense_store, user_id)
+    rows = expense_store.list_expenses(user_id, date(2024, 1, 1), date(2024, 2, 29))
+    assert _slim(rows) == [
+        (day, paise, category, merchant)
+        for _, day, paise, category, merchant in EXPENSES[1:6]
+    ]
+    assert expense_store.list_expenses("__test_nobody", date.min, date.max) == []
+
+
+def test_pages_walk_the_whole_list(expense_store, user_id):
+    _load(expense_store, user_id)
+    start, end = date(2023, 1, 1), date(2024, 12, 31)
+    pages, after = [], None
+    while True:
+        page = expense_store.list_expenses_page(user_id, start, end, 3, after, False)
+        if not page:
+            break
+        pages.append(page)
+        last = page[-1]
+        after = (last["date"], last["created_at"], last["id"])
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert _slim(row for page in pages for row in page) == _slim(
+        expense_store.list_expenses(user_id, start, end)
+    )
+
+
+def test_sqlite_iter_expenses_yields_bounded_chunks(sqlite_store, user_id, monkeypatch):
+    import storage
+    monkeypatch.setattr(storage, "STREAM_CHUNK_ROWS", 3)
+    _load(sqlite_store, user_id)
+    chunks = list(sqlite_store.iter_expenses(user_id, date.min, date.max, True))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert [row["id"] for chunk in chunks for row in chunk] == [
+        str(UUID(int=n, version=4)) for n in range(1, 8)
+    ]
+
+
+def test_stream_query_reads_through_a_server_side_cursor(postgres_store, user_id):
+    from db import get_db
+    from models import LIST_EXPENSES
+    _load(postgres_store, user_id)
+    db = get_db(user_id)
+    chunks = list(db.stream_query(LIST_EXPENSES, (user_id, date.min, date.max), chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert _slim(row for chunk in chunks for row in chunk) == _slim(
+        postgres_store.list_expenses(user_id, date.min, date.max)
+    )
+    # The connection went back to the pool with its cursor closed
+    assert db.stats()["connections_in_use"] == 0
+
+
+def test_pages_split_rows_with_equal_date_and_created_at(expense_store, user_id):
+    # One batch shares a single created_at, so only the id breaks the ties
+    ids = [UUID(int=n, version=4) for n in (8, 3, 6, 1, 7, 2, 5)]
+    expense_store.add_expenses(user_id, [
+        (expense_id, user_id, date(2024, 6, 1), 100, "Food", None, None) for expense_id in ids
+    ])
+    rows = expense_store.list_expenses(user_id, date(2024, 6, 1), date(2024, 6, 1))
+    assert len({row["created_at"] for row in rows}) == 1
+
+    seen, after = [], None
+    while True:
+        page = expense_store.list_expenses_page(
+            user_id, date(2024, 6, 1), date(2024, 6, 1), 2, after, False
+        )
+        if not page:
+            break
+        seen += [row["id"] for row in page]
+        last = page[-1]
+        after = (last["date"], last["created_at"], last["id"])
+    assert [str(expense_id) for expense_id in seen] == sorted(str(expense_id) for expense_id in ids)
+
+
+def test_created_at_is_required(postgres_store, user_id):
+    import psycopg
+    from db import get_db
+    with pytest.raises(psycopg.errors.NotNullViolation):
+        get_db().execute_update(
+            "INSERT INTO expenses (user_id, date, amount_paise, category, created_at)"
+            " VALUES (%s, '2024-06-01', 100, 'Food', NULL)",
+            (user_id,)
+        )
+
+
+def test_iter_expenses_json_rows(expense_store, user_id):
+    _load(expense_store, user_id)
+    chunks = list(expense_store.iter_expenses(user_id, date(2024, 2, 1), date(2024, 2, 29), True))
+    rows = [row for chunk in chunks for row in chunk]
+    assert [(row["date"], row["amount"]) for row in rows] == [
+        ("2024-02-03", 0.99), ("2024-02-29", 3500.0)
+    ]
+
+
+@pytest.mark.parametrize("start, end", [
+    (date(2024, 1, 1), date(2024, 1, 31)),
+    (date(2023, 12, 15), date(2024, 3, 10)),
+    (date(2024, 1, 15), date(2024, 2, 10)),
+    (date(2024, 3, 5), date(2024, 3, 31)),
+    (date(2000, 1, 1), date.max),
+])
+def test_summaries_match_the_rows(expense_store, user_id, start, end):
+    _load(expense_store, user_id)
+    rows = [row for row in EXPENSES if start <= row[1] <= end]
+    totals = {}
+    for _, _, paise, category, _ in rows:
+        totals[category] = totals.get(category, 0) + paise
+    expected = sorted(totals.items(), key=lambda item: -item[1])
+
+    summary = expense_store.summarize_by_category(user_id, start, end)
+    assert [(row["category"], row["total_paise"]) for row in summary] == expected
+
+    report, = expense_store.get_period_reports(user_id, [(start, end)])
+    assert report["total_paise"] == sum(totals.values())
+    assert report["expense_count"] == len(rows)
+    assert [
+        (row["category"], row["total_paise"]) for row in report["category_breakdown"]
+    ] == expected
+
+
+
+def test_period_report_from_grouping_sets_rows():
+    # GROUPING SETS ((category), ()) rows: grand total first, then categories
+    rows = [
+        {"category": None, "total_paise": 700, "expense_count": 3, "is_grand_total": 1},
+        {"category": "Food", "total_paise": 500, "expense_count": 2, "is_grand_total": 0},
+        {"category": "Bills", "total_paise": 200, "expense_count": 1, "is_grand_total": 0},
+    ]
+    assert _period_report_from_rows(rows) == {
+        "total_paise": 700,
+        "expense_count": 3,
+        "category_breakdown": [
+            {"category": "Food", "total_paise": 500, "expense_count": 2},
+            {"category": "Bills", "total_paise": 200, "expense_count": 1},
+        ],
+    }
+
+
+def test_period_report_of_an_empty_range(expense_store, user_id):
+    _load(expense_store, user_id)
+    report, = expense_store.get_period_reports(user_id, [(date(2025, 1, 1), date(2025, 12, 31))])
+    assert report == {"total_paise": 0, "expense_count": 0, "category_breakdown": []}
+
+
+def test_period_report_counts_per_category(expense_store, user_id):
+    _load(expense_store, user_id)
+    report, = expense_store.get_period_reports(user_id, [(date(2024, 1, 1), date(2024, 2, 29))])
+    assert report["category_breakdown"] == [
+        {"category": "Travel", "total_paise": 350000, "expense_count": 1},
+        {"category": "Bills", "total_paise": 45010, "expense_count": 1},
+        {"category": "Food", "total_paise": 12649, "expense_count": 2},
+        {"category": "Transport", "total_paise": 2000, "expense_count": 1},
+    ]
+
+@pytest.mark.parametrize("bucket, expected", [
+    ("day", [(date(2024, 1, 1), 45010, 1), (date(2024, 1, 15), 14550, 2),
+             (date(2024, 2, 3), 99, 1), (date(2024, 2, 29), 350000, 1)]),
+    ("week", [(date(2024, 1, 1), 45010, 1), (date(2024, 1, 15), 14550, 2),
+              (date(2024, 1, 29), 99, 1), (date(2024, 2, 26), 350000, 1)]),
+    ("month", [(date(2024, 1, 1), 59560, 3), (date(2024, 2, 1), 350099, 2)]),
+    ("year", [(date(2024, 1, 1), 409659, 5)]),
+])
+def test_spending_trend_buckets(expense_store, user_id, bucket, expected):
+    _load(expense_store, user_id)
+    rows = expense_store.spending_trend(user_id, date(2024, 1, 1), date(2024, 2, 29), bucket)
+    assert [(row["period"], row["total_paise"], row["expense_count"]) for row in rows] == expected
+
+
+def test_period_reports_keep_range_order(expense_store, user_id, monkeypatch):
+    import models
+    from cache import MemoryBackend, ResultCache
+    monkeypatch.setattr(
+        models, "result_cache", ResultCache(MemoryBackend(100, 1 << 20), ttl=60)
+    )
+    _load(expense_store, user_id)
+    ranges = [
+        (date(2024, 3, 1), date(2024, 3, 31)),
+        (date(2023, 12, 1), date(2023, 12, 31)),
+        (date(2024, 1, 1), date(2024, 1, 31)),
+        (date(2024, 2, 1), date(2024, 2, 29)),
+    ]
+    # One range cached first, so the rest are fetched in a batch around it
+    january, = expense_store.get_period_reports(user_id, [ranges[2]])
+    reports = expense_store.get_period_reports(user_id, ranges)
+    assert [report["total_paise"] for report in reports] == [800, 1500, 59560, 350099]
+    assert reports[2] == january
+
+
+def test_writes_show_up_in_summaries(expense_store, user_id):
+    _load(expense_store, user_id)
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+    before, = expense_store.get_period_reports(user_id, [(start, end)])
+    expense_store.add_expense(user_id, date(2024, 1, 20), 500, "Food", None, None)
+    after, = expense_store.get_period_reports(user_id, [(start, end)])
+    assert after["total_paise"] == before["total_paise"] + 500
+
+    assert expense_store.delete_expenses(user_id) == len(EXPENSES) + 1
+    assert expense_store.summarize_by_category(user_id, start, end) == []
+
+
+def test_async_sqlite_store_does_not_block_the_loop(sqlite_store, user_id):
+    store = AsyncSQLiteStore(sqlite_store)
+    blocker = sqlite3.connect(sqlite_store.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    async def main():
+        write = asyncio.create_task(
+            store.add_expense(user_id, date(2024, 1, 1), 100, "Food", None, None)
+        )
+        started = time.perf_counter()
+        await asyncio.sleep(0.05)
+        # the write waits on the database lock in a worker thread
+        assert time.perf_counter() - started < 0.5
+        assert not write.done()
+        blocker.execute("COMMIT")
+        await write
+        return [chunk async for chunk in store.iter_expenses(user_id, date.min, date.max, False)]
+
+    try:
+        chunks = asyncio.run(main())
+    finally:
+        blocker.close()
+    assert [row["amount_paise"] for chunk in chunks for row in chunk] == [100]
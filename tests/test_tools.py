@@ -0,0 +1,244 @@
+import asyncio
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+import pytest
+
+import tools
+from cache import MemoryBackend, ResultCache
+from models import ExpenseModel
+from tools import (
+    _prepare_batch, _prepare_expense, add_expense_tool, add_expenses_tool, decode_cursor,
+    encode_cursor, list_expenses_tool, list_expenses_tool_async, monthly_report_tool, spending_trend_tool,
+    spending_trend_tool_async, summarize_expenses_tool
+)
+
+
+def _batch(*amounts):
+    return [
+        {"date": f"2024-01-{day:02d}", "amount": amount, "category": "Food", "merchant": " Swiggy "}
+        for day, amount in enumerate(amounts, start=1)
+    ]
+
+
+def test_prepare_batch_normalizes_rows():
+    expense, = _prepare_batch("u1", _batch(12.5))
+    assert expense == {
+        "user_id": "u1",
+        "expense_date": date(2024, 1, 1),
+        "amount_paise": 1250,
+        "category": "Food",
+        "merchant": "Swiggy",
+        "note": None,
+    }
+
+
+@pytest.mark.parametrize("expenses, message", [
+    ([], "at least one expense"),
+    (_batch(10, -1), r"expenses\[1\]: amount must be positive"),
+    (_batch(10) + [{"date": "2024-13-01", "amount": 1, "category": "Food"}], r"expenses\[1\]"),
+    ([{"date": "2024-01-01", "amount": 1}], r"expenses\[0\]: category is required"),
+    (["not an object"], r"expenses\[0\]"),
+])
+def test_prepare_batch_names_the_bad_row(expenses, message):
+    with pytest.raises(ValueError, match=message):
+        _prepare_batch("u1", expenses)
+
+
+def test_prepare_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(tools, "MAX_BATCH_SIZE", 2)
+    with pytest.raises(ValueError, match="maximum is 2"):
+        _prepare_batch("u1", _batch(1, 2, 3))
+
+
+def test_add_expenses_inserts_the_batch(model_store, user_id):
+    result = add_expenses_tool(user_id, _batch(10, 20.25, 30))
+    assert result["inserted"] == 3
+
+    rows = ExpenseModel.list_expenses(user_id, date(2024, 1, 1), date(2024, 1, 31))
+    assert [str(row["id"]) for row in rows] == result["ids"]
+    assert [row["amount_paise"] for row in rows] == [1000, 2025, 3000]
+
+
+def test_add_expenses_rejects_the_whole_batch(model_store, user_id):
+    with pytest.raises(ValueError):
+        add_expenses_tool(user_id, _batch(10, 0))
+    assert ExpenseModel.list_expenses(user_id, date(2024, 1, 1), date(2024, 1, 31)) == []
+
+
+def test_cursor_round_trip():
+    key = (
+        date(2024, 1, 5),
+        datetime(2024, 1, 5, 10, 30, 0, 123456, tzinfo=timezone.utc),
+        UUID("8c9a2f4e-1b3d-4e5f-8a7b-6c5d4e3f2a1b"),
+    )
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+    # JSON-ready rows carry the same values as ISO strings
+    assert encode_cursor(tuple(
+        value.isoformat() if hasattr(value, "isoformat") else str(value) for value in key
+    )) == cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(("2024-01-05", "x", "y"))])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [0, tools.MAX_PAGE_SIZE + 1])
+def test_page_limit_bounds(limit):
+    with pytest.raises(ValueError, match="limit must be between"):
+        list_expenses_tool("u1", "2024-01-01", "2024-01-31", limit=limit)
+
+
+def test_pages_match_the_full_list(model_store, user_id):
+    # several rows share a date, so pages split inside a day
+    add_expenses_tool(user_id, _batch(*range(1, 8)) + _batch(*range(11, 15)))
+    full = list_expenses_tool(user_id, "2024-01-01", "2024-01-31")
+    assert len(full) == 11
+
+    paged, cursor = [], None
+    while True:
+        page = list_expenses_tool(user_id, "2024-01-01", "2024-01-31", limit=4, cursor=cursor)
+        paged += page["expenses"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert paged == full
+
+
+def test_unpaginated_list_is_capped(model_store, user_id, monkeypatch):
+    monkeypatch.setattr(tools, "MAX_PAGE_SIZE", 5)
+    add_expenses_tool(user_id, _batch(*range(1, 7)))
+    assert len(list_expenses_tool(user_id, "2024-01-01", "2024-01-05")) == 5
+    with pytest.raises(ValueError, match="More than 5 expenses in this range"):
+        list_expenses_tool(user_id, "2024-01-01", "2024-01-31")
+    with pytest.raises(ValueError, match="More than 5 expenses"):
+        asyncio.run(list_expenses_tool_async(user_id, "2024-01-01", "2024-01-31"))
+    assert len(list_expenses_tool(user_id, "2024-01-01", "2024-01-31", limit=5)["expenses"]) == 5
+
+
+@pytest.mark.parametrize("amount, message", [
+    (0.004, "at least 0.01"),
+    (0, "must be positive"),
+    (float("nan"), "finite number"),
+])
+def test_amounts_below_a_paisa_are_rejected(amount, message):
+    with pytest.raises(ValueError, match=message):
+        _prepare_expense("u1", "2024-01-05", amount, "Food", None, None)
+
+
+def test_amounts_are_exact_in_paise(model_store, user_id):
+    created = add_expense_tool(user_id, "2024-01-05", 0.1, "Food")
+    assert created["amount"] == 0.1
+    add_expense_tool(user_id, "2024-01-06", 0.2, "Food")
+    add_expense_tool(user_id, "2024-01-07", 45.105, "Bills")
+
+    assert summarize_expenses_tool(user_id, "2024-01-01", "2024-01-31") == [
+        {"category": "Bills", "total": 45.11},
+        {"category": "Food", "total": 0.3},
+    ]
+    report = monthly_report_tool(user_id, "2024-01")
+    assert (report["total_spending"], report["expense_count"]) == (45.41, 3)
+    assert [row["amount"] for row in list_expenses_tool(user_id, "2024-01-01", "2024-01-31")] == [
+        0.1, 0.2, 45.11
+    ]
+
+
+def test_spending_trend_tool(model_store, user_id):
+    add_expenses_tool(user_id, [
+        {"date": day, "amount": amount, "category": "Food"}
+        for day, amount in [("2024-01-01", 10), ("2024-01-07", 2.5), ("2024-01-08", 4),
+                            ("2024-03-31", 100.01)]
+    ])
+    weekly = spending_trend_tool(user_id, "2024-01-01", "2024-03-31", "week")
+    assert weekly == {
+        "user_id": user_id,
+        "bucket": "week",
+        "start_date": "2024-01-01",
+        "end_date": "2024-03-31",
+        "periods": ["2024-01-01", "2024-01-08", "2024-03-25"],
+        "totals": [12.5, 4.0, 100.01],
+        "counts": [2, 1, 1],
+        "total": 116.51,
+    }
+    monthly = asyncio.run(spending_trend_tool_async(user_id, "2024-01-02", "2024-12-31"))
+    assert (monthly["periods"], monthly["totals"]) == (
+        ["2024-01-01", "2024-03-01"], [6.5, 100.01]
+    )
+
+
+def test_spending_trend_rejects_unknown_buckets():
+    with pytest.raises(ValueError, match="bucket must be one of"):
+        spending_trend_tool("u1", "2024-01-01", "2024-01-31", "quarter")
+
+
+def test_cached_trend_follows_writes(model_store, user_id, monkeypatch):
+    import models
+    monkeypatch.setattr(
+        models, "result_cache", ResultCache(MemoryBackend(100, 1 << 20), ttl=60)
+    )
+    add_expense_tool(user_id, "2024-01-05", 10, "Food")
+    assert spending_trend_tool(user_id, "2024-01-01", "2024-12-31")["totals"] == [10.0]
+    add_expense_tool(user_id, "2024-01-20", 2.5, "Food")
+    assert spending_trend_tool(user_id, "2024-01-01", "2024-12-31")["totals"] == [12.5]
+    model_store.delete_expenses(user_id)
+    assert spending_trend_tool(user_id, "2024-01-01", "2024-12-31")["totals"] == []
+
+
+def test_monthly_report_counts_without_fetching_rows(model_store, user_id):
+    add_expenses_tool(user_id, [
+        {"date": f"2024-04-{day:02d}", "amount": 1.5, "category": category}
+        for day in range(1, 31) for category in ("Food", "Travel", "Food")
+    ])
+    report = monthly_report_tool(user_id, "2024-04")
+    assert (report["total_spending"], report["expense_count"]) == (135.0, 90)
+    assert report["category_breakdown"] == [
+        {"category": "Food", "total": 90.0}, {"category": "Travel", "total": 45.0}
+    ]
+    assert report["summary"] == (
+        "In 2024-04, you spent 135.00Rs across 90 expenses. "
+        "Your highest spending category was Food at 90.00Rs."
+    )
+
+
+def test_monthly_report_of_an_empty_month(model_store, user_id):
+    assert monthly_report_tool(user_id, "2024-05") == {
+        "user_id": user_id,
+        "month": "2024-05",
+        "total_spending": 0.0,
+        "expense_count": 0,
+        "category_breakdown": [],
+        "summary": "No expenses recorded for 2024-05.",
+    }
+
+
+def test_json_ready_rows_match_python_serialization(expense_store, user_id):
+    amounts = [1, 10, 99, 1005, 4510, 123456789, 999999999999]
+    expense_store.add_expenses(user_id, [
+        (UUID(int=n, version=4), user_id, date(2024, 2, n), paise, "Food", merchant, note)
+        for n, (paise, merchant, note) in enumerate(
+            zip(amounts, ["Swiggy", None] * 4, [None, "note, \"quoted\""] * 4), start=1
+        )
+    ])
+    if expense_store.name == "postgres":
+        from db import get_db
+        # to_char must render created_at exactly like datetime.isoformat()
+        get_db(user_id).execute_update(
+            "UPDATE expenses SET created_at = CASE date"
+            " WHEN '2024-02-01' THEN timestamptz '2024-01-01 10:00:00+00'"
+            " WHEN '2024-02-02' THEN timestamptz '2024-01-01 10:00:00.5+00'"
+            " WHEN '2024-02-03' THEN timestamptz '2024-01-01 10:00:00.000001+05:30'"
+            " ELSE created_at END WHERE user_id = %s",
+            (user_id,)
+        )
+
+    start, end = date(2024, 2, 1), date(2024, 2, 29)
+    typed = expense_store.list_expenses_page(user_id, start, end, 10, None, False)
+    json_ready = expense_store.list_expenses_page(user_id, start, end, 10, None, True)
+    assert json_ready == [tools._serialize_expense(row) for row in typed]
+    assert [row["amount"] for row in json_ready] == [
+        0.01, 0.1, 0.99, 10.05, 45.1, 1234567.89, 9999999999.99
+    ]
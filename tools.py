@@ -1,17 +1,51 @@
 """
 MCP Tool definitions for Expense Management Server.
 
-Exposes exactly 4 tools as specified:
+Exposes 9 tools:
 1. add_expense
-2. list_expenses
-3. summarize_expenses
-4. monthly_report
+2. add_expenses (batch)
+3. import_statement (CSV/OFX file)
+4. list_expenses
+5. summarize_expenses
+6. monthly_report
+7. spending_trend
+8. spending_breakdown (NumPy columns, see columns.py)
+9. category_trend (analytics mode only, see analytics.py)
+
+Each tool has a synchronous implementation (scripts, tests) and an
+asyncio one (`*_tool_async`) used by the MCP server. Both share input
+validation and output serialization.
+
+Amounts are float rupees in tool arguments and results and integer paise
+everywhere below this module: _prepare_expense converts the input once
+(storage.to_paise) and the serializers convert the output once
+(storage.from_paise).
 """
 
+import asyncio
+import base64
+import binascii
+import json
+import os
 from datetime import datetime, date
-from decimal import Decimal
-from typing import Dict, Any, List
-from models import ExpenseModel
+from typing import Dict, Any, List, Optional, Tuple, Union
+from uuid import UUID
+from models import ExpenseModel, AsyncExpenseModel
+from importer import import_statement
+from analytics import BUCKETS, get_analytics
+from columns import load_columns
+from storage import from_paise, to_paise
+
+# Upper bound on rows per add_expenses call (keeps one MCP payload sane)
+MAX_BATCH_SIZE = 10_000
+
+# list_expenses page size when a cursor is given without a limit, and cap
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1_000
+
+# spending_breakdown percentiles, and cap on the merchants it returns
+BREAKDOWN_PERCENTILES = (50, 90, 99)
+MAX_BREAKDOWN_MERCHANTS = 100
 
 
 def validate_date_string(date_str: str) -> date:
@@ -57,6 +91,247 @@ def validate_month_string(month_str: str) -> tuple[int, int]:
         )
 
 
+def _validate_user_id(user_id: str) -> None:
+    if not user_id or not user_id.strip():
+        raise ValueError("user_id is required and cannot be empty")
+
+
+def _validate_date_range(start_date: str, end_date: str) -> tuple[date, date]:
+    start = validate_date_string(start_date)
+    end = validate_date_string(end_date)
+    
+    if start > end:
+        raise ValueError(
+            f"start_date ({start_date}) cannot be after end_date ({end_date})"
+        )
+    
+    return start, end
+
+
+def _prepare_expense(
+    user_id: str,
+    date: str,
+    amount: float,
+    category: str,
+    merchant: Optional[str],
+    note: Optional[str]
+) -> Dict[str, Any]:
+    """Validate add_expense input and return ExpenseModel.add_expense kwargs."""
+    _validate_user_id(user_id)
+    
+    expense_date = validate_date_string(date)
+    
+    if amount <= 0:
+        raise ValueError(f"amount must be positive, got {amount}")
+    
+    amount_paise = to_paise(amount)
+    if amount_paise <= 0:
+        raise ValueError(f"amount must be at least 0.01, got {amount}")
+    
+    if not category or not category.strip():
+        raise ValueError("category is required and cannot be empty")
+    
+    return {
+        "user_id": user_id,
+        "expense_date": expense_date,
+        "amount_paise": amount_paise,
+        "category": category.strip(),
+        "merchant": merchant.strip() if merchant else None,
+        "note": note.strip() if note else None
+    }
+
+
+def _prepare_batch(
+    user_id: str,
+    expenses: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Validate every add_expenses row; errors name the offending index."""
+    _validate_user_id(user_id)
+    
+    if not expenses:
+        raise ValueError("expenses must contain at least one expense")
+    
+    if len(expenses) > MAX_BATCH_SIZE:
+        raise ValueError(
+            f"expenses contains {len(expenses)} rows, maximum is {MAX_BATCH_SIZE}"
+        )
+    
+    prepared = []
+    for index, expense in enumerate(expenses):
+        try:
+            prepared.append(_prepare_expense(
+                user_id,
+                expense.get("date"),
+                expense.get("amount"),
+                expense.get("category"),
+                expense.get("merchant"),
+                expense.get("note")
+            ))
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"expenses[{index}]: {e}")
+    return prepared
+
+
+def _resolve_import_path(path: str) -> str:
+    """Resolve a statement path, refusing anything outside IMPORT_DIR."""
+    base = os.path.realpath(os.getenv("IMPORT_DIR", "imports"))
+    full = os.path.realpath(os.path.join(base, path))
+    
+    if os.path.commonpath([base, full]) != base:
+        raise ValueError(f"path must be inside the import directory, got '{path}'")
+    if not os.path.isfile(full):
+        raise ValueError(f"Statement file not found: '{path}'")
+    
+    return full
+
+
+def encode_cursor(key: Tuple[Any, Any, Any]) -> str:
+    """
+    Opaque list_expenses cursor for a (date, created_at, id) keyset.
+    Accepts typed values or the ISO strings of JSON-ready rows.
+    """
+    payload = json.dumps([
+        value if isinstance(value, str) else
+        value.isoformat() if isinstance(value, (date, datetime)) else
+        str(value)
+        for value in key
+    ])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, datetime, UUID]:
+    """
+    Parse a cursor produced by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        expense_date, created_at, expense_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        return (
+            date.fromisoformat(expense_date),
+            datetime.fromisoformat(created_at),
+            UUID(expense_id)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError(f"Invalid cursor: '{cursor}'")
+
+
+def _validate_page(
+    limit: Optional[int],
+    cursor: Optional[str]
+) -> Tuple[int, Optional[Tuple[date, datetime, UUID]]]:
+    limit = DEFAULT_PAGE_SIZE if limit is None else limit
+    
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}, got {limit}")
+    
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def _serialize_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    # Rows are fetched JSON-ready (json_ready=True), nothing to convert
+    next_key = page["next_key"]
+    return {
+        "expenses": page["expenses"],
+        "next_cursor": encode_cursor(next_key) if next_key else None
+    }
+
+
+def _unpaged_expenses(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # An unpaginated list is one capped page: the result of an MCP call is
+    # a single JSON document, so a huge range would be built in memory
+    # however the rows were fetched
+    if page["next_key"] is not None:
+        raise ValueError(
+            f"More than {MAX_PAGE_SIZE} expenses in this range; "
+            "pass limit (and then cursor) to page through them"
+        )
+    return page["expenses"]
+
+
+def _serialize_expense(exp: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert paise, UUID and date values to JSON-serializable types."""
+    return {
+        "id": str(exp["id"]),
+        "user_id": exp["user_id"],
+        "date": exp["date"].isoformat(),
+        "amount": from_paise(exp["amount_paise"]),
+        "category": exp["category"],
+        "merchant": exp["merchant"],
+        "note": exp["note"],
+        "created_at": exp["created_at"].isoformat()
+    }
+
+
+def _serialize_category_totals(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "category": item["category"],
+            "total": from_paise(item["total_paise"])
+        }
+        for item in rows
+    ]
+
+
+def _build_monthly_report(
+    user_id: str,
+    month: str,
+    summary: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Shape an ExpenseModel monthly summary into the monthly_report output."""
+    category_breakdown = _serialize_category_totals(summary["category_breakdown"])
+    
+    # Generate natural language summary
+    total = from_paise(summary["total_paise"])
+    count = summary["expense_count"]
+    
+    if count == 0:
+        summary_text = f"No expenses recorded for {month}."
+    else:
+        top_category = category_breakdown[0] if category_breakdown else None
+        if top_category:
+            summary_text = (
+                f"In {month}, you spent {total:.2f}Rs across {count} expenses. "
+                f"Your highest spending category was {top_category['category']} "
+                f"at {top_category['total']:.2f}Rs."
+            )
+        else:
+            summary_text = f"In {month}, you spent {total:.2f}Rs across {count} expenses."
+    
+    return {
+        "user_id": user_id,
+        "month": month,
+        "total_spending": total,
+        "expense_count": count,
+        "category_breakdown": category_breakdown,
+        "summary": summary_text
+    }
+
+
+def _build_spending_trend(
+    user_id: str,
+    bucket: str,
+    start: date,
+    end: date,
+    rows: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Shape ExpenseModel.spending_trend rows into parallel arrays."""
+    return {
+        "user_id": user_id,
+        "bucket": bucket,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "periods": [row["period"].isoformat() for row in rows],
+        "totals": [from_paise(row["total_paise"]) for row in rows],
+        "counts": [row["expense_count"] for row in rows],
+        "total": from_paise(sum(row["total_paise"] for row in rows))
+    }
+
+
 def add_expense_tool(
     user_id: str,
     date: str,
@@ -82,89 +357,114 @@ def add_expense_tool(
     Raises:
         ValueError: If validation fails
     """
-    # Validate inputs
-    if not user_id or not user_id.strip():
-        raise ValueError("user_id is required and cannot be empty")
-    
-    expense_date = validate_date_string(date)
-    
-    if amount <= 0:
-        raise ValueError(f"amount must be positive, got {amount}")
+    expense = _prepare_expense(user_id, date, amount, category, merchant, note)
+    result = ExpenseModel.add_expense(**expense)
+    return _serialize_expense(result)
+
+
+def add_expenses_tool(
+    user_id: str,
+    expenses: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Add a batch of expenses for a user in one transaction.
     
-    if not category or not category.strip():
-        raise ValueError("category is required and cannot be empty")
+    Args:
+        user_id: User identifier (required)
+        expenses: List of {date, amount, category, merchant?, note?}
+                  objects, validated with the same rules as add_expense
+        
+    Returns:
+        {"inserted": count, "ids": [generated ids in input order]}
+        
+    Raises:
+        ValueError: If any row fails validation (nothing is inserted)
+    """
+    prepared = _prepare_batch(user_id, expenses)
+    ids = ExpenseModel.add_expenses(user_id, prepared)
+    return {"inserted": len(ids), "ids": [str(expense_id) for expense_id in ids]}
+
+
+def import_statement_tool(
+    user_id: str,
+    path: str,
+    file_format: str = None,
+    column_map: Dict[str, str] = None,
+    date_format: str = None,
+    expense_sign: str = None,
+    default_category: str = None
+) -> Dict[str, Any]:
+    """
+    Import a CSV/OFX statement file from the server's import directory.
     
-    # Convert to Decimal for precision
-    amount_decimal = Decimal(str(amount))
+    Args:
+        user_id: User identifier (required)
+        path: File path relative to IMPORT_DIR (required)
+        file_format: "csv" or "ofx" (optional, default from extension)
+        column_map: CSV {expense field: header} mapping (optional)
+        date_format: strptime format of CSV dates (optional)
+        expense_sign: "positive" or "negative" (optional)
+        default_category: Category for rows without one (optional)
+        
+    Returns:
+        Import statistics (imported, skipped, errors, rows_per_second, ...)
+    """
+    _validate_user_id(user_id)
     
-    # Insert expense
-    result = ExpenseModel.add_expense(
+    return import_statement(
         user_id=user_id,
-        expense_date=expense_date,
-        amount=amount_decimal,
-        category=category.strip(),
-        merchant=merchant.strip() if merchant else None,
-        note=note.strip() if note else None
+        path=_resolve_import_path(path),
+        file_format=file_format,
+        column_map=column_map,
+        date_format=date_format,
+        expense_sign=expense_sign,
+        default_category=(default_category or "").strip() or "Uncategorized"
     )
-    
-    # Convert Decimal and date to JSON-serializable types
-    return {
-        "id": str(result["id"]),
-        "user_id": result["user_id"],
-        "date": result["date"].isoformat(),
-        "amount": float(result["amount"]),
-        "category": result["category"],
-        "merchant": result["merchant"],
-        "note": result["note"],
-        "created_at": result["created_at"].isoformat()
-    }
 
 
 def list_expenses_tool(
     user_id: str,
     start_date: str,
-    end_date: str
-) -> List[Dict[str, Any]]:
+    end_date: str,
+    limit: int = None,
+    cursor: str = None
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
     List a user's expenses within a date range.
     
+    Without limit/cursor the whole range is returned as an array, up to
+    MAX_PAGE_SIZE rows; longer ranges must be paged. With either of them
+    one keyset page is returned instead.
+    
     Args:
         user_id: User identifier (required)
         start_date: Range start in YYYY-MM-DD format (required)
         end_date: Range end in YYYY-MM-DD format (required)
+        limit: Page size, 1..MAX_PAGE_SIZE (optional)
+        cursor: next_cursor from the previous page (optional)
         
     Returns:
-        Array of expense objects ordered by date ASC
-    """
-    # Validate inputs
-    if not user_id or not user_id.strip():
-        raise ValueError("user_id is required and cannot be empty")
+        Array of expense objects ordered by date ASC, or
+        {"expenses": [...], "next_cursor": str or None} when paginating
     
-    start = validate_date_string(start_date)
-    end = validate_date_string(end_date)
+    Raises:
+        ValueError: Without limit/cursor, if the range holds more than
+                    MAX_PAGE_SIZE expenses
+    """
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
     
-    if start > end:
-        raise ValueError(
-            f"start_date ({start_date}) cannot be after end_date ({end_date})"
+    if limit is not None or cursor:
+        page_size, after = _validate_page(limit, cursor)
+        page = ExpenseModel.list_expenses_page(
+            user_id, start, end, page_size, after, json_ready=True
         )
+        return _serialize_page(page)
     
-    # Get expenses
-    expenses = ExpenseModel.list_expenses(user_id, start, end)
-    
-    # Convert to JSON-serializable format
-    return [
-        {
-            "id": str(exp["id"]),
-            "user_id": exp["user_id"],
-            "date": exp["date"].isoformat(),
-            "amount": float(exp["amount"]),
-            "category": exp["category"],
-            "merchant": exp["merchant"],
-            "note": exp["note"],
-            "created_at": exp["created_at"].isoformat()
-        }
-        for exp in expenses
-    ]
+    page = ExpenseModel.list_expenses_page(
+        user_id, start, end, MAX_PAGE_SIZE, json_ready=True
+    )
+    return _unpaged_expenses(page)
 
 
 def summarize_expenses_tool(
@@ -183,29 +483,11 @@ def summarize_expenses_tool(
     Returns:
         Array of {category, total} objects ordered by total DESC
     """
-    # Validate inputs
-    if not user_id or not user_id.strip():
-        raise ValueError("user_id is required and cannot be empty")
-    
-    start = validate_date_string(start_date)
-    end = validate_date_string(end_date)
-    
-    if start > end:
-        raise ValueError(
-            f"start_date ({start_date}) cannot be after end_date ({end_date})"
-        )
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
     
-    # Get category summary
     summary = ExpenseModel.summarize_by_category(user_id, start, end)
-    
-    # Convert to JSON-serializable format
-    return [
-        {
-            "category": item["category"],
-            "total": float(item["total"])
-        }
-        for item in summary
-    ]
+    return _serialize_category_totals(summary)
 
 
 def monthly_report_tool(
@@ -222,46 +504,281 @@ def monthly_report_tool(
     Returns:
         Monthly report with total_spending, category_breakdown, and summary
     """
-    # Validate inputs
-    if not user_id or not user_id.strip():
-        raise ValueError("user_id is required and cannot be empty")
-    
+    _validate_user_id(user_id)
     year, month_num = validate_month_string(month)
     
-    # Get monthly summary
     summary = ExpenseModel.get_monthly_summary(user_id, year, month_num)
+    return _build_monthly_report(user_id, month, summary)
+
+
+def spending_trend_tool(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    bucket: str = "month"
+) -> Dict[str, Any]:
+    """
+    Total spending per day, week, month or year over a date range,
+    computed by one grouped query.
+        
+    Args:
+        user_id: User identifier (required)
+        start_date: Range start in YYYY-MM-DD format (required)
+        end_date: Range end in YYYY-MM-DD format (required)
+        bucket: day, week, month or year (default month)
+        
+    Returns:
+        {"periods": [bucket start dates], "totals": [...], "counts": [...],
+        "total": ...}; buckets without expenses are omitted
+        
+    Raises:
+        ValueError: If validation fails
+    """
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
     
-    # Convert category breakdown to JSON-serializable
-    category_breakdown = [
-        {
-            "category": item["category"],
-            "total": float(item["total"])
+    rows = ExpenseModel.spending_trend(user_id, start, end, bucket)
+    return _build_spending_trend(user_id, bucket, start, end, rows)
+
+
+def spending_breakdown_tool(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    top: int = 10
+) -> Dict[str, Any]:
+    """
+    Top merchants by spend and expense amount percentiles over a date
+    range, aggregated on column arrays (columns.py) instead of row dicts.
+        
+    Args:
+        user_id: User identifier (required)
+        start_date: Range start in YYYY-MM-DD format (required)
+        end_date: Range end in YYYY-MM-DD format (required)
+        top: Number of merchants to return, 1..MAX_BREAKDOWN_MERCHANTS
+             (default 10)
+        
+    Returns:
+        {"total": ..., "expense_count": ..., "merchants": [{"merchant",
+        "total", "count"}] by total DESC (merchant None = not recorded),
+        "amount_percentiles": {"p50", "p90", "p99"}} (None when empty)
+        
+    Raises:
+        ValueError: If validation fails
+    """
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
+    if not 1 <= top <= MAX_BREAKDOWN_MERCHANTS:
+        raise ValueError(
+            f"top must be between 1 and {MAX_BREAKDOWN_MERCHANTS}, got {top}"
+        )
+    
+    columns = load_columns(user_id, start, end)
+    percentiles = columns.percentiles(BREAKDOWN_PERCENTILES)
+    return {
+        "user_id": user_id,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "total": from_paise(columns.total()),
+        "expense_count": len(columns),
+        "merchants": [
+            {"merchant": merchant, "total": from_paise(paise), "count": count}
+            for merchant, paise, count in columns.by_merchant()[:top]
+        ],
+        "amount_percentiles": {
+            f"p{percent}": from_paise(int(round(value))) if len(columns) else None
+            for percent, value in zip(BREAKDOWN_PERCENTILES, percentiles)
         }
-        for item in summary["category_breakdown"]
-    ]
+    }
+
+
+def category_trend_tool(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    bucket: str = "month"
+) -> Dict[str, Any]:
+    """
+    Spending per category per day/week/month/quarter/year, computed on
+    the columnar analytics copy (a copy older than ANALYTICS_MAX_AGE is
+    refreshed in the background; this call answers from it as it is).
     
-    # Generate natural language summary
-    total = summary["total_spending"]
-    count = summary["expense_count"]
+    Args:
+        user_id: User identifier (required)
+        start_date: Range start in YYYY-MM-DD format (required)
+        end_date: Range end in YYYY-MM-DD format (required)
+        bucket: day, week, month, quarter or year (default month)
     
-    if count == 0:
-        summary_text = f"No expenses recorded for {month}."
-    else:
-        top_category = category_breakdown[0] if category_breakdown else None
-        if top_category:
-            summary_text = (
-                f"In {month}, you spent {total:.2f}Rs across {count} expenses. "
-                f"Your highest spending category was {top_category['category']} "
-                f"at {top_category['total']:.2f}Rs."
-            )
-        else:
-            summary_text = f"In {month}, you spent {total:.2f}Rs across {count} expenses."
+    Returns:
+        {"periods": [bucket start dates], "categories": {category:
+        [total per period]}, "totals": [...], "as_of": {source: watermark}}
+    
+    Raises:
+        ValueError: If validation fails, analytics is not enabled or the
+                    copy has not been built yet
+    """
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}, got '{bucket}'")
     
+    analytics = get_analytics()
+    analytics.refresh_if_stale()
+    trend = analytics.category_trend(user_id, start, end, bucket)
     return {
         "user_id": user_id,
-        "month": month,
-        "total_spending": total,
-        "expense_count": count,
-        "category_breakdown": category_breakdown,
-        "summary": summary_text
+        "bucket": bucket,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "periods": [period.isoformat() for period in trend["periods"]],
+        "categories": {
+            category: [from_paise(total) for total in series]
+            for category, series in trend["categories"].items()
+        },
+        "totals": [from_paise(total) for total in trend["totals"]],
+        "as_of": analytics.as_of()
     }
+
+
+# -------- asyncio variants (used by the MCP server) --------
+
+async def add_expense_tool_async(
+    user_id: str,
+    date: str,
+    amount: float,
+    category: str,
+    merchant: str = None,
+    note: str = None
+) -> Dict[str, Any]:
+    """Async variant of add_expense_tool."""
+    expense = _prepare_expense(user_id, date, amount, category, merchant, note)
+    result = await AsyncExpenseModel.add_expense(**expense)
+    return _serialize_expense(result)
+
+
+async def add_expenses_tool_async(
+    user_id: str,
+    expenses: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Async variant of add_expenses_tool."""
+    prepared = _prepare_batch(user_id, expenses)
+    ids = await AsyncExpenseModel.add_expenses(user_id, prepared)
+    return {"inserted": len(ids), "ids": [str(expense_id) for expense_id in ids]}
+
+
+async def import_statement_tool_async(
+    user_id: str,
+    path: str,
+    file_format: str = None,
+    column_map: Dict[str, str] = None,
+    date_format: str = None,
+    expense_sign: str = None,
+    default_category: str = None
+) -> Dict[str, Any]:
+    """
+    Async variant of import_statement_tool.
+    
+    File parsing is blocking, so the import runs on a worker thread
+    (using the synchronous pool) instead of the event loop.
+    """
+    return await asyncio.to_thread(
+        import_statement_tool,
+        user_id, path, file_format, column_map, date_format,
+        expense_sign, default_category
+    )
+
+
+async def list_expenses_tool_async(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    limit: int = None,
+    cursor: str = None
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """Async variant of list_expenses_tool."""
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
+    
+    if limit is not None or cursor:
+        page_size, after = _validate_page(limit, cursor)
+        page = await AsyncExpenseModel.list_expenses_page(
+            user_id, start, end, page_size, after, json_ready=True
+        )
+        return _serialize_page(page)
+    
+    page = await AsyncExpenseModel.list_expenses_page(
+        user_id, start, end, MAX_PAGE_SIZE, json_ready=True
+    )
+    return _unpaged_expenses(page)
+
+
+async def summarize_expenses_tool_async(
+    user_id: str,
+    start_date: str,
+    end_date: str
+) -> List[Dict[str, Any]]:
+    """Async variant of summarize_expenses_tool."""
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
+    
+    summary = await AsyncExpenseModel.summarize_by_category(user_id, start, end)
+    return _serialize_category_totals(summary)
+
+
+async def monthly_report_tool_async(
+    user_id: str,
+    month: str
+) -> Dict[str, Any]:
+    """Async variant of monthly_report_tool."""
+    _validate_user_id(user_id)
+    year, month_num = validate_month_string(month)
+    
+    summary = await AsyncExpenseModel.get_monthly_summary(user_id, year, month_num)
+    return _build_monthly_report(user_id, month, summary)
+
+
+async def spending_trend_tool_async(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    bucket: str = "month"
+) -> Dict[str, Any]:
+    """Async variant of spending_trend_tool."""
+    _validate_user_id(user_id)
+    start, end = _validate_date_range(start_date, end_date)
+    
+    rows = await AsyncExpenseModel.spending_trend(user_id, start, end, bucket)
+    return _build_spending_trend(user_id, bucket, start, end, rows)
+
+
+async def spending_breakdown_tool_async(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    top: int = 10
+) -> Dict[str, Any]:
+    """
+    Async variant of spending_breakdown_tool.
+    
+    The columns are loaded on the synchronous pool and aggregated by
+    NumPy, so the call runs on a worker thread.
+    """
+    return await asyncio.to_thread(
+        spending_breakdown_tool, user_id, start_date, end_date, top
+    )
+
+
+async def category_trend_tool_async(
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    bucket: str = "month"
+) -> Dict[str, Any]:
+    """
+    Async variant of category_trend_tool.
+    
+    DuckDB queries block, so they run on a worker thread.
+    """
+    return await asyncio.to_thread(
+        category_trend_tool, user_id, start_date, end_date, bucket
+    )